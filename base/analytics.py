@@ -0,0 +1,89 @@
+"""
+Form submission analytics, kept as running counts in FormAnswerCount.
+
+Each submission adds one to its form's count for the day it arrived, and
+one to the count of each answer it gave to a choice field (dropdowns, radio
+buttons, checkboxes). Reading a form's daily totals and answer distributions
+is then a couple of grouped queries however many submissions there are,
+instead of loading and parsing every submission's JSON.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils.timezone import localdate
+
+from base.models import FormAnswerCount, FormField
+
+CHOICE_FIELD_TYPES = ["checkbox", "checkboxes", "dropdown", "multiselect", "radio"]
+
+
+def get_choice_fields(page_id):
+    return list(
+        FormField.objects.filter(page_id=page_id, field_type__in=CHOICE_FIELD_TYPES).values_list(
+            "clean_name", flat=True
+        )
+    )
+
+
+def get_answers(form_data, choice_fields):
+    """Yield the (field, value) pairs counted for a submission"""
+    yield "", ""
+    for field in choice_fields:
+        value = form_data.get(field)
+        values = value if isinstance(value, list) else [value]
+        for value in values:
+            if value is not None and value != "":
+                yield field, str(value)[:255]
+
+
+def increment(page_id, date, field, value, delta):
+    counts = FormAnswerCount.objects.filter(page_id=page_id, date=date, field=field, value=value)
+    # Nothing to take a deleted submission from, e.g. when its page's
+    # counts were deleted along with it
+    if counts.update(count=F("count") + delta) or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            FormAnswerCount.objects.create(page_id=page_id, date=date, field=field, value=value, count=delta)
+    except IntegrityError:
+        # Created by a concurrent submission
+        counts.update(count=F("count") + delta)
+
+
+def record_submission(submission, delta=1, choice_fields=None):
+    """Add a submission to its form's counts, or take it away with delta=-1"""
+    if choice_fields is None:
+        choice_fields = get_choice_fields(submission.page_id)
+    date = localdate(submission.submit_time)
+    for field, value in get_answers(submission.form_data, choice_fields):
+        increment(submission.page_id, date, field, value, delta)
+
+
+def get_form_analytics(page, start=None, end=None):
+    """
+    Return a form's submission counts between two dates (inclusive):
+    {"total": n, "daily": [{"date", "count"}], "fields": {field: {value: count}}}
+    """
+    counts = FormAnswerCount.objects.filter(page=page)
+    if start:
+        counts = counts.filter(date__gte=start)
+    if end:
+        counts = counts.filter(date__lte=end)
+
+    daily = [
+        {"date": date, "count": count}
+        for date, count in counts.filter(field="").order_by("date").values_list("date", "count")
+        if count
+    ]
+
+    fields = {}
+    answers = counts.exclude(field="").values("field", "value").annotate(total=Sum("count")).order_by("field", "-total")
+    for answer in answers:
+        if answer["total"]:
+            fields.setdefault(answer["field"], {})[answer["value"]] = answer["total"]
+
+    return {
+        "total": sum(day["count"] for day in daily),
+        "daily": daily,
+        "fields": fields,
+    }
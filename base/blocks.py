@@ -1,12 +1,19 @@
+from django.db.models import prefetch_related_objects
+
 from wagtail.blocks import (
     CharBlock,
     ChoiceBlock,
     RichTextBlock,
     StreamBlock,
+    StreamValue,
     StructBlock,
+    StructValue,
 )
-from wagtail.embeds.blocks import EmbedBlock
+from wagtail.blocks.list_block import ListValue
 from wagtail.images.blocks import ImageBlock
+from wagtail.images.models import AbstractImage
+
+from base.embeds import StoredEmbedBlock
 
 
 class CaptionedImageBlock(StructBlock):
@@ -41,7 +48,31 @@ class BaseStreamBlock(StreamBlock):
     heading_block = HeadingBlock()
     paragraph_block = RichTextBlock(icon="pilcrow")
     image_block = CaptionedImageBlock()
-    embed_block = EmbedBlock(
+    embed_block = StoredEmbedBlock(
         help_text="Insert a URL to embed. For example, https://www.youtube.com/watch?v=SGJFWirQ3ks",
         icon="media",
-    )
\ No newline at end of file
+    )
+
+
+def find_images(value):
+    """Yield every image in a StreamField value, however deeply nested"""
+    if isinstance(value, AbstractImage):
+        yield value
+    elif isinstance(value, StreamValue):
+        for child in value:
+            yield from find_images(child.value)
+    elif isinstance(value, StructValue):
+        for child in value.values():
+            yield from find_images(child)
+    elif isinstance(value, (ListValue, list)):
+        for child in value:
+            yield from find_images(child)
+
+
+def prefetch_renditions(*streams):
+    """
+    Fetch the renditions of every image in the streams with one query, so
+    rendering them doesn't look each rendition up separately.
+    """
+    images = [image for stream in streams for image in find_images(stream)]
+    prefetch_related_objects(images, "renditions")
@@ -0,0 +1,156 @@
+"""
+Embed rendering that never contacts an oEmbed provider while serving a page.
+
+Embed blocks are checked against the providers when edited in the admin,
+as Wagtail's EmbedBlock does. Embeds used by a page are fetched and stored
+when it is published (see ``base.tasks.prefetch_embeds``) and kept fresh
+by the ``refresh_embeds`` command. Rendering only reads the stored Embed
+rows, falling back to a plain link for anything that hasn't been fetched
+yet.
+"""
+
+import functools
+import logging
+import re
+
+from django.core.exceptions import ValidationError
+from django.template.loader import render_to_string
+from django.utils.functional import cached_property
+from django.utils.html import format_html
+from django.utils.translation import gettext_lazy as _
+
+from wagtail.blocks import ListBlock, RichTextBlock, StreamValue, StructValue
+from wagtail.blocks.list_block import ListValue
+from wagtail.embeds.blocks import EmbedBlock, EmbedValue
+from wagtail.embeds.embeds import get_embed, get_embed_hash
+from wagtail.embeds.exceptions import EmbedException
+from wagtail.embeds.models import Embed
+from wagtail.embeds.rich_text import MediaEmbedHandler
+from wagtail.fields import RichTextField, StreamField
+from wagtail.rich_text import RichText
+from wagtail.rich_text.rewriters import extract_attrs
+
+logger = logging.getLogger(__name__)
+
+EMBED_TAG_RE = re.compile(r"<embed(\b(?:[^\"'>]|\"[^\"]*\"|'[^']*')*)>")
+
+
+def get_stored_embed(url, max_width=None, max_height=None):
+    """Return the stored Embed for a URL, even if due a refresh, or None"""
+    return Embed.objects.filter(hash=get_embed_hash(url, max_width, max_height)).first()
+
+
+def stored_embed_to_frontend_html(url, max_width=None, max_height=None):
+    embed = get_stored_embed(url, max_width, max_height)
+    if embed is None:
+        logger.warning("Embed for %s has not been prefetched", url)
+        return format_html('<a href="{}">{}</a>', url, url)
+    return render_to_string("wagtailembeds/embed_frontend.html", {"embed": embed})
+
+
+class StoredEmbedValue(EmbedValue):
+    @cached_property
+    def html(self):
+        return stored_embed_to_frontend_html(self.url, self.max_width, self.max_height)
+
+
+class StoredEmbedBlock(EmbedBlock):
+    """EmbedBlock that renders from stored embeds only"""
+
+    def _stored(self, value):
+        if value is None or isinstance(value, StoredEmbedValue):
+            return value
+        return StoredEmbedValue(value.url, value.max_width, value.max_height)
+
+    def get_default(self):
+        return self._stored(super().get_default())
+
+    def to_python(self, value):
+        return self._stored(super().to_python(value))
+
+    def value_from_form(self, value):
+        return self._stored(super().value_from_form(value))
+
+    def normalize(self, value):
+        # Values assigned in code, e.g. page.body = [("embed", url)]
+        return self._stored(super().normalize(value))
+
+    def clean(self, value):
+        # Stored values render a link for any URL, so EmbedBlock's check of
+        # the rendered HTML always passes. Ask the finders instead, which
+        # also stores the embed for the page to render.
+        if isinstance(value, EmbedValue) and value.url:
+            try:
+                get_embed(value.url, value.max_width, value.max_height)
+            except EmbedException:
+                raise ValidationError(_("Cannot find an embed for this URL."))
+        return super(EmbedBlock, self).clean(value)
+
+
+class StoredMediaEmbedHandler(MediaEmbedHandler):
+    """Rich text media embeds rendered from stored embeds only"""
+
+    @staticmethod
+    def expand_db_attributes(attrs):
+        return stored_embed_to_frontend_html(attrs["url"])
+
+
+def _find_block_embeds(value):
+    if isinstance(value, EmbedValue):
+        yield (value.url, value.max_width, value.max_height)
+    elif isinstance(value, RichText):
+        yield from find_rich_text_embeds(value.source)
+    elif isinstance(value, StreamValue):
+        for child in value:
+            yield from _find_block_embeds(child.value)
+    elif isinstance(value, (StructValue, dict)):
+        for child in value.values():
+            yield from _find_block_embeds(child)
+    elif isinstance(value, (ListValue, list)):
+        for child in value:
+            yield from _find_block_embeds(child)
+
+
+def find_rich_text_embeds(html):
+    for match in EMBED_TAG_RE.finditer(html or ""):
+        attrs = extract_attrs(match.group(1))
+        if attrs.get("embedtype") == "media" and attrs.get("url"):
+            yield (attrs["url"], None, None)
+
+
+def _allows_embeds(features):
+    # None means the editor's default features, which include embeds
+    return features is None or "embed" in features
+
+
+def _block_may_embed(block):
+    if isinstance(block, EmbedBlock):
+        return True
+    if isinstance(block, RichTextBlock):
+        return _allows_embeds(block.features)
+    if isinstance(block, ListBlock):
+        return _block_may_embed(block.child_block)
+    return any(_block_may_embed(child) for child in getattr(block, "child_blocks", {}).values())
+
+
+@functools.cache
+def get_embed_fields(model):
+    """The StreamFields and RichTextFields of a model that can hold embeds"""
+    fields = []
+    for field in model._meta.get_fields():
+        if isinstance(field, StreamField) and _block_may_embed(field.stream_block):
+            fields.append(field)
+        elif isinstance(field, RichTextField) and _allows_embeds(field.features):
+            fields.append(field)
+    return fields
+
+
+def find_embeds(instance):
+    """Return (url, max_width, max_height) for every embed in an object's content"""
+    embeds = set()
+    for field in get_embed_fields(type(instance)):
+        if isinstance(field, StreamField):
+            embeds.update(_find_block_embeds(getattr(instance, field.name)))
+        else:
+            embeds.update(find_rich_text_embeds(getattr(instance, field.name)))
+    return sorted(embeds, key=lambda embed: (embed[0], str(embed[1]), str(embed[2])))
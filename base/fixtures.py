@@ -0,0 +1,75 @@
+"""
+Generated content shared by the performance tests and the seed_site
+command: filler text, small PNG images, stub PDF documents and
+FlexiblePage StreamField data, built reproducibly from a random.Random.
+
+Nothing here imports django.test or wagtail.test, so seed_site doesn't
+load the test framework into a production process.
+"""
+
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.images import ImageFile
+from PIL import Image as PILImage
+
+from wagtail.documents import get_document_model
+from wagtail.images import get_image_model
+
+WORDS = (
+    "performance cache query render template stream block page image team "
+    "search index tree editor publish revision budget archive gallery author"
+).split()
+
+
+def sentence(rng, words=8):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def paragraph(rng, sentences=4):
+    return "<p>" + " ".join(sentence(rng) for _ in range(sentences)) + "</p>"
+
+
+def make_image(title, colour, size=(64, 48)):
+    output = BytesIO()
+    PILImage.new("RGB", size, colour).save(output, "PNG")
+    return get_image_model().objects.create(title=title, file=ImageFile(output, name=f"{title}.png"))
+
+
+def make_images(rng, count):
+    return [
+        make_image(f"image-{n}", tuple(rng.randrange(256) for _ in range(3)))
+        for n in range(count)
+    ]
+
+
+def make_documents(count):
+    return [
+        get_document_model().objects.create(
+            title=f"document-{n}", file=ContentFile(b"%PDF-1.4\n", name=f"document-{n}.pdf")
+        )
+        for n in range(count)
+    ]
+
+
+def make_flexible_stream(rng, count, images, documents, pages):
+    """Raw StreamField data cycling through FlexibleContentBlock's block types"""
+    makers = [
+        lambda: ("heading", sentence(rng, 4)),
+        lambda: ("paragraph", paragraph(rng)),
+        lambda: ("image", rng.choice(images).pk),
+        lambda: ("document", rng.choice(documents).pk),
+        lambda: ("call_to_action", {
+            "title": sentence(rng, 3), "text": paragraph(rng, 1), "button_text": "More",
+            "button_link": "", "button_page": rng.choice(pages).pk,
+        }),
+        lambda: ("quote", {"text": sentence(rng), "author": "Ada", "author_title": ""}),
+        lambda: ("columns", {"columns": [
+            {"heading": sentence(rng, 2), "content": paragraph(rng, 2)} for _ in range(3)
+        ]}),
+        lambda: ("anchor", f"section-{rng.randrange(1000)}"),
+    ]
+    return [
+        {"type": block_type, "value": value}
+        for block_type, value in (makers[n % len(makers)]() for n in range(count))
+    ]
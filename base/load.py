@@ -0,0 +1,75 @@
+"""
+Sending requests to a running server from concurrent clients, and summing
+up their latencies, for the load_test and benchmark_servers commands.
+"""
+
+import threading
+import time
+import urllib.request
+
+
+def percentile(latencies, p):
+    """The p-th percentile (0-100) of sorted latencies"""
+    if not latencies:
+        return 0
+    return latencies[min(int(len(latencies) * p / 100), len(latencies) - 1)]
+
+
+def summarise(latencies, errors, duration):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rate": round(len(latencies) / duration, 2),
+        "mean": round(sum(latencies) / len(latencies), 2) if latencies else 0,
+        **{f"p{p}": round(percentile(latencies, p), 2) for p in (50, 90, 95, 99)},
+        "max": round(latencies[-1], 2) if latencies else 0,
+    }
+
+
+def timed_get(url):
+    """Request a URL, returning the milliseconds taken"""
+    start = time.perf_counter()
+    urllib.request.urlopen(url, timeout=30).read()
+    return (time.perf_counter() - start) * 1000
+
+
+def run_load(clients, duration, get_requests):
+    """
+    Send requests from concurrent clients, each in a thread, for duration
+    seconds. get_requests(number) returns the requests of one client, as
+    an iterable of (route, send), where send() makes a request and returns
+    the milliseconds it took, raising OSError if it fails.
+
+    Returns the seconds taken, including requests still running at the
+    deadline, and {route: (latencies, errors)}.
+    """
+    start = time.monotonic()
+    deadline = start + duration
+    per_client = [{} for _ in range(clients)]
+
+    def client(number):
+        results = per_client[number]
+        for route, send in get_requests(number):
+            if time.monotonic() >= deadline:
+                break
+            latencies, errors = results.setdefault(route, ([], [0]))
+            try:
+                latencies.append(send())
+            except OSError:
+                errors[0] += 1
+
+    threads = [threading.Thread(target=client, args=(number,)) for number in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    routes = {}
+    for results in per_client:
+        for route, (latencies, errors) in results.items():
+            merged = routes.setdefault(route, ([], [0]))
+            merged[0].extend(latencies)
+            merged[1][0] += errors[0]
+    return elapsed, {route: (latencies, errors[0]) for route, (latencies, errors) in routes.items()}
@@ -0,0 +1,232 @@
+import json
+import os
+import tempfile
+from datetime import datetime
+from multiprocessing import Pool
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.utils import timezone
+
+from wagtail.models import ModelLogEntry, Page, ReferenceIndex, Site
+
+from base.models import FooterText
+
+# When the last bake started and the files it has written, relative to the
+# output directory, so stale files can be removed without touching anything
+# else kept there
+MANIFEST_FILE = ".bake-manifest.json"
+
+# Set in each worker process by _init_worker
+_client = None
+_output_dir = None
+
+
+def _init_worker(hostname, output_dir):
+    global _client, _output_dir
+    _client = Client(HTTP_HOST=hostname, raise_request_exception=False)
+    _output_dir = output_dir
+
+
+def get_output_path(output_dir, url, query=""):
+    """
+    Map a page URL (and optional query string) to a file under output_dir.
+
+    Query string variants are written to a subdirectory named after the
+    query, so nginx can serve them with:
+
+        try_files $uri/$args/index.html $uri/index.html =404;
+    """
+    parts = [output_dir] + [part for part in url.split("/") if part]
+    if query:
+        parts.append(query)
+    return os.path.join(*parts, "index.html")
+
+
+def write_atomic(path, content):
+    """Write a file so readers never see it half-written"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as f:
+        f.write(content)
+    os.chmod(f.name, 0o644)
+    os.replace(f.name, path)
+
+
+def bake_url(job):
+    url, query = job
+    response = _client.get(url + ("?" + query if query else ""))
+    if response.status_code != 200:
+        return url, query, response.status_code
+    write_atomic(get_output_path(_output_dir, url, query), response.content)
+    return url, query, 200
+
+
+def read_manifest(output_dir):
+    """The (start time, set of relative paths written) of the last bake, or (None, set())"""
+    try:
+        with open(os.path.join(output_dir, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        return datetime.fromisoformat(manifest["baked_at"]), set(manifest["files"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None, set()
+
+
+def write_manifest(output_dir, baked_at, files):
+    manifest = {"baked_at": baked_at.isoformat(), "files": sorted(files)}
+    write_atomic(os.path.join(output_dir, MANIFEST_FILE), json.dumps(manifest).encode())
+
+
+def remove_stale_outputs(output_dir, baked_files, live_files):
+    """
+    Delete files an earlier bake wrote that aren't in live_files, such as
+    pages unpublished, moved or deleted since, along with the directories
+    left empty. Anything else in output_dir is left alone. Paths are
+    relative to output_dir; returns those removed.
+    """
+    removed = []
+    for path in sorted(baked_files - live_files):
+        full_path = os.path.join(output_dir, path)
+        if not os.path.isfile(full_path):
+            continue
+        os.remove(full_path)
+        removed.append(path)
+        folder = os.path.dirname(full_path)
+        while os.path.normpath(folder) != os.path.normpath(output_dir) and not os.listdir(folder):
+            os.rmdir(folder)
+            folder = os.path.dirname(folder)
+    return removed
+
+
+def get_affected_pages(pages, since, site):
+    """
+    Return the pages whose HTML may have changed since the given time: the
+    pages published since then, their parents' listings, pages referencing
+    them and pages that list their model (see ``cache_dependencies``).
+    """
+    changed = [page for page in pages if page.last_published_at and page.last_published_at > since]
+    if not changed:
+        return []
+
+    # Children of the site root appear in the navigation on every page
+    if any(page.depth == site.root_page.depth + 1 for page in changed):
+        return pages
+
+    affected_ids = {page.pk for page in changed}
+    affected_ids.update(page.get_parent().pk for page in changed)
+
+    changed_ids = [str(page.pk) for page in changed]
+    affected_ids.update(
+        int(object_id)
+        for object_id in ReferenceIndex.objects.filter(
+            to_content_type__app_label="wagtailcore",
+            to_content_type__model="page",
+            to_object_id__in=changed_ids,
+            base_content_type__app_label="wagtailcore",
+            base_content_type__model="page",
+        ).values_list("object_id", flat=True)
+    )
+
+    changed_models = {page.specific_class._meta.label_lower for page in changed}
+    for page in pages:
+        dependencies = {label.lower() for label in getattr(page, "cache_dependencies", [])}
+        if dependencies & changed_models:
+            affected_ids.add(page.pk)
+
+    return [page for page in pages if page.pk in affected_ids]
+
+
+class Command(BaseCommand):
+    help = 'Render every live page of the default site to static HTML files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default=getattr(settings, 'STATIC_SITE_ROOT', None),
+            help='Directory to write the baked site to',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Number of worker processes rendering pages, 1 renders in-process',
+        )
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help=(
+                'Only rebake pages affected by publishes since the last bake. Snippets, images, documents '
+                'and settings changed other than in the admin need a full bake'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        output_dir = options['output']
+        if not output_dir:
+            raise CommandError('Set STATIC_SITE_ROOT or pass --output')
+
+        site = Site.objects.get(is_default_site=True)
+        pages = list(
+            site.root_page.get_descendants(inclusive=True).live().public().specific()
+        )
+
+        started_at = timezone.now()
+        page_jobs = {page.pk: self.get_jobs(page) for page in pages}
+        live_files = {get_output_path('', url, query) for jobs in page_jobs.values() for url, query in jobs}
+        last_bake, baked_files = read_manifest(output_dir)
+        removed = remove_stale_outputs(output_dir, baked_files, live_files)
+        for path in removed:
+            self.stdout.write(f'Removed {os.path.join(output_dir, path)}')
+        # Files this bake doesn't rewrite stay baked from earlier ones
+        baked_files &= live_files
+
+        since = last_bake if options['incremental'] else None
+        # Pages that left the site also leave listings and navigation behind
+        if since is not None and not removed and not self.global_content_changed(since):
+            pages = get_affected_pages(pages, since, site)
+        jobs = [job for page in pages for job in page_jobs[page.pk]]
+
+        failed = 0
+        for url, query, status in self.run_jobs(jobs, site, output_dir, options['workers']):
+            if status == 200:
+                baked_files.add(get_output_path('', url, query))
+            else:
+                failed += 1
+                self.stderr.write(f'{url}?{query}: HTTP {status}' if query else f'{url}: HTTP {status}')
+
+        write_manifest(output_dir, started_at, baked_files)
+        self.stdout.write(
+            self.style.SUCCESS(f'Baked {len(jobs) - failed} of {len(jobs)} pages to {output_dir}')
+        )
+
+    def get_jobs(self, page):
+        """The (url, query string) of every file baked for a page"""
+        url_parts = page.get_url_parts()
+        if url_parts is None:
+            return []
+        url = url_parts[2]
+        return [(url, '')] + [
+            (url, urlencode(query)) for query in getattr(page, 'get_static_site_queries', list)()
+        ]
+
+    def run_jobs(self, jobs, site, output_dir, workers):
+        if workers <= 1:
+            _init_worker(site.hostname, output_dir)
+            yield from map(bake_url, jobs)
+            return
+
+        # Worker processes open their own database connections
+        connections.close_all()
+        with Pool(workers, _init_worker, (site.hostname, output_dir)) as pool:
+            yield from pool.imap_unordered(bake_url, jobs, chunksize=8)
+
+    def global_content_changed(self, since):
+        """
+        Whether content shared between pages changed, which needs a full
+        bake: the footer and navigation settings shown on every page, and
+        the snippets, images and documents pages show. The admin logs every
+        change to them.
+        """
+        return (
+            FooterText.objects.filter(last_published_at__gt=since).exists()
+            or ModelLogEntry.objects.filter(timestamp__gt=since).exists()
+        )
@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from wagtail.models import Page
+from wagtail.rich_text import expand_db_html as wagtail_expand_db_html
+from wagtail.rich_text.pages import PageLinkHandler
+from wagtail.rich_text.rewriters import LinkRewriter
+
+from base.rich_text import bump_links_version, expand_db_html_many
+
+
+class Command(BaseCommand):
+    help = 'Benchmark rich text link expansion on a document with many page links'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--links', type=int, default=100, help='Number of page links in the document')
+        parser.add_argument('--fields', type=int, default=4, help='Number of rich text fields to spread them over')
+        parser.add_argument('--iterations', type=int, default=20)
+
+    def handle(self, *args, **options):
+        page_ids = list(Page.objects.live().filter(depth__gt=1).values_list('id', flat=True)[:options['links']])
+        if not page_ids:
+            raise CommandError('Create some live pages to link to first')
+
+        links = [
+            f'<p><a linktype="page" id="{page_ids[i % len(page_ids)]}">Link {i}</a></p>'
+            for i in range(options['links'])
+        ]
+        fields = [''.join(links[i::options['fields']]) for i in range(options['fields'])]
+
+        # Resolves each link with its own query, as older Wagtail versions did
+        one_at_a_time = LinkRewriter(rules={'page': PageLinkHandler.expand_db_attributes})
+
+        def batched():
+            bump_links_version()
+            expand_db_html_many(fields)
+
+        strategies = [
+            ('one query per link', lambda: [one_at_a_time(html) for html in fields]),
+            ('one query per field', lambda: [wagtail_expand_db_html(html) for html in fields]),
+            ('one query per document', batched),
+        ]
+
+        self.stdout.write(f"{options['links']} links over {options['fields']} fields, {options['iterations']} iterations")
+        for name, run in strategies:
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                for _ in range(options['iterations']):
+                    run()
+                elapsed = time.perf_counter() - start
+
+            self.stdout.write(
+                f'{name:>24}: {elapsed / options["iterations"] * 1000:8.2f} ms, '
+                f'{len(queries) / options["iterations"]:6.1f} queries per render'
+            )
@@ -0,0 +1,114 @@
+import functools
+import importlib.util
+import itertools
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from base.load import run_load, summarise, timed_get
+
+URL_GROUPS = {
+    'home': ['/'],
+    'api': ['/api/v2/pages/', '/api/team/members/', '/api/team/stats/'],
+    'async': ['/api/team/async/members/', '/api/team/async/stats/'],
+    'search': ['/search/?query=team'],
+}
+
+PROFILES = {
+    # Gunicorn defaults: sync workers handling one request each at a time
+    'wsgi': lambda port, workers: [
+        sys.executable, '-m', 'gunicorn', 'mysite.wsgi:application',
+        '--bind', f'127.0.0.1:{port}', '--workers', str(workers), '--log-level', 'warning',
+    ],
+    # mysite/gunicorn_config.py, which sizes workers and threads itself
+    'wsgi-tuned': lambda port, workers: [
+        sys.executable, '-m', 'gunicorn', '-c', 'python:mysite.gunicorn_config', 'mysite.wsgi:application',
+        '--bind', f'127.0.0.1:{port}', '--log-level', 'warning',
+    ],
+    # Async views share each worker's event loop
+    'asgi': lambda port, workers: [
+        sys.executable, '-m', 'uvicorn', 'mysite.asgi:application',
+        '--port', str(port), '--workers', str(workers), '--log-level', 'warning',
+    ],
+}
+
+# The server each profile runs, installed in the Docker image rather than by requirements.txt
+PROFILE_SERVERS = {'wsgi': 'gunicorn', 'wsgi-tuned': 'gunicorn', 'asgi': 'uvicorn'}
+
+
+class Command(BaseCommand):
+    help = 'Compare request throughput and latency of the home page, APIs and search across server configurations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=5, help='Seconds to run each concurrency level for')
+        parser.add_argument(
+            '--concurrency', type=int, nargs='+', default=[1, 8, 32],
+            help='Numbers of simultaneous clients to test',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=2, help='Worker processes, for profiles that don\'t size their own',
+        )
+        parser.add_argument('--profile', nargs='+', choices=list(PROFILES), default=list(PROFILES))
+        parser.add_argument('--group', nargs='+', choices=list(URL_GROUPS), default=list(URL_GROUPS))
+
+    def handle(self, *args, **options):
+        for name in options['profile']:
+            module = PROFILE_SERVERS[name]
+            if importlib.util.find_spec(module) is None:
+                raise CommandError(
+                    f'The {name} profile needs {module}, which is not installed. Install it as the '
+                    f'Dockerfile does, or choose other profiles with --profile.'
+                )
+
+        self.stdout.write(
+            f"{'profile':>10} {'urls':>7} {'clients':>8} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}"
+        )
+        for name in options['profile']:
+            port = self.get_free_port()
+            env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE}
+            server = subprocess.Popen(PROFILES[name](port, options['workers']), env=env, cwd=settings.BASE_DIR)
+            try:
+                base_url = f'http://127.0.0.1:{port}'
+                self.wait_for_server(base_url, server)
+                for group in options['group']:
+                    for clients in options['concurrency']:
+                        result = self.run_load(base_url, URL_GROUPS[group], clients, options['duration'])
+                        self.stdout.write(
+                            f"{name:>10} {group:>7} {clients:>8} {result['rate']:>9.1f} {result['p50']:>8.1f} "
+                            f"{result['p95']:>8.1f} {result['errors']:>7}"
+                        )
+            finally:
+                server.terminate()
+                server.wait()
+
+    def get_free_port(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            return sock.getsockname()[1]
+
+    def wait_for_server(self, base_url, server, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError('The server exited during startup')
+            try:
+                urllib.request.urlopen(base_url + '/api/team/stats/', timeout=1).close()
+                return
+            except (OSError, urllib.error.URLError):
+                time.sleep(0.2)
+        raise CommandError(f'The server did not start within {timeout} seconds')
+
+    def run_load(self, base_url, urls, clients, duration):
+        def get_requests(number):
+            return (('urls', functools.partial(timed_get, base_url + url)) for url in itertools.cycle(urls))
+
+        elapsed, routes = run_load(clients, duration, get_requests)
+        latencies, errors = routes.get('urls', ([], 0))
+        return summarise(latencies, errors, elapsed)
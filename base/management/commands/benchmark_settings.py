@@ -0,0 +1,79 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Run in a fresh interpreter per profile so startup includes every import
+SCRIPT = '''
+import json, sys, time
+
+start = time.perf_counter()
+import django
+django.setup()
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+get_wsgi_application()
+get_resolver().url_patterns
+startup = time.perf_counter() - start
+
+from django.test import Client
+client = Client()
+url, requests = sys.argv[1], int(sys.argv[2])
+for _ in range(10):
+    client.get(url)
+start = time.perf_counter()
+for _ in range(requests):
+    client.get(url)
+per_request = (time.perf_counter() - start) / requests
+
+print(json.dumps({"startup": startup, "per_request": per_request, "modules": len(sys.modules)}))
+'''
+
+# production.py expects SECRET_KEY and ALLOWED_HOSTS from local.py, and a
+# collectstatic manifest for templates that use {% static %}
+PRODUCTION_WRAPPER = '''
+from mysite.settings.production import *
+
+SECRET_KEY = "benchmark"
+ALLOWED_HOSTS = ["*"]
+STORAGES["staticfiles"]["BACKEND"] = "django.contrib.staticfiles.storage.StaticFilesStorage"
+'''
+
+
+class Command(BaseCommand):
+    help = 'Compare startup time and per-request overhead of the dev and production settings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/api/team/stats/', help='URL path to request')
+        parser.add_argument('--requests', type=int, default=500, help='Requests to time per profile')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'settings':>11} {'startup ms':>11} {'modules':>8} {'ms/request':>11}")
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, 'benchmark_production.py'), 'w') as f:
+                f.write(PRODUCTION_WRAPPER)
+
+            env = {
+                **os.environ,
+                'PYTHONPATH': os.pathsep.join([tmp, str(settings.BASE_DIR)]),
+                # Keep production's file-based caches out of the project
+                'CACHE_DIR': os.path.join(tmp, 'cache'),
+            }
+            for name, module in (('dev', 'mysite.settings.dev'), ('production', 'benchmark_production')):
+                result = subprocess.run(
+                    [sys.executable, '-c', SCRIPT, options['url'], str(options['requests'])],
+                    env={**env, 'DJANGO_SETTINGS_MODULE': module},
+                    cwd=settings.BASE_DIR, capture_output=True, text=True,
+                )
+                if result.returncode:
+                    raise CommandError(f'The {name} profile failed:\n{result.stderr}')
+
+                timings = json.loads(result.stdout.splitlines()[-1])
+                self.stdout.write(
+                    f"{name:>11} {timings['startup'] * 1000:>11.1f} {timings['modules']:>8} "
+                    f"{timings['per_request'] * 1000:>11.3f}"
+                )
@@ -0,0 +1,92 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections, transaction
+from django.test import Client
+
+from mysite.db import sqlite_options
+from team.models import TeamMember
+
+READ_URLS = ['/api/v2/pages/', '/api/team/members/', '/api/team/stats/']
+
+
+class Command(BaseCommand):
+    help = 'Compare read/write throughput of the SQLite database with and without the tuned profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=5, help='Seconds to run each profile for')
+        parser.add_argument('--readers', type=int, default=4, help='Threads requesting the page and team APIs')
+        parser.add_argument('--writers', type=int, default=2, help='Threads writing team members')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('The default database is not SQLite')
+
+        settings_dict = connections.settings['default']
+        original = settings_dict['NAME'], settings_dict.get('OPTIONS', {})
+        connection.close()
+
+        self.stdout.write(f"{'profile':>8} {'reads/s':>10} {'writes/s':>10} {'locked errors':>14}")
+        try:
+            for name, tuned in (('default', False), ('tuned', True)):
+                # Work on a copy so writes don't touch the real database
+                with tempfile.TemporaryDirectory() as tmp:
+                    settings_dict['NAME'] = os.path.join(tmp, 'benchmark.sqlite3')
+                    self.copy_database(original[0], settings_dict['NAME'])
+                    settings_dict['OPTIONS'] = sqlite_options(tuned)
+
+                    reads, writes, locked = self.run_profile(options)
+                    duration = options['duration']
+                    self.stdout.write(f'{name:>8} {reads / duration:>10.1f} {writes / duration:>10.1f} {locked:>14}')
+        finally:
+            settings_dict['NAME'], settings_dict['OPTIONS'] = original
+
+    def copy_database(self, source, destination):
+        # The backup API includes anything still in a WAL file
+        with sqlite3.connect(source) as src, sqlite3.connect(destination) as dst:
+            src.backup(dst)
+        src.close()
+        dst.close()
+
+    def run_profile(self, options):
+        counts = {'reads': 0, 'writes': 0, 'locked': 0}
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['duration']
+
+        def count(key):
+            with lock:
+                counts[key] += 1
+
+        def reader():
+            client = Client()
+            while time.monotonic() < deadline:
+                for url in READ_URLS:
+                    try:
+                        client.get(url)
+                        count('reads')
+                    except (OperationalError, sqlite3.OperationalError):
+                        count('locked')
+            connections.close_all()
+
+        def writer():
+            while time.monotonic() < deadline:
+                try:
+                    with transaction.atomic():
+                        member = TeamMember.objects.create(name='Benchmark', job_title='Benchmark')
+                        member.delete()
+                    count('writes')
+                except OperationalError:
+                    count('locked')
+            connections.close_all()
+
+        threads = [threading.Thread(target=reader) for _ in range(options['readers'])]
+        threads += [threading.Thread(target=writer) for _ in range(options['writers'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return counts['reads'], counts['writes'], counts['locked']
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from mysite.cache import NAMESPACES, get_metrics, metrics, namespace
+
+
+class Command(BaseCommand):
+    help = 'Show cache hit rates per namespace, optionally invalidating namespaces'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--invalidate', nargs='+', choices=list(NAMESPACES), default=[],
+            help='Drop every key in these namespaces',
+        )
+        parser.add_argument('--reset', action='store_true', help='Reset the hit/miss counters')
+
+    def handle(self, *args, **options):
+        for alias in options['invalidate']:
+            namespace(alias).invalidate()
+            self.stdout.write(f'Invalidated {alias}')
+
+        if options['reset']:
+            metrics.reset()
+            return
+
+        self.stdout.write(f'{"namespace":<12} {"hits":>10} {"misses":>10} {"hit rate":>9}')
+        for alias, counts in get_metrics().items():
+            total = counts['hits'] + counts['misses']
+            rate = f'{counts["hits"] / total:.1%}' if total else '-'
+            self.stdout.write(f'{alias:<12} {counts["hits"]:>10} {counts["misses"]:>10} {rate:>9}')
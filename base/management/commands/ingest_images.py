@@ -0,0 +1,211 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
+
+import django
+import willow
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models.signals import post_save
+from django.utils.text import slugify
+
+from wagtail.images import get_image_model
+from wagtail.images.utils import get_allowed_image_extensions
+from wagtail.models import Collection
+from wagtail.search.backends import get_search_backends
+from wagtail.utils.file import hash_filelike
+
+from base import page_cache
+from base.signal_handlers import invalidate_model_namespaces
+from base.tasks import generate_renditions
+from team.models import TeamMember
+
+# The renditions templates and APIs ask for, so the first requests showing
+# an ingested image don't have to generate them
+RENDITIONS = [
+    # Admin listings and choosers
+    'max-165x165',
+    'fill-40x60', 'fill-160x100', 'fill-320x240', 'fill-480x320', 'fill-600x338', 'width-480',
+    'fill-1200x400', 'fill-1200x600',
+]
+# Team photos are only shown by team listings and the team API
+TEAM_PHOTO_RENDITIONS = ['max-165x165', 'fill-150x150', 'fill-300x300', 'fill-500x500']
+
+TEAM_DIRECTORY = 'team'
+TEAM_PREFIX = 'team-'
+
+
+def inspect_image(path, detect_focal_point):
+    """
+    The hash, size, dimensions and (if detecting them) focal point of an
+    image file, or the error reading it. Run in worker processes, set up by
+    django.setup() since those started by spawn or forkserver import this
+    module and its models afresh.
+    """
+    try:
+        with open(path, 'rb') as f:
+            file_hash = hash_filelike(f)
+            width, height = willow.Image.open(f).get_size()
+            details = {
+                'path': path, 'file_hash': file_hash, 'file_size': os.fstat(f.fileno()).st_size,
+                'width': width, 'height': height,
+            }
+            if detect_focal_point:
+                image = get_image_model()(file=File(f, name=path), width=width, height=height)
+                image.set_focal_point(image.get_suggested_focal_point())
+                details.update({
+                    name: getattr(image, name)
+                    for name in ('focal_point_x', 'focal_point_y', 'focal_point_width', 'focal_point_height')
+                })
+    except OSError as e:
+        return {'path': path, 'error': str(e) or type(e).__name__}
+    return details
+
+
+def get_team_slug(path, directory):
+    """
+    The slugified member name a team photo is named after: files in a
+    "team" directory, or named "team-<name>", e.g. team/jane-doe.jpg or
+    team-jane-doe.jpg for Jane Doe. None for other files.
+    """
+    relative = os.path.relpath(path, directory)
+    folders, name = os.path.split(relative)
+    stem = os.path.splitext(name)[0]
+    if stem.lower().startswith(TEAM_PREFIX):
+        return slugify(stem[len(TEAM_PREFIX):])
+    if TEAM_DIRECTORY in folders.lower().split(os.sep):
+        return slugify(stem)
+    return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Create images from a directory of files, hashing and measuring them in parallel and skipping any '
+        'already uploaded, then queue their renditions. Team photos (team/<name>.jpg or team-<name>.jpg) '
+        'become the photos of the team members with those names.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Directory to read images from, including subdirectories')
+        parser.add_argument('--collection', help='Name of the collection to add images to (default: the root)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Processes hashing the files')
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--no-renditions', action='store_true', help="Don't queue the images' renditions")
+
+    def handle(self, *args, **options):
+        directory = options['directory']
+        if not os.path.isdir(directory):
+            raise CommandError(f'{directory} is not a directory')
+        self.collection = self.get_collection(options['collection'])
+        self.skip_renditions = options['no_renditions']
+        paths = self.find_images(directory)
+        self.stdout.write(f'Found {len(paths)} images')
+
+        members = {slugify(name): pk for pk, name in TeamMember.objects.values_list('pk', 'name')}
+        # File hash -> ID of the image with that file, existing or created
+        self.images = {}
+        team_photos = {}
+        created = duplicates = 0
+
+        detect_focal_point = getattr(settings, 'WAGTAILIMAGES_FEATURE_DETECTION_ENABLED', False)
+        with ProcessPoolExecutor(max_workers=max(1, options['workers']), initializer=django.setup) as executor:
+            inspected = executor.map(inspect_image, paths, repeat(detect_focal_point), chunksize=16)
+            while True:
+                batch = list(islice(inspected, options['batch_size']))
+                if not batch:
+                    break
+                for details in batch:
+                    if 'error' in details:
+                        self.stderr.write(f"Skipping {details['path']}: {details['error']}")
+                files = [details for details in batch if 'error' not in details]
+
+                team_files, other_files = {}, []
+                for details in files:
+                    slug = get_team_slug(details['path'], directory)
+                    if slug is None:
+                        other_files.append(details)
+                    elif slug in members:
+                        team_files[members[slug]] = details
+                    else:
+                        self.stderr.write(f"No team member named after {details['path']}; adding it as an image")
+                        other_files.append(details)
+
+                new = self.create_images(files)
+                created += len(new)
+                duplicates += len(files) - len(new)
+                for member_id, details in team_files.items():
+                    team_photos[member_id] = self.images[details['file_hash']]
+                # Team photos get their own renditions once they're linked
+                team_hashes = {details['file_hash'] for details in team_files.values()}
+                self.queue_renditions([pk for pk, file_hash in new.items() if file_hash not in team_hashes], RENDITIONS)
+                self.stdout.write(f'Created {created} images, skipped {duplicates} duplicates')
+
+        linked = self.link_team_photos(team_photos)
+        self.queue_renditions(list(dict.fromkeys(team_photos.values())), TEAM_PHOTO_RENDITIONS)
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {created} images, skipped {duplicates} duplicates and linked {linked} team photos'
+        ))
+
+    def get_collection(self, name):
+        if not name:
+            return Collection.get_first_root_node()
+        collection = Collection.objects.filter(name=name).first()
+        if collection is None:
+            raise CommandError(f'No collection named {name}')
+        return collection
+
+    def find_images(self, directory):
+        extensions = tuple(f'.{extension}' for extension in get_allowed_image_extensions())
+        paths = []
+        for folder, folders, names in os.walk(directory):
+            folders.sort()
+            paths += [os.path.join(folder, name) for name in sorted(names) if name.lower().endswith(extensions)]
+        return paths
+
+    def create_images(self, files):
+        """Create images for files whose hash no image has, returning {image ID: file hash}"""
+        Image = get_image_model()
+        hashes = {details['file_hash'] for details in files} - self.images.keys()
+        for file_hash, pk in Image.objects.filter(file_hash__in=hashes).order_by('pk').values_list('file_hash', 'pk'):
+            self.images.setdefault(file_hash, pk)
+
+        images = {}
+        for details in files:
+            if details['file_hash'] in self.images or details['file_hash'] in images:
+                continue
+            fields = {name: value for name, value in details.items() if name != 'path'}
+            title = os.path.splitext(os.path.basename(details['path']))[0][:255]
+            image = Image(title=title, collection=self.collection, **fields)
+            # Saves the file to storage; the dimensions are set, so it isn't read again
+            with open(details['path'], 'rb') as f:
+                image.file.save(os.path.basename(details['path']), File(f), save=False)
+            images[details['file_hash']] = image
+
+        Image.objects.bulk_create(images.values())
+        for backend in get_search_backends(with_auto_update=True):
+            backend.add_bulk(Image, list(images.values()))
+        if images:
+            # bulk_create sends no post_save, so invalidate as saving them would
+            page_cache.purge(page_cache.model_key(Image))
+            invalidate_model_namespaces(Image, signal=post_save)
+        self.images.update({file_hash: image.pk for file_hash, image in images.items()})
+        return {image.pk: file_hash for file_hash, image in images.items()}
+
+    def queue_renditions(self, image_ids, filter_specs):
+        if image_ids and not self.skip_renditions:
+            generate_renditions.enqueue(image_ids, filter_specs)
+
+    def link_team_photos(self, team_photos):
+        """Set the photos of team members, as saving them would; returns how many changed"""
+        members = [
+            member for member in TeamMember.objects.filter(pk__in=team_photos)
+            if member.photo_id != team_photos[member.pk]
+        ]
+        for member in members:
+            member.photo_id = team_photos[member.pk]
+        TeamMember.objects.bulk_update(members, ['photo'])
+        if members:
+            page_cache.purge(*(page_cache.object_key(member) for member in members), page_cache.model_key(TeamMember))
+            invalidate_model_namespaces(TeamMember, signal=post_save)
+        return len(members)
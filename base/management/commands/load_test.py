@@ -0,0 +1,260 @@
+import functools
+import json
+import random
+import re
+import time
+import urllib.request
+from datetime import datetime, timezone
+from http.cookiejar import CookieJar
+from urllib.parse import urlencode, urlsplit
+
+from django import forms
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import Resolver404, resolve, reverse
+
+from wagtail.models import Page, Site
+
+from base.load import run_load, summarise, timed_get
+from base.models import FormPage
+from blog.models import BlogIndexPage, BlogPage, BlogPageTag, BlogTagIndexPage
+
+# Share of requests each route gets unless --weight says otherwise
+DEFAULT_WEIGHTS = {
+    'home': 15,
+    'blog_index': 10,
+    'blog_post': 25,
+    'tag_page': 5,
+    'search': 10,
+    'pages_api': 10,
+    'members_api': 10,
+    'team_stats': 5,
+    'form_post': 10,
+}
+
+SEARCH_QUERIES = ['team', 'blog', 'service', 'contact', 'performance', 'gallery']
+
+# Different URLs requested per route, e.g. posts picked at random
+SAMPLE_SIZE = 200
+
+CSRF_INPUT = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+LOG_REQUEST = re.compile(r'"GET (\S+) HTTP/[\d.]+"')
+
+
+def get_field_value(field):
+    """A valid answer for a field of a form page's form"""
+    if isinstance(field, forms.MultipleChoiceField):
+        return [next(value for value, _ in field.choices if value)]
+    if isinstance(field, forms.ChoiceField):
+        return next(value for value, _ in field.choices if value)
+    if isinstance(field, forms.BooleanField):
+        return 'on'
+    if isinstance(field, forms.EmailField):
+        return 'load-test@example.com'
+    if isinstance(field, forms.URLField):
+        return 'https://example.com/'
+    if isinstance(field, (forms.IntegerField, forms.DecimalField, forms.FloatField)):
+        return '1'
+    if isinstance(field, forms.DateTimeField):
+        return '2025-01-01 12:00'
+    if isinstance(field, forms.DateField):
+        return '2025-01-01'
+    return 'Load test'
+
+
+class Command(BaseCommand):
+    help = (
+        'Send a weighted mix of requests, or requests replayed from an access log, to a running server '
+        'and report throughput and latency per route. Reads this project\'s database for URLs to request, '
+        'so run it with the server\'s settings; form POSTs create submissions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the server')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to send requests for')
+        parser.add_argument('--concurrency', type=int, default=8, help='Simultaneous clients')
+        parser.add_argument(
+            '--weight', nargs='+', default=[], metavar='ROUTE=WEIGHT',
+            help=f'Change the share of routes in the mix, 0 to leave one out: {", ".join(DEFAULT_WEIGHTS)}',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the URLs picked and the requests each client sends')
+        parser.add_argument(
+            '--replay', metavar='LOG',
+            help='Replay the GET requests in an access log (or a file of paths) instead of the mix, '
+                 'grouped by endpoint as on the performance dashboard',
+        )
+        parser.add_argument('--output', help='Write the results to this JSON file')
+        parser.add_argument('--compare', help='Results file of an earlier run to compare against')
+
+    def handle(self, *args, **options):
+        base_url = options['url'].rstrip('/')
+        if options['replay']:
+            targets = self.read_replay(options['replay'])
+            weights = None
+        else:
+            weights = self.get_weights(options['weight'])
+            targets = self.get_targets(weights, options['seed'])
+
+        results = self.run_load(base_url, targets, weights, options)
+        results = {
+            'url': base_url,
+            'started': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'duration': options['duration'],
+            'concurrency': options['concurrency'],
+            'mix': options['replay'] or weights,
+            **results,
+        }
+
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+        self.write_table(results, baseline)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+
+    def get_weights(self, overrides):
+        weights = dict(DEFAULT_WEIGHTS)
+        for override in overrides:
+            route, _, weight = override.partition('=')
+            if route not in weights or not weight.isdigit():
+                raise CommandError(f'Expected ROUTE=WEIGHT with a route from {", ".join(weights)}, not {override}')
+            weights[route] = int(weight)
+        return {route: weight for route, weight in weights.items() if weight}
+
+    def get_targets(self, weights, seed):
+        """{route: [(path, form data or None)]} for each route in the mix that has content"""
+        rng = random.Random(seed)
+
+        def page_paths(queryset):
+            ids = list(queryset.live().values_list('pk', flat=True))
+            pages = Page.objects.filter(pk__in=rng.sample(ids, min(SAMPLE_SIZE, len(ids))))
+            return [page.url for page in pages if page.url]
+
+        def tag_paths():
+            tag_index = BlogTagIndexPage.objects.live().first()
+            if tag_index is None:
+                return []
+            tags = list(BlogPageTag.objects.values_list('tag__name', flat=True).distinct()[:SAMPLE_SIZE])
+            return [f'{tag_index.url}?{urlencode({"tag": tag})}' for tag in tags]
+
+        def form_posts():
+            posts = []
+            for form in FormPage.objects.live().filter(form_fields__isnull=False).distinct()[:SAMPLE_SIZE]:
+                fields = form.get_form_class()().fields
+                posts.append((form.url, {name: get_field_value(field) for name, field in fields.items()}))
+            return posts
+
+        routes = {
+            'home': lambda: ['/'],
+            'blog_index': lambda: page_paths(BlogIndexPage.objects.all()),
+            'blog_post': lambda: page_paths(BlogPage.objects.all()),
+            'tag_page': tag_paths,
+            'search': lambda: [f'{reverse("search")}?{urlencode({"query": query})}' for query in SEARCH_QUERIES],
+            'pages_api': lambda: [
+                reverse('wagtailapi:pages:listing'), f'{reverse("wagtailapi:pages:listing")}?type=blog.BlogPage',
+            ],
+            'members_api': lambda: [reverse('team-members-list')],
+            'team_stats': lambda: [reverse('team-stats')],
+            'form_post': form_posts,
+        }
+
+        targets = {}
+        for route in weights:
+            found = routes[route]()
+            if not found:
+                self.stderr.write(f'Leaving out {route}: there is nothing to request')
+                continue
+            targets[route] = [target if isinstance(target, tuple) else (target, None) for target in found]
+        if not targets:
+            raise CommandError('There is no content to request; try the seed_site command')
+        return targets
+
+    def read_replay(self, path):
+        """[(route, path)] for each GET request in an access log, or line starting with / in a file"""
+        requests = []
+        with open(path) as f:
+            for line in f:
+                match = LOG_REQUEST.search(line)
+                if match:
+                    requests.append(match.group(1))
+                elif line.startswith('/'):
+                    requests.append(line.strip())
+        if not requests:
+            raise CommandError(f'No GET requests found in {path}')
+
+        routes = {}
+        for request_path in set(requests):
+            routes[request_path] = self.get_endpoint(urlsplit(request_path).path)
+        return [(routes[request_path], request_path) for request_path in requests]
+
+    def get_endpoint(self, path):
+        """Name a path as PerformanceMetricsMiddleware names the request"""
+        try:
+            match = resolve(path)
+        except Resolver404:
+            return '(not found)'
+        if match.url_name != 'wagtail_serve':
+            return match.view_name
+        site = Site.objects.filter(is_default_site=True).select_related('root_page').first()
+        page = site and Page.objects.filter(url_path=site.root_page.url_path + path.lstrip('/')).first()
+        return f'page:{page.specific_class._meta.label}' if page and page.specific_class else 'page'
+
+    def run_load(self, base_url, targets, weights, options):
+        clients = options['concurrency']
+
+        def get_requests(number):
+            rng = random.Random(options['seed'] + number)
+            # Form posts need the CSRF cookie from their page
+            opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+            position = number
+            while True:
+                if weights is None:
+                    route, path = targets[position % len(targets)]
+                    data = None
+                    position += clients
+                else:
+                    route = rng.choices(list(targets), [weights[route] for route in targets])[0]
+                    path, data = rng.choice(targets[route])
+                yield route, functools.partial(self.send, opener, base_url + path, data)
+
+        elapsed, routes = run_load(clients, options['duration'], get_requests)
+        all_latencies = [latency for latencies, errors in routes.values() for latency in latencies]
+        return {
+            'elapsed': round(elapsed, 2),
+            'routes': {route: summarise(latencies, errors, elapsed) for route, (latencies, errors) in routes.items()},
+            'total': summarise(all_latencies, sum(errors for latencies, errors in routes.values()), elapsed),
+        }
+
+    def send(self, opener, url, data):
+        """Request a URL, or submit a form page, returning the milliseconds taken"""
+        if data is None:
+            return timed_get(url)
+
+        # The GET for the form's CSRF token isn't timed
+        token = CSRF_INPUT.search(opener.open(url, timeout=30).read().decode())
+        body = urlencode({**data, 'csrfmiddlewaretoken': token.group(1) if token else ''}, doseq=True)
+        start = time.perf_counter()
+        opener.open(urllib.request.Request(url, body.encode(), headers={'Referer': url}), timeout=30).read()
+        return (time.perf_counter() - start) * 1000
+
+    def write_table(self, results, baseline):
+        columns = f"{'route':<32} {'requests':>8} {'req/s':>8} {'errors':>6} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8}"
+        if baseline:
+            columns += f" {'req/s was':>9} {'change':>7} {'p95 was':>8}"
+        self.stdout.write(columns)
+
+        rows = sorted(results['routes'].items()) + [('(all)', results['total'])]
+        for route, summary in rows:
+            line = (
+                f"{route:<32} {summary['requests']:>8} {summary['rate']:>8.1f} {summary['errors']:>6} "
+                f"{summary['mean']:>8.1f} {summary['p50']:>8.1f} {summary['p95']:>8.1f} {summary['p99']:>8.1f}"
+            )
+            if baseline:
+                before = baseline['total'] if route == '(all)' else baseline['routes'].get(route)
+                if before:
+                    change = (summary['rate'] / before['rate'] - 1) if before['rate'] else 0
+                    line += f" {before['rate']:>9.1f} {change:>+7.1%} {before['p95']:>8.1f}"
+            self.stdout.write(line)
+        self.stdout.write('Latencies in milliseconds')
@@ -0,0 +1,134 @@
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Everything a worker does before serving its first request. -X importtime
+# only reports imports made by import statements, so send Django's
+# import_module calls (which load each app's models) through __import__.
+SCRIPT = '''
+import importlib, importlib.util, sys
+
+def import_module(name, package=None):
+    name = importlib.util.resolve_name(name, package)
+    __import__(name)
+    return sys.modules[name]
+
+importlib.import_module = import_module
+
+import django
+django.setup()
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+get_wsgi_application()
+get_resolver().url_patterns
+'''
+
+LINE_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_importtime(output):
+    """
+    Parse ``python -X importtime`` output into a list of
+    (module, self_us, cumulative_us, parent) tuples.
+    """
+    entries = []
+    # Children are printed before their parent, one level deeper
+    pending = defaultdict(list)
+    for line in output.splitlines():
+        match = LINE_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        depth = len(indent) // 2
+        index = len(entries)
+        entries.append([module, int(self_us), int(cumulative_us), None])
+        for child in pending.pop(depth + 1, []):
+            entries[child][3] = module
+        pending[depth].append(index)
+    return [tuple(entry) for entry in entries]
+
+
+def get_package(module):
+    return module.split('.')[0]
+
+
+def summarise(entries):
+    """
+    Return {package: (self_us, inclusive_us)}. Inclusive time counts what a
+    package's imports pulled in that nothing had imported before, which is
+    the startup cost that can be saved by importing it lazily.
+    """
+    totals = defaultdict(lambda: [0, 0])
+    for module, self_us, cumulative_us, parent in entries:
+        package = get_package(module)
+        totals[package][0] += self_us
+        if parent is None or get_package(parent) != package:
+            totals[package][1] += cumulative_us
+    return {package: tuple(values) for package, values in totals.items()}
+
+
+def measure(environ=None, runs=1):
+    """Import the project in fresh interpreters; return median {package: (self_us, inclusive_us)}"""
+    results = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', SCRIPT],
+            env={**os.environ, **(environ or {})}, cwd=settings.BASE_DIR,
+            capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f'Importing the project failed:\n{result.stderr}')
+        results.append(summarise(parse_importtime(result.stderr)))
+
+    packages = set().union(*results)
+    return {
+        package: tuple(
+            statistics.median(result.get(package, (0, 0))[i] for result in results) for i in range(2)
+        )
+        for package in packages
+    }
+
+
+def get_project_packages():
+    base_dir = os.path.realpath(settings.BASE_DIR)
+    packages = {
+        get_package(config.name) for config in apps.get_app_configs()
+        if os.path.realpath(config.path).startswith(base_dir + os.sep)
+    }
+    return packages | {get_package(settings.ROOT_URLCONF)}
+
+
+class Command(BaseCommand):
+    help = 'Report how long each app and library takes to import when a worker starts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=3, help='Take the median of this many runs')
+        parser.add_argument('--limit', type=int, default=25, help='Number of third-party packages to list')
+
+    def handle(self, *args, **options):
+        environ = {'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE}
+        totals = measure(environ, options['runs'])
+        project = get_project_packages()
+
+        self.stdout.write(f"{'project app':<24} {'self ms':>9} {'inclusive ms':>13}")
+        for package, (self_us, inclusive_us) in sorted(totals.items(), key=lambda item: -item[1][1]):
+            if package in project:
+                self.stdout.write(f'{package:<24} {self_us / 1000:>9.1f} {inclusive_us / 1000:>13.1f}')
+
+        self.stdout.write(f"\n{'library':<24} {'self ms':>9}")
+        libraries = sorted(
+            ((package, values) for package, values in totals.items() if package not in project),
+            key=lambda item: -item[1][0],
+        )
+        for package, (self_us, inclusive_us) in libraries[:options['limit']]:
+            self.stdout.write(f'{package:<24} {self_us / 1000:>9.1f}')
+
+        total = sum(self_us for self_us, inclusive_us in totals.values())
+        self.stdout.write(f'\nTotal import time: {total / 1000:.1f} ms')
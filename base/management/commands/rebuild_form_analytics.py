@@ -0,0 +1,46 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.timezone import localdate
+
+from wagtail.contrib.forms.models import FormSubmission
+
+from base.analytics import get_answers, get_choice_fields
+from base.models import FormAnswerCount
+
+
+class Command(BaseCommand):
+    help = 'Rebuild form analytics counts from the stored submissions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('page_ids', nargs='*', type=int, help='Form pages to rebuild (default: all)')
+
+    def handle(self, *args, **options):
+        submissions = FormSubmission.objects.order_by('page_id')
+        counts = FormAnswerCount.objects.all()
+        if options['page_ids']:
+            submissions = submissions.filter(page_id__in=options['page_ids'])
+            counts = counts.filter(page_id__in=options['page_ids'])
+
+        # Counted in memory: there are far fewer (page, day, answer)
+        # combinations than submissions
+        totals = Counter()
+        choice_fields = {}
+        for submission in submissions.iterator(chunk_size=2000):
+            if submission.page_id not in choice_fields:
+                choice_fields[submission.page_id] = get_choice_fields(submission.page_id)
+            date = localdate(submission.submit_time)
+            for field, value in get_answers(submission.form_data, choice_fields[submission.page_id]):
+                totals[submission.page_id, date, field, value] += 1
+
+        with transaction.atomic():
+            counts.delete()
+            FormAnswerCount.objects.bulk_create(
+                [
+                    FormAnswerCount(page_id=page_id, date=date, field=field, value=value, count=count)
+                    for (page_id, date, field, value), count in totals.items()
+                ],
+                batch_size=1000,
+            )
+        self.stdout.write(f'Counted {len(totals)} form answers for {len(choice_fields)} pages')
@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils.timezone import now
+
+from wagtail.embeds.models import Embed
+
+from base.tasks import refresh_embeds
+
+
+class Command(BaseCommand):
+    help = 'Queue a background refresh of stored embeds older than EMBED_REFRESH_TTL'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ttl', type=int, default=getattr(settings, 'EMBED_REFRESH_TTL', 7 * 24 * 60 * 60),
+            help='Refresh embeds last fetched more than this many seconds ago',
+        )
+        parser.add_argument('--batch-size', type=int, default=50)
+
+    def handle(self, *args, **options):
+        cutoff = now() - timedelta(seconds=options['ttl'])
+        stale = Embed.objects.filter(
+            Q(last_updated__lt=cutoff) | Q(cache_until__lte=now())
+        ).values_list('url', 'max_width')
+
+        # Embeds in this project don't set a max height
+        embeds = [[url, max_width, None] for url, max_width in stale]
+        for start in range(0, len(embeds), options['batch_size']):
+            refresh_embeds.enqueue(embeds[start:start + options['batch_size']])
+
+        self.stdout.write(self.style.SUCCESS(f'Queued {len(embeds)} embeds for refresh'))
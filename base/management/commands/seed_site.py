@@ -0,0 +1,235 @@
+import json
+import random
+import time
+from datetime import date, datetime, time as datetime_time, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+from taggit.models import Tag
+
+from wagtail.models import Site
+
+from base import page_cache
+from base.bulk import BATCH_SIZE, PathAllocator, batched, insert, insert_pages, update_references
+from base.models import FormField, FormPage
+from base.fixtures import WORDS, make_documents, make_flexible_stream, make_images, paragraph, sentence
+from blog.models import Author, BlogIndexPage, BlogPage, BlogPageGalleryImage, BlogPageTag
+from mysite.cache import NAMESPACES, namespace
+from pages.models import FlexiblePage, StandardPage
+from team.models import Department, TeamMember, TeamMemberSocialLink
+
+# Posts are dated over the ten years before this
+LAST_POST_DATE = date(2025, 1, 1)
+
+FORM_TOPICS = ["Sales", "Support", "Press", "Careers"]
+FORM_INTERESTS = ["Blog", "Team", "Services", "Events"]
+
+
+class Command(BaseCommand):
+    help = 'Bulk-create large volumes of reproducible content for load and performance testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; each seed creates its own pages')
+        parser.add_argument('--posts', type=int, default=10_000)
+        parser.add_argument('--blogs', type=int, default=1, help='Blog indexes to spread the posts over')
+        parser.add_argument('--authors', type=int, default=50)
+        parser.add_argument('--tags', type=int, default=200)
+        parser.add_argument('--images', type=int, default=50, help='Images shared by the posts, authors and members')
+        parser.add_argument('--departments', type=int, default=10)
+        parser.add_argument('--members', type=int, default=500)
+        parser.add_argument('--flexible-pages', type=int, default=100)
+        parser.add_argument('--blocks', type=int, default=200, help='StreamField blocks per flexible page')
+        parser.add_argument('--submissions', type=int, default=10_000, help='Submissions to a seeded form page')
+
+    def handle(self, *args, **options):
+        seed = options['seed']
+        self.rng = random.Random(seed)
+        site = Site.objects.filter(is_default_site=True).select_related('root_page').first()
+        if site is None:
+            raise CommandError('Create a default site first')
+        self.home = site.root_page
+        if self.home.get_children().filter(slug__endswith=f'-{seed}', slug__startswith='seed-').exists():
+            raise CommandError(f'Content for seed {seed} already exists; pass another --seed')
+
+        start = time.perf_counter()
+        with transaction.atomic():
+            self.images = make_images(self.rng, max(1, options['images']))
+            self.documents = make_documents(3)
+            self.parents = []
+            # {model: [pk]} of objects inserted without saving, for the reference index
+            self.inserted = {}
+            posts = self.seed_blog(seed, options)
+            members = self.seed_team(options)
+            flexible_pages = self.seed_flexible_pages(seed, options)
+            submissions = self.seed_form(seed, options)
+
+            # Signals were skipped, so drop whatever the caches hold about pages
+            page_cache.purge(
+                *(page_cache.model_key(model) for model in (BlogPage, FlexiblePage, TeamMember)),
+                *(page_cache.children_key(parent.pk) for parent in self.parents),
+            )
+            for alias in NAMESPACES:
+                if alias != 'renditions':
+                    namespace(alias).invalidate()
+
+            # So that editing an image, document or author purges the pages using it
+            for model, ids in self.inserted.items():
+                update_references(model, ids)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {posts} posts, {members} team members, {flexible_pages} flexible pages '
+            f'and {submissions} form submissions in {time.perf_counter() - start:.1f}s'
+        ))
+        self.stdout.write('Run update_index to index them for search')
+
+    def add_section(self, page):
+        self.home.add_child(instance=page)
+        self.parents.append(page)
+        return page
+
+    def seed_blog(self, seed, options):
+        rng = self.rng
+        indexes = [
+            self.add_section(BlogIndexPage(title=f'Blog {n + 1}', slug=f'seed-blog-{n + 1}-{seed}', intro=paragraph(rng)))
+            for n in range(max(1, options['blogs']))
+        ]
+        allocators = [PathAllocator(index) for index in indexes]
+        authors = Author.objects.bulk_create([
+            Author(name=f'{sentence(rng, 2)[:-1]} {n}', author_image=rng.choice(self.images))
+            for n in range(max(1, options['authors']))
+        ])
+        self.inserted[Author] = [author.pk for author in authors]
+        tags = self.get_tags([f'topic-{n}' for n in range(max(1, options['tags']))])
+        author_through = BlogPage.authors.through
+
+        for numbers in batched(range(options['posts']), BATCH_SIZE):
+            posts = []
+            for n in numbers:
+                post_date = LAST_POST_DATE - timedelta(days=rng.randrange(3650))
+                published_at = timezone.make_aware(datetime.combine(post_date, datetime_time(9)))
+                posts.append(allocators[n % len(allocators)].allocate(BlogPage(
+                    title=sentence(rng, 5)[:-1],
+                    slug=f'post-{n}',
+                    date=post_date,
+                    intro=sentence(rng, 12),
+                    body=''.join(paragraph(rng) for _ in range(rng.randrange(3, 10))),
+                    first_published_at=published_at,
+                    last_published_at=published_at,
+                )))
+            insert_pages(posts)
+            self.inserted.setdefault(BlogPage, []).extend(post.pk for post in posts)
+
+            BlogPageTag.objects.bulk_create([
+                BlogPageTag(content_object_id=post.pk, tag_id=tag.pk)
+                for post in posts for tag in rng.sample(tags, min(3, len(tags)))
+            ], batch_size=BATCH_SIZE)
+            author_through.objects.bulk_create([
+                author_through(blogpage_id=post.pk, author_id=author.pk)
+                for post in posts for author in rng.sample(authors, min(rng.randint(1, 2), len(authors)))
+            ], batch_size=BATCH_SIZE)
+            BlogPageGalleryImage.objects.bulk_create([
+                BlogPageGalleryImage(page_id=post.pk, image=image, caption=sentence(rng, 4), sort_order=order)
+                for post in posts
+                for order, image in enumerate(rng.sample(self.images, min(rng.randint(1, 4), len(self.images))))
+            ], batch_size=BATCH_SIZE)
+
+        for allocator in allocators:
+            allocator.save()
+        return options['posts']
+
+    def get_tags(self, names):
+        existing = set(Tag.objects.filter(name__in=names).values_list('name', flat=True))
+        Tag.objects.bulk_create(
+            [Tag(name=name, slug=slugify(name)) for name in names if name not in existing], batch_size=BATCH_SIZE,
+        )
+        return list(Tag.objects.filter(name__in=names).order_by('name'))
+
+    def seed_team(self, options):
+        rng = self.rng
+        departments = Department.objects.bulk_create([
+            Department(name=f'{rng.choice(WORDS).capitalize()} {n + 1}', description=sentence(rng))
+            for n in range(max(1, options['departments']))
+        ])
+        platforms = [choice for choice, _ in TeamMemberSocialLink.SOCIAL_CHOICES]
+
+        for numbers in batched(range(options['members']), BATCH_SIZE):
+            members = TeamMember.objects.bulk_create([
+                TeamMember(
+                    name=f'{sentence(rng, 2)[:-1]} {n}',
+                    job_title=sentence(rng, 3)[:-1],
+                    department=rng.choice(departments),
+                    email=f'member{n}@example.com',
+                    photo=rng.choice(self.images),
+                    bio=paragraph(rng),
+                    short_bio=sentence(rng, 15),
+                    years_experience=rng.randrange(1, 30),
+                    specialties=', '.join(rng.sample(WORDS, 3)),
+                    is_featured=rng.random() < 0.1,
+                    sort_order=n,
+                )
+                for n in numbers
+            ])
+            self.inserted.setdefault(TeamMember, []).extend(member.pk for member in members)
+            TeamMemberSocialLink.objects.bulk_create([
+                TeamMemberSocialLink(team_member_id=member.pk, platform=platform, url=f'https://example.com/{platform}/{member.pk}')
+                for member in members for platform in rng.sample(platforms, rng.randint(1, 3))
+            ], batch_size=BATCH_SIZE)
+        return options['members']
+
+    def seed_flexible_pages(self, seed, options):
+        parent = self.add_section(StandardPage(title='Flexible pages', slug=f'seed-flexible-{seed}', intro=sentence(self.rng)))
+        allocator = PathAllocator(parent)
+        # Call to action blocks link to the blog indexes
+        link_targets = [page for page in self.parents if isinstance(page, BlogIndexPage)]
+
+        # Large streams, so fewer per batch
+        for numbers in batched(range(options['flexible_pages']), 100):
+            pages = [
+                allocator.allocate(FlexiblePage(
+                    title=f'Flexible page {n}',
+                    slug=f'flexible-{n}',
+                    subtitle=sentence(self.rng),
+                    body=json.dumps(make_flexible_stream(self.rng, options['blocks'], self.images, self.documents, link_targets)),
+                ))
+                for n in numbers
+            ]
+            insert_pages(pages)
+            self.inserted.setdefault(FlexiblePage, []).extend(page.pk for page in pages)
+        allocator.save()
+        return options['flexible_pages']
+
+    def seed_form(self, seed, options):
+        rng = self.rng
+        form = self.add_section(FormPage(title='Contact form', slug=f'seed-form-{seed}', intro=paragraph(rng)))
+        FormField.objects.create(page=form, label='Name', field_type='singleline')
+        FormField.objects.create(page=form, label='Topic', field_type='dropdown', choices=','.join(FORM_TOPICS))
+        FormField.objects.create(
+            page=form, label='Interests', field_type='checkboxes', choices=','.join(FORM_INTERESTS), required=False,
+        )
+        FormField.objects.create(page=form, label='Message', field_type='multiline')
+
+        submission_class = form.get_submission_class()
+        now = timezone.now()
+        for numbers in batched(range(options['submissions']), BATCH_SIZE):
+            # Raw, so submit_time isn't replaced with the current time
+            insert(submission_class, [
+                submission_class(
+                    page_id=form.pk,
+                    submit_time=now - timedelta(minutes=rng.randrange(365 * 24 * 60)),
+                    form_data={
+                        'name': f'Visitor {n}',
+                        'topic': rng.choice(FORM_TOPICS),
+                        'interests': rng.sample(FORM_INTERESTS, rng.randint(0, 2)),
+                        'message': sentence(rng, 20),
+                    },
+                )
+                for n in numbers
+            ], raw=True)
+
+        # The running answer counts are kept by signals, skipped above
+        call_command('rebuild_form_analytics', form.pk, stdout=StringIO())
+        return options['submissions']
@@ -0,0 +1,169 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from base import page_cache
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise, able to run in an async middleware stack, so under ASGI a
+    request isn't moved onto a thread before it reaches an async view.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            # Looks for the file on disk, in development
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+class PageCacheMiddleware:
+    """
+    Serve Wagtail pages to anonymous visitors from the whole-page cache.
+
+    Only responses produced by Wagtail's page serving are stored: the
+    ``before_serve_page`` hook in ``base.wagtail_hooks`` attaches the page's
+    surrogate keys to the request, and anything without them is passed
+    through untouched.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "PAGE_CACHE_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.is_cacheable_request(request, request.user):
+            return self.get_response(request)
+
+        cached = page_cache.get_cached_response(request)
+        if cached is not None:
+            return self.answer_from_cache(request, cached)
+
+        response = self.get_response(request)
+        self.store(request, response)
+        return response
+
+    async def __acall__(self, request):
+        if not self.is_cacheable_request(request, await request.auser()):
+            return await self.get_response(request)
+
+        # The cache is shared between threads, so these needn't wait for
+        # the thread that runs sync views
+        cached = await sync_to_async(page_cache.get_cached_response, thread_sensitive=False)(request)
+        if cached is not None:
+            return self.answer_from_cache(request, cached)
+
+        response = await self.get_response(request)
+        await sync_to_async(self.store, thread_sensitive=False)(request, response)
+        return response
+
+    def answer_from_cache(self, request, response):
+        response = get_conditional_response(
+            request,
+            etag=response.get("ETag"),
+            last_modified=parse_http_date_safe(response.get("Last-Modified")),
+            response=response,
+        )
+        response["X-Page-Cache"] = "hit"
+        return response
+
+    def store(self, request, response):
+        keys = getattr(request, "page_cache_keys", None)
+        if keys and self.is_cacheable_response(request, response):
+            response["Surrogate-Key"] = " ".join(sorted(keys))
+            page_cache.set_cached_response(request, response, keys)
+            response["X-Page-Cache"] = "miss"
+
+    def is_cacheable_request(self, request, user):
+        return (
+            request.method in ("GET", "HEAD")
+            and not user.is_authenticated
+        )
+
+    def is_cacheable_response(self, request, response):
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            # Compressed responses vary by Accept-Encoding, which the key doesn't
+            and not response.has_header("Content-Encoding")
+            # Pages rendering a CSRF token (e.g. FormPage) are per-visitor
+            and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+            and "private" not in response.get("Cache-Control", "")
+        )
+
+
+class ConditionalPageMiddleware:
+    """
+    Add ETag and Last-Modified validators to Wagtail page responses.
+
+    The ``before_serve_page`` hooks in ``base.wagtail_hooks`` work them out
+    from the versions of the page's surrogate keys, and answer requests that
+    already match them with a 304 before the page is rendered. Placed after
+    ``PageCacheMiddleware`` so cached responses keep their validators.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "PAGE_CONDITIONAL_GET_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.add_validators(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.add_validators(request, await self.get_response(request))
+
+    def add_validators(self, request, response):
+        validators = getattr(request, "page_validators", None)
+        if validators and self.has_validators(request, response):
+            etag, last_modified = validators
+            response.headers.setdefault("ETag", etag)
+            response.headers.setdefault("Last-Modified", http_date(last_modified))
+            # Revalidate every time, rather than guessing how long it stays fresh
+            patch_cache_control(response, no_cache=True)
+        return response
+
+    def has_validators(self, request, response):
+        return (
+            response.status_code in (200, 304)
+            and not response.streaming
+            # A page with a CSRF token can only be reused with the same cookie
+            and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+        )
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Index Wagtail's form submissions by page and submission time, for the
+    submission date filter and date-ordered exports. The table belongs to
+    wagtail.contrib.forms, so the index is created with SQL.
+    """
+
+    dependencies = [
+        ('base', '0004_queuedformemail'),
+        ('wagtailforms', '0005_alter_formsubmission_form_data'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS base_formsubmission_page_submit_time '
+            'ON wagtailforms_formsubmission (page_id, submit_time)',
+            'DROP INDEX IF EXISTS base_formsubmission_page_submit_time',
+        ),
+    ]
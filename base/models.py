@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 from modelcluster.fields import ParentalKey
 
@@ -100,4 +101,65 @@ class FormPage(AbstractEmailForm):
 
     api_fields = [
         APIField('form_fields'),
-    ]
\ No newline at end of file
+    ]
+
+    def get_submissions_list_view_class(self):
+        # Imported here so loading models doesn't import the admin
+        from base.views import FormSubmissionsListView
+
+        return FormSubmissionsListView
+
+    def send_mail(self, form):
+        # Queued for a task worker, so the visitor never waits on SMTP
+        from base.tasks import send_form_emails
+
+        QueuedFormEmail.objects.create(
+            page=self,
+            to_address=self.to_address,
+            from_address=self.from_address,
+            subject=self.subject,
+            body=self.render_email(form),
+        )
+        send_form_emails.enqueue()
+
+
+class QueuedFormEmail(models.Model):
+    """
+    A FormPage submission notification waiting to be sent by the
+    send_form_emails task, which batches and retries them.
+    """
+    page = models.ForeignKey(FormPage, on_delete=models.CASCADE, related_name='+')
+    to_address = models.TextField()
+    from_address = models.EmailField(blank=True)
+    subject = models.CharField(max_length=255, blank=True)
+    body = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Null once every attempt has failed
+    next_attempt_at = models.DateTimeField(default=timezone.now, null=True, db_index=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"{self.subject} to {self.to_address}"
+
+class FormAnswerCount(models.Model):
+    """
+    Running submission counts for a form page, maintained by base.analytics
+    as submissions are saved and deleted: one row per day with blank field
+    and value for all submissions, plus one per day and answer to each
+    choice field.
+    """
+    page = models.ForeignKey('wagtailcore.Page', on_delete=models.CASCADE, related_name='+')
+    date = models.DateField()
+    field = models.CharField(max_length=255, blank=True)
+    value = models.CharField(max_length=255, blank=True)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['page', 'date', 'field', 'value'], name='unique_form_answer_count'),
+        ]
+
+    def __str__(self):
+        return f"{self.field}={self.value} on {self.date}: {self.count}"
@@ -0,0 +1,191 @@
+"""
+Whole-page output cache for Wagtail pages served to anonymous users.
+
+Every cached response is tagged with surrogate keys describing what it was
+built from: the page itself, the objects it references (snippets, images,
+other pages), its embeds, the child listings it shows and the site-wide
+navigation.
+Purging a key drops its version, which invalidates every cached response
+tagged with it without having to track the responses themselves.
+
+The same versions give pages their ETag and Last-Modified validators: a
+version is the time its key was first used after a purge, so it changes
+whenever anything the page is built from does.
+"""
+
+import functools
+import hashlib
+import os
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.autoreload import get_template_directories
+
+from wagtail.embeds.embeds import get_embed_hash
+from wagtail.models import ReferenceIndex, Site
+
+from base.embeds import find_embeds
+from base.tasks import purge_proxies
+from mysite.cache import STATE_ALIAS, metrics
+
+# Models rendered on every page (header navigation and footer), so any
+# change to them purges the whole cache.
+GLOBAL_MODELS = ["base.footertext", "base.navigationsettings"]
+
+
+def get_cache_alias():
+    return getattr(settings, "PAGE_CACHE_ALIAS", "default")
+
+
+def get_cache():
+    return caches[get_cache_alias()]
+
+
+def get_timeout():
+    return getattr(settings, "PAGE_CACHE_TIMEOUT", 60 * 60)
+
+
+def model_key(model):
+    """Key shared by every instance of a model"""
+    return model if isinstance(model, str) else model._meta.label_lower
+
+
+def object_key(obj):
+    """Key for a single object, using the base model for multi-table models"""
+    model = obj._meta.concrete_model
+    parents = model._meta.get_parent_list()
+    if parents:
+        model = parents[-1]
+    return f"{model._meta.label_lower}:{obj.pk}"
+
+
+def embed_key(embed_hash):
+    """Key for an embed, by the hash it is stored under, fetched yet or not"""
+    return f"embed:{embed_hash}"
+
+
+def children_key(page_id):
+    """Key for any listing of a page's children"""
+    return f"children:{page_id}"
+
+
+@functools.cache
+def templates_key():
+    """Key that changes whenever the project's templates do, e.g. on deploy"""
+    digest = hashlib.md5()
+    base_dir = os.path.realpath(settings.BASE_DIR)
+    for directory in sorted(map(str, get_template_directories())):
+        if not os.path.realpath(directory).startswith(base_dir + os.sep):
+            continue
+        for root, dirs, files in sorted(os.walk(directory)):
+            for name in sorted(files):
+                with open(os.path.join(root, name), "rb") as f:
+                    digest.update(f.read())
+    return "templates:" + digest.hexdigest()[:12]
+
+
+def get_page_surrogate_keys(page, request):
+    """Return the set of surrogate keys a rendered page depends on"""
+    keys = {object_key(page), children_key(page.pk), templates_key()}
+    keys.update(GLOBAL_MODELS)
+
+    site = Site.find_for_request(request)
+    if site is not None:
+        keys.add(children_key(site.root_page_id))
+
+    references = ReferenceIndex.get_references_for_object(page).values_list(
+        "to_content_type__app_label", "to_content_type__model", "to_object_id"
+    )
+    for app_label, model_name, object_id in references.distinct():
+        keys.add(f"{app_label}.{model_name}:{object_id}")
+
+    # Embeds render as plain links until a task has fetched them
+    for embed in find_embeds(page):
+        keys.add(embed_key(get_embed_hash(*embed)))
+
+    # Pages listing objects they don't reference directly (e.g. every
+    # BlogPage with a tag) declare the models they depend on
+    for label in getattr(page, "cache_dependencies", []):
+        keys.add(label.lower())
+
+    return keys
+
+
+def get_request_key(request):
+    url = request.build_absolute_uri()
+    return "page-cache:" + hashlib.md5(url.encode()).hexdigest()
+
+
+def _version_key(key):
+    return f"page-version:{key}"
+
+
+def get_cached_response(request):
+    """Return the cached response for a request, or None if missing or stale"""
+    cache = get_cache()
+    entry = cache.get(get_request_key(request))
+    response = None
+
+    if entry is not None:
+        versions = entry["versions"]
+        current = caches[STATE_ALIAS].get_many([_version_key(key) for key in versions])
+        if all(current.get(_version_key(key)) == version for key, version in versions.items()):
+            response = entry["response"]
+
+    metrics.record(get_cache_alias(), response is not None)
+    return response
+
+
+def get_versions(keys):
+    """Return {key: version}, starting a new version for keys without one"""
+    # Kept where they can't be culled, as a lost version would reset the
+    # validators of every page tagged with its key
+    cache = caches[STATE_ALIAS]
+    version_keys = [_version_key(key) for key in keys]
+    current = cache.get_many(version_keys)
+
+    now = time.time()
+    missing = {
+        version_key: now
+        for version_key in version_keys
+        if version_key not in current
+    }
+    if missing:
+        cache.set_many(missing, None)
+        current.update(missing)
+
+    return {key: current[_version_key(key)] for key in keys}
+
+
+def get_page_validators(page, keys):
+    """Return the (ETag, Last-Modified timestamp) of a page built from keys"""
+    versions = get_versions(keys)
+    published = page.last_published_at.timestamp() if page.last_published_at else 0
+
+    digest = hashlib.md5(repr((page.pk, published, sorted(versions.items()))).encode())
+    # Weak, as equivalent renders needn't be byte for byte identical
+    etag = f'W/"{digest.hexdigest()}"'
+    # In whole seconds, like the Last-Modified header
+    return etag, int(max(published, *versions.values()))
+
+
+def set_cached_response(request, response, keys):
+    entry = {
+        "response": response,
+        "versions": get_versions(keys),
+    }
+    get_cache().set(get_request_key(request), entry, get_timeout())
+
+
+def purge(*keys):
+    """Invalidate every cached response tagged with any of the given keys"""
+    keys = [key for key in keys if key]
+    if not keys:
+        return
+
+    caches[STATE_ALIAS].delete_many([_version_key(key) for key in keys])
+    if getattr(settings, "PAGE_CACHE_PURGE_URLS", []):
+        # Sent by a worker once the change is committed, so a slow proxy
+        # never holds up a save
+        purge_proxies.enqueue(sorted(keys))
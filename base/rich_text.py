@@ -0,0 +1,119 @@
+"""
+Cached rich text expansion.
+
+Expanding stored rich text resolves every embedded page link, document link
+and embed, which costs queries on every render. The expanded HTML is cached
+under a hash of the stored HTML plus a version stamp that is replaced
+whenever a page, document, image or embed that rich text can link to
+changes (see ``base.signal_handlers``), so links resolve once per content
+change instead of once per view.
+
+Pages rendering several rich text fields (or a listing of many pages) can
+prime the cache with ``expand_db_html_many``, which expands every field in a
+single rewriter pass so each link type is resolved with one bulk query.
+"""
+
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+from wagtail.images.rich_text import ImageEmbedHandler
+from wagtail.rich_text import expand_db_html as wagtail_expand_db_html
+
+from mysite.cache import STATE_ALIAS, metrics
+
+VERSION_KEY = "richtext-links-version"
+
+
+def get_cache_alias():
+    return getattr(settings, "RICH_TEXT_CACHE_ALIAS", "default")
+
+
+def get_cache():
+    return caches[get_cache_alias()]
+
+
+def get_links_version():
+    cache = caches[STATE_ALIAS]
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        # Another process may have set it first, so use whichever won
+        if not cache.add(VERSION_KEY, version, None):
+            version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def bump_links_version():
+    """Invalidate every cached expansion"""
+    caches[STATE_ALIAS].set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def get_timeout():
+    return getattr(settings, "RICH_TEXT_CACHE_TIMEOUT", 24 * 60 * 60)
+
+
+def _cache_key(html, version):
+    digest = hashlib.sha1(html.encode()).hexdigest()
+    return f"richtext:{version}:{digest}"
+
+
+def expand_db_html(html):
+    """Cached drop-in replacement for wagtail.rich_text.expand_db_html"""
+    if not html:
+        return html
+
+    cache = get_cache()
+    key = _cache_key(html, get_links_version())
+    expanded = cache.get(key)
+    metrics.record(get_cache_alias(), expanded is not None)
+    if expanded is None:
+        expanded = wagtail_expand_db_html(html)
+        cache.set(key, expanded, get_timeout())
+    return expanded
+
+
+def expand_db_html_many(html_list):
+    """
+    Expand a list of rich text values, resolving the links and embeds of all
+    uncached values together: they are joined and passed through the
+    rewriter once, so each link or embed type costs one bulk query.
+    """
+    html_list = [str(html) if html else "" for html in html_list]
+    cache = get_cache()
+    version = get_links_version()
+    keys = {html: _cache_key(html, version) for html in html_list if html}
+    cached = cache.get_many(keys.values())
+
+    missing = [html for html, key in keys.items() if key not in cached]
+    metrics.record(get_cache_alias(), True, len(keys) - len(missing))
+    metrics.record(get_cache_alias(), False, len(missing))
+    if missing:
+        separator = f"<!--{uuid.uuid4().hex}-->"
+        expanded = wagtail_expand_db_html(separator.join(missing)).split(separator)
+        new_entries = {keys[html]: result for html, result in zip(missing, expanded)}
+        cache.set_many(new_entries, get_timeout())
+        cached.update(new_entries)
+
+    return [cached[keys[html]] if html else html for html in html_list]
+
+
+def prefetch_rich_text(*html_list):
+    """Warm the cache so later ``richtext`` filter calls are cache hits"""
+    expand_db_html_many(html_list)
+
+
+class PrefetchingImageEmbedHandler(ImageEmbedHandler):
+    """
+    Fetch the renditions of every embedded image along with the images, so
+    rendering them doesn't cost a query per image.
+    """
+
+    @classmethod
+    def get_many(cls, attrs_list):
+        ids = [attrs.get("id") for attrs in attrs_list]
+        images = cls.get_model()._default_manager.prefetch_related("renditions").in_bulk(ids)
+        images_by_str_id = {str(pk): image for pk, image in images.items()}
+        return [images_by_str_id.get(str(pk)) for pk in ids]
@@ -0,0 +1,174 @@
+from django.db.models.signals import post_delete, post_save
+
+from wagtail.contrib.forms.models import FormSubmission
+from wagtail.contrib.settings.models import BaseGenericSetting, BaseSiteSetting
+from wagtail.documents import get_document_model
+from wagtail.embeds.models import Embed
+from wagtail.images import get_image_model
+from wagtail.models import Page
+from wagtail.signals import page_published, page_unpublished, post_page_move
+from wagtail.snippets.models import get_snippet_models
+
+from base import analytics, page_cache, rich_text, sitemaps
+from base.embeds import find_embeds, get_embed_fields
+from base.tasks import prefetch_embeds
+from blog import feeds
+from mysite.cache import namespace
+
+# Cache namespaces holding data derived from live pages
+PAGE_NAMESPACES = ["navigation", "search", "pages_api"]
+
+# Cache namespaces holding data derived from other models. The pages API
+# also serializes authors, team members and (see invalidate_model_namespaces)
+# images and documents.
+MODEL_NAMESPACES = {
+    "base.footertext": ["navigation"],
+    "blog.author": ["pages_api"],
+    "team.department": ["team", "pages_api"],
+    "team.teammember": ["team", "pages_api"],
+    "team.teammembersociallink": ["pages_api"],
+}
+
+
+def purge_page(sender, instance, **kwargs):
+    """Purge a page along with the listings and references that show it"""
+    parent = instance.get_parent()
+    page_cache.purge(
+        page_cache.object_key(instance),
+        page_cache.children_key(parent.pk) if parent else None,
+        page_cache.model_key(instance.specific_class or type(instance)),
+    )
+
+
+def purge_moved_page(sender, instance, parent_page_before, parent_page_after, **kwargs):
+    """A moved page and its descendants change URL, and leave one listing for another"""
+    pages = Page.objects.descendant_of(instance, inclusive=True).only("pk")
+    page_cache.purge(
+        *(page_cache.object_key(page) for page in pages),
+        page_cache.children_key(parent_page_before.pk),
+        page_cache.children_key(parent_page_after.pk),
+    )
+
+
+def purge_object(sender, instance, **kwargs):
+    """Purge pages built from a snippet, image, document or setting"""
+    if issubclass(sender, Page) or not is_page_dependency(sender):
+        return
+    page_cache.purge(page_cache.object_key(instance), page_cache.model_key(sender))
+
+
+def is_page_dependency(model):
+    return (
+        model in get_snippet_models()
+        or issubclass(model, (BaseGenericSetting, BaseSiteSetting))
+        or issubclass(model, (get_image_model(), get_document_model()))
+    )
+
+
+def purge_embed(sender, instance, **kwargs):
+    """Purge pages showing an embed, once fetched or refreshed by a task"""
+    page_cache.purge(page_cache.embed_key(instance.hash))
+
+
+def purge_deleted_page(sender, instance, **kwargs):
+    if isinstance(instance, Page) and instance.live:
+        purge_page(sender, instance)
+
+
+def bump_rich_text_links(sender, **kwargs):
+    """Links and embeds in rich text may now expand differently"""
+    rich_text.bump_links_version()
+
+
+def bump_rich_text_links_for_object(sender, signal, **kwargs):
+    # Page drafts don't change links until published, but deletes do
+    linked_models = (Embed, get_image_model(), get_document_model())
+    if issubclass(sender, linked_models) or (signal is post_delete and issubclass(sender, Page)):
+        rich_text.bump_links_version()
+
+
+def invalidate_page_namespaces(sender, **kwargs):
+    for alias in PAGE_NAMESPACES:
+        namespace(alias).invalidate()
+
+
+def invalidate_model_namespaces(sender, signal, **kwargs):
+    if signal is post_delete and issubclass(sender, Page):
+        invalidate_page_namespaces(sender)
+    aliases = MODEL_NAMESPACES.get(sender._meta.label_lower, [])
+    if issubclass(sender, (get_image_model(), get_document_model())):
+        aliases = [*aliases, "pages_api"]
+    for alias in aliases:
+        namespace(alias).invalidate()
+
+
+def rebuild_page_fragments(sender, instance, **kwargs):
+    """Drop the sitemap section and feed listing a page appears in"""
+    if not isinstance(instance, Page):
+        return
+    sitemaps.invalidate_page(instance)
+    parent = kwargs.get("parent_page_after") or instance.get_parent()
+    if parent:
+        feeds.invalidate_index(parent)
+    # A moved page also leaves its old section and listing
+    parent_before = kwargs.get("parent_page_before")
+    if parent_before:
+        sitemaps.invalidate_page(parent_before)
+        feeds.invalidate_index(parent_before)
+
+
+def rebuild_deleted_page_fragments(sender, instance, **kwargs):
+    if isinstance(instance, Page) and instance.live:
+        rebuild_page_fragments(sender, instance)
+
+
+def count_form_submission(sender, instance, created, **kwargs):
+    if created:
+        analytics.record_submission(instance)
+
+
+def uncount_form_submission(sender, instance, **kwargs):
+    analytics.record_submission(instance, delta=-1)
+
+
+def prefetch_page_embeds(sender, instance, **kwargs):
+    """Fetch a published page's embeds now so rendering never has to"""
+    if not get_embed_fields(type(instance)):
+        return
+    embeds = [list(embed) for embed in find_embeds(instance)]
+    if embeds:
+        # Tasks are enqueued once the save is committed
+        prefetch_embeds.enqueue(embeds)
+
+
+def register_signal_handlers():
+    page_published.connect(purge_page, dispatch_uid="page_cache_published")
+    page_unpublished.connect(purge_page, dispatch_uid="page_cache_unpublished")
+    post_delete.connect(purge_deleted_page, dispatch_uid="page_cache_page_deleted")
+    post_page_move.connect(purge_moved_page, dispatch_uid="page_cache_page_moved")
+    post_save.connect(purge_object, dispatch_uid="page_cache_object_saved")
+    post_delete.connect(purge_object, dispatch_uid="page_cache_object_deleted")
+    post_save.connect(purge_embed, sender=Embed, dispatch_uid="page_cache_embed_saved")
+    post_delete.connect(purge_embed, sender=Embed, dispatch_uid="page_cache_embed_deleted")
+
+    page_published.connect(bump_rich_text_links, dispatch_uid="rich_text_page_published")
+    page_unpublished.connect(bump_rich_text_links, dispatch_uid="rich_text_page_unpublished")
+    post_page_move.connect(bump_rich_text_links, dispatch_uid="rich_text_page_moved")
+    post_save.connect(bump_rich_text_links_for_object, dispatch_uid="rich_text_object_saved")
+    post_delete.connect(bump_rich_text_links_for_object, dispatch_uid="rich_text_object_deleted")
+
+    page_published.connect(invalidate_page_namespaces, dispatch_uid="namespaces_page_published")
+    page_unpublished.connect(invalidate_page_namespaces, dispatch_uid="namespaces_page_unpublished")
+    post_page_move.connect(invalidate_page_namespaces, dispatch_uid="namespaces_page_moved")
+    post_save.connect(invalidate_model_namespaces, dispatch_uid="namespaces_object_saved")
+    post_delete.connect(invalidate_model_namespaces, dispatch_uid="namespaces_object_deleted")
+
+    page_published.connect(rebuild_page_fragments, dispatch_uid="fragments_page_published")
+    page_unpublished.connect(rebuild_page_fragments, dispatch_uid="fragments_page_unpublished")
+    post_page_move.connect(rebuild_page_fragments, dispatch_uid="fragments_page_moved")
+    post_delete.connect(rebuild_deleted_page_fragments, dispatch_uid="fragments_page_deleted")
+
+    post_save.connect(count_form_submission, sender=FormSubmission, dispatch_uid="analytics_submission_saved")
+    post_delete.connect(uncount_form_submission, sender=FormSubmission, dispatch_uid="analytics_submission_deleted")
+
+    page_published.connect(prefetch_page_embeds, dispatch_uid="prefetch_page_embeds")
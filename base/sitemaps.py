@@ -0,0 +1,100 @@
+"""
+XML sitemaps built from per-section fragments.
+
+Each child of a site's root page is a section (the blog, services and so
+on) with its own sitemap file, listed in /sitemap.xml. A section's URLs are
+read from the tree once and kept in the "sitemaps" cache namespace until a
+page in that section is published, unpublished, moved or deleted, so a
+crawl never walks the whole tree and a publish only rebuilds one section.
+Sections longer than SITEMAP_LIMIT are split into numbered pages by Django's
+sitemap index.
+"""
+
+from django.conf import settings
+from django.contrib.sitemaps import Sitemap
+from django.contrib.sitemaps import views as sitemap_views
+from django.http import Http404
+from django.views.decorators.gzip import gzip_page
+
+from wagtail.models import Page, Site
+
+from mysite.cache import namespace
+
+SITEMAP_NAMESPACE = "sitemaps"
+
+
+def get_section_path(page, root):
+    """Tree path of the section containing page, which must be under root"""
+    if page.depth <= root.depth:
+        return root.path
+    return page.path[: (root.depth + 1) * Page.steplen]
+
+
+def get_fragment(site, section, request):
+    """Return [{"location", "lastmod"}] for the live pages of a section"""
+
+    def build():
+        pages = Page.objects.live().public().order_by("path")
+        if section.pk == site.root_page_id:
+            # The home page alone; its children are sections of their own
+            pages = pages.filter(pk=section.pk)
+        else:
+            pages = pages.descendant_of(section, inclusive=True)
+
+        entries = []
+        for page in pages:
+            url_parts = page.get_url_parts(request)
+            if url_parts is None or url_parts[0] != site.pk:
+                continue
+            entries.append({
+                "location": url_parts[2],
+                "lastmod": page.last_published_at or page.latest_revision_created_at,
+            })
+        return entries
+
+    return namespace(SITEMAP_NAMESPACE).get_or_set(f"{site.pk}:{section.path}", build)
+
+
+def invalidate_page(page):
+    """Drop the fragment of every section containing page"""
+    for site in Site.objects.select_related("root_page"):
+        root = site.root_page
+        if page.path.startswith(root.path):
+            namespace(SITEMAP_NAMESPACE).delete(f"{site.pk}:{get_section_path(page, root)}")
+
+
+class SectionSitemap(Sitemap):
+    def __init__(self, site, section, request):
+        self.limit = getattr(settings, "SITEMAP_LIMIT", Sitemap.limit)
+        self.site = site
+        self.section = section
+        self.request = request
+
+    def items(self):
+        return get_fragment(self.site, self.section, self.request)
+
+    def location(self, item):
+        return item["location"]
+
+    def lastmod(self, item):
+        return item["lastmod"]
+
+
+def get_sitemaps(request):
+    """Return {section name: SectionSitemap} for the requested site"""
+    site = Site.find_for_request(request)
+    if site is None:
+        raise Http404
+    root = site.root_page
+    sections = [root, *root.get_children().live().public().order_by("path")]
+    return {section.slug: SectionSitemap(site, section, request) for section in sections}
+
+
+@gzip_page
+def index(request):
+    return sitemap_views.index(request, get_sitemaps(request), sitemap_url_name="sitemap")
+
+
+@gzip_page
+def sitemap(request, section):
+    return sitemap_views.sitemap(request, get_sitemaps(request), section=section)
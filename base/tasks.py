@@ -0,0 +1,148 @@
+import logging
+import urllib.request
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.utils.timezone import now
+from django_tasks import task
+
+from wagtail.embeds.embeds import get_embed, get_embed_hash
+from wagtail.embeds.exceptions import EmbedException
+from wagtail.admin.mail import send_mail
+from wagtail.embeds.models import Embed
+from wagtail.images import get_image_model
+
+from base.models import QueuedFormEmail
+
+logger = logging.getLogger(__name__)
+
+
+@task()
+def prefetch_embeds(embeds):
+    """Fetch and store any of the given (url, max_width, max_height) embeds not stored yet"""
+    for url, max_width, max_height in embeds:
+        try:
+            get_embed(url, max_width, max_height)
+        except EmbedException:
+            logger.warning("Failed to fetch embed for %s", url, exc_info=True)
+
+
+@task(enqueue_on_commit=True)
+def purge_proxies(keys):
+    """
+    Forward a page cache purge to any reverse proxies in front of the site,
+    using the Surrogate-Key convention understood by Varnish (xkey) and Fastly.
+    """
+    for url in getattr(settings, "PAGE_CACHE_PURGE_URLS", []):
+        purge_request = urllib.request.Request(url, method="PURGE", headers={"Surrogate-Key": " ".join(keys)})
+        try:
+            urllib.request.urlopen(purge_request, timeout=5).close()
+        except OSError:
+            logger.warning("Failed to purge %s from %s", keys, url, exc_info=True)
+
+
+@task()
+def refresh_embeds(embeds):
+    """Refetch stored embeds, keeping the old HTML if the provider fails"""
+    for url, max_width, max_height in embeds:
+        # get_embed only refetches embeds whose cache_until has passed
+        Embed.objects.filter(hash=get_embed_hash(url, max_width, max_height)).update(cache_until=now())
+        try:
+            get_embed(url, max_width, max_height)
+        except EmbedException:
+            logger.warning("Failed to refresh embed for %s", url, exc_info=True)
+
+
+@task()
+def generate_renditions(image_ids, filter_specs):
+    """Generate any of the given renditions of images that don't exist yet"""
+    for image in get_image_model().objects.filter(pk__in=image_ids).prefetch_related("renditions"):
+        try:
+            image.get_renditions(*filter_specs)
+        except OSError:
+            logger.warning("Failed to generate renditions of image %s", image.pk, exc_info=True)
+
+
+def get_form_email_batch(limit):
+    """
+    Claim up to limit queued form emails that are due, so concurrent
+    workers never send the same email twice.
+    """
+    started = now()
+    due = QueuedFormEmail.objects.filter(sent_at__isnull=True, next_attempt_at__lte=started)
+    ids = list(due.order_by("created_at").values_list("pk", flat=True)[:limit])
+    # Hold the claim for as long as a send might take; unsent emails
+    # become due again afterwards
+    claimed_until = started + timedelta(seconds=settings.FORM_EMAIL_CLAIM_TIMEOUT)
+    due.filter(pk__in=ids).update(next_attempt_at=claimed_until)
+    return list(
+        QueuedFormEmail.objects.filter(pk__in=ids, next_attempt_at=claimed_until).order_by(
+            "page_id", "to_address", "from_address", "subject", "created_at"
+        )
+    )
+
+
+def get_message_key(email):
+    """Emails with the same key are sent as one message"""
+    return (email.page_id, email.to_address, email.from_address, email.subject)
+
+
+def render_digest(emails):
+    """One message body for several submissions to the same form"""
+    sections = [f"Submitted {email.created_at:%Y-%m-%d %H:%M}\n\n{email.body}" for email in emails]
+    return f"{len(emails)} new submissions\n\n" + "\n\n----\n\n".join(sections)
+
+
+@task()
+def send_form_emails():
+    """
+    Send queued form submission emails over one connection. Emails waiting
+    for the same form and recipients go out as a single digest; failed sends
+    are retried with exponential backoff up to FORM_EMAIL_MAX_ATTEMPTS.
+    """
+    emails = get_form_email_batch(settings.FORM_EMAIL_BATCH_SIZE)
+    if not emails:
+        return
+
+    retry_at = None
+    connection = get_connection()
+    try:
+        for (page_id, to_address, from_address, subject), group in groupby(emails, get_message_key):
+            group = list(group)
+            if len(group) > 1:
+                subject, body = f"{subject} ({len(group)} submissions)", render_digest(group)
+            else:
+                body = group[0].body
+            addresses = [address.strip() for address in to_address.split(",")]
+            ids = [email.pk for email in group]
+
+            try:
+                # Opens the connection for the first message only
+                connection.open()
+                send_mail(subject, body, addresses, from_address, connection=connection)
+            except Exception as e:
+                logger.warning("Failed to send form emails %s", ids, exc_info=True)
+                attempts = max(email.attempts for email in group) + 1
+                if attempts >= settings.FORM_EMAIL_MAX_ATTEMPTS:
+                    # Left unsent, with the error, for someone to look at
+                    next_attempt_at = None
+                else:
+                    next_attempt_at = now() + timedelta(
+                        seconds=settings.FORM_EMAIL_RETRY_DELAY * 2 ** (attempts - 1)
+                    )
+                    retry_at = min(retry_at or next_attempt_at, next_attempt_at)
+                QueuedFormEmail.objects.filter(pk__in=ids).update(
+                    attempts=attempts, next_attempt_at=next_attempt_at, last_error=str(e)
+                )
+            else:
+                QueuedFormEmail.objects.filter(pk__in=ids).update(sent_at=now())
+    finally:
+        connection.close()
+
+    if retry_at is not None and send_form_emails.get_backend().supports_defer:
+        send_form_emails.using(run_after=retry_at).enqueue()
+    if len(emails) == settings.FORM_EMAIL_BATCH_SIZE:
+        # More may be waiting
+        send_form_emails.enqueue()
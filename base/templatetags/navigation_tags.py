@@ -3,23 +3,55 @@ from django import template
 from wagtail.models import Site
 
 from base.models import FooterText
+from mysite.cache import namespace
 
 register = template.Library()
 
+navigation_cache = namespace("navigation")
+
 
 @register.inclusion_tag("base/includes/footer_text.html", takes_context=True)
 def get_footer_text(context):
     footer_text = context.get("footer_text", "")
 
     if not footer_text:
-        instance = FooterText.objects.filter(live=True).first()
-        footer_text = instance.body if instance else ""
+        footer_text = navigation_cache.get_or_set("footer-text", get_live_footer_text)
 
     return {
         "footer_text": footer_text,
     }
 
 
+def get_live_footer_text():
+    instance = FooterText.objects.filter(live=True).first()
+    return instance.body if instance else ""
+
+
 @register.simple_tag(takes_context=True)
 def get_site_root(context):
-    return Site.find_for_request(context["request"]).root_page
\ No newline at end of file
+    return Site.find_for_request(context["request"]).root_page
+
+
+@register.simple_tag(takes_context=True)
+def get_menu(context):
+    """
+    Return the site root URL and the live in-menu pages below it as
+    {"root_url": ..., "items": [{"title": ..., "url": ...}]}, cached per site
+    until a page is published, unpublished, moved or deleted.
+    """
+    request = context["request"]
+    site = Site.find_for_request(request)
+    if site is None:
+        return {"root_url": "/", "items": []}
+
+    def build_menu():
+        root = site.root_page
+        return {
+            "root_url": root.get_url(request),
+            "items": [
+                {"title": page.title, "url": page.get_url(request)}
+                for page in root.get_children().live().in_menu()
+            ],
+        }
+
+    return navigation_cache.get_or_set(f"menu:{site.pk}", build_menu)
@@ -0,0 +1,31 @@
+from django import template
+from django.template.loader import render_to_string
+from django.utils.functional import Promise
+
+from wagtail.rich_text import RichText
+
+from base.rich_text import expand_db_html
+
+register = template.Library()
+
+
+@register.filter
+def richtext(value):
+    """
+    Cached version of wagtailcore_tags' richtext filter. Load this library
+    after wagtailcore_tags so it takes precedence.
+    """
+    if isinstance(value, RichText):
+        value = value.source
+    elif value is None:
+        value = ""
+    elif isinstance(value, Promise):
+        value = str(value)
+
+    if not isinstance(value, str):
+        raise TypeError(
+            "'richtext' template filter received an invalid value; expected string, got {}.".format(
+                type(value)
+            )
+        )
+    return render_to_string("wagtailcore/shared/richtext.html", {"html": expand_db_html(value)})
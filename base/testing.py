@@ -0,0 +1,307 @@
+"""
+Content fixtures and helpers for the performance tests, built on the
+generated content in ``base.fixtures``.
+
+The ``make_*`` functions build realistic volumes of content -- blog posts
+with tags, authors and galleries, team members with photos and social
+links, long StreamFields -- reproducibly from a seed. Volumes are the
+VOLUMES below multiplied by the PERF_SCALE environment variable, so
+``PERF_SCALE=50 python manage.py test`` runs the same budgets against
+thousands of posts.
+
+``PerformanceTestCase`` builds the content listed in its ``content``
+attribute once per test class, and its ``assertQueryBudget`` requests a URL
+and fails if it runs more queries than QUERY_BUDGETS allows its endpoint.
+With PERF_BENCHMARK set it also times the request, records the median in
+the PERF_RESULTS JSON file if one is given, and fails when it is more than
+PERF_TOLERANCE (default 0.5) slower than the same benchmark in the
+PERF_BASELINE file, if one is given.
+"""
+
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from wagtail.test.utils import WagtailPageTestCase
+
+from base.fixtures import WORDS, make_documents, make_flexible_stream, make_images, paragraph, sentence
+from dashboard.middleware import get_endpoint
+from mysite.cache import NAMESPACES, namespace
+
+VOLUMES = {
+    "images": 8,
+    "authors": 6,
+    "tags": 12,
+    "posts": 40,
+    "departments": 4,
+    "members": 40,
+    "blocks": 60,
+    "services": 10,
+    "faq_items": 20,
+    "documents": 3,
+}
+
+
+def get_volumes(scale=None):
+    if scale is None:
+        scale = float(os.environ.get("PERF_SCALE", 1))
+    return {name: max(1, round(count * scale)) for name, count in VOLUMES.items()}
+
+
+def clear_caches():
+    for cache in caches.all():
+        cache.clear()
+
+
+def make_blog(home, rng, volumes, images):
+    """A blog index with tagged, authored posts with galleries, and a tag index"""
+    from blog.models import Author, BlogIndexPage, BlogPage, BlogPageGalleryImage, BlogTagIndexPage
+
+    index = home.add_child(instance=BlogIndexPage(title="Blog", slug="blog", intro=paragraph(rng)))
+    authors = [
+        Author.objects.create(name=f"Author {n}", author_image=rng.choice(images))
+        for n in range(volumes["authors"])
+    ]
+    tags = [f"tag-{n}" for n in range(volumes["tags"])]
+    first_date = date(2020, 1, 1)
+
+    for n in range(volumes["posts"]):
+        post = BlogPage(
+            title=sentence(rng, 4),
+            slug=f"post-{n}",
+            date=first_date + timedelta(days=n),
+            intro=sentence(rng),
+            body=paragraph(rng, 8),
+            authors=rng.sample(authors, min(2, len(authors))),
+            gallery_images=[
+                BlogPageGalleryImage(image=image, caption=sentence(rng, 3))
+                for image in rng.sample(images, min(3, len(images)))
+            ],
+        )
+        post.tags.add(*rng.sample(tags, min(3, len(tags))))
+        index.add_child(instance=post)
+
+    tag_index = home.add_child(instance=BlogTagIndexPage(title="Tags", slug="tags"))
+    return index, tag_index
+
+
+def make_pages(home, rng, volumes, images, documents):
+    """One page of every type in the pages app, with long StreamFields and listings"""
+    from pages.models import (
+        AboutPage, ContactPage, FAQItem, FAQPage, FlexiblePage, ServicePage, ServicesPage, StandardPage,
+    )
+
+    pages = {
+        "standard": home.add_child(instance=StandardPage(
+            title="Standard", slug="standard", intro=sentence(rng), header_image=images[0], body=paragraph(rng, 10),
+        )),
+        "about": home.add_child(instance=AboutPage(
+            title="About", slug="about", intro=paragraph(rng), mission=paragraph(rng), vision=paragraph(rng),
+            body=paragraph(rng, 10),
+        )),
+        "contact": home.add_child(instance=ContactPage(
+            title="Contact", slug="contact", email="hello@example.com", body=paragraph(rng),
+        )),
+        "faq": home.add_child(instance=FAQPage(
+            title="FAQ", slug="faq", intro=paragraph(rng),
+            faq_items=[
+                FAQItem(question=sentence(rng), answer=paragraph(rng, 2)) for _ in range(volumes["faq_items"])
+            ],
+        )),
+    }
+
+    services = pages["services"] = home.add_child(instance=ServicesPage(
+        title="Services", slug="services", intro=paragraph(rng),
+    ))
+    for n in range(volumes["services"]):
+        services.add_child(instance=ServicePage(
+            title=f"Service {n}", slug=f"service-{n}", description=paragraph(rng), features=paragraph(rng),
+        ))
+    pages["service"] = services.get_children().first().specific
+
+    pages["flexible"] = home.add_child(instance=FlexiblePage(
+        title="Flexible", slug="flexible", subtitle=sentence(rng),
+        body=json.dumps(make_flexible_stream(rng, volumes["blocks"], images, documents, [services])),
+    ))
+    return pages
+
+
+def make_portfolio(home, rng, volumes, images, posts):
+    from portfolio.models import PortfolioPage
+
+    blocks = []
+    for n in range(volumes["blocks"]):
+        if n % 2:
+            blocks.append({"type": "card", "value": {
+                "heading": sentence(rng, 3), "text": paragraph(rng, 1),
+                "image": {"image": rng.choice(images).pk, "alt_text": "", "decorative": True},
+            }})
+        else:
+            blocks.append({"type": "featured_posts", "value": {
+                "heading": sentence(rng, 3), "text": paragraph(rng, 1),
+                "posts": [post.pk for post in rng.sample(posts, min(3, len(posts)))],
+            }})
+    return home.add_child(instance=PortfolioPage(title="Portfolio", slug="portfolio", body=json.dumps(blocks)))
+
+
+def make_team(rng, volumes, images):
+    from team.models import Department, TeamMember, TeamMemberSocialLink
+
+    departments = [
+        Department.objects.create(name=f"Department {n}", description=sentence(rng))
+        for n in range(volumes["departments"])
+    ]
+    platforms = [choice for choice, _ in TeamMemberSocialLink.SOCIAL_CHOICES]
+    members = []
+    for n in range(volumes["members"]):
+        member = TeamMember(
+            name=f"Member {n}",
+            job_title=sentence(rng, 2),
+            department=rng.choice(departments),
+            email=f"member{n}@example.com",
+            photo=rng.choice(images),
+            bio=paragraph(rng),
+            short_bio=sentence(rng),
+            years_experience=rng.randrange(1, 30),
+            specialties=", ".join(rng.sample(WORDS, 3)),
+            is_featured=n % 5 == 0,
+            sort_order=n,
+            social_links=[
+                TeamMemberSocialLink(platform=platform, url=f"https://example.com/{platform}/{n}")
+                for platform in rng.sample(platforms, 2)
+            ],
+        )
+        member.save()
+        members.append(member)
+    return members
+
+
+class PerformanceTestCase(WagtailPageTestCase):
+    """
+    A test case with its own media directory, for content with real image
+    files, and query budget and benchmark assertions.
+    """
+
+    seed = 0
+    # Content made for the tests: any of "images", "documents", "blog",
+    # "pages", "portfolio" and "team", along with the content they use
+    content = ()
+
+    @classmethod
+    def setUpClass(cls):
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media_root))
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        from home.models import HomePage
+
+        cls.rng = random.Random(cls.seed)
+        cls.volumes = get_volumes()
+        cls.home = HomePage.objects.get(slug="home")
+        cls.make_content(set(cls.content))
+
+    @classmethod
+    def make_content(cls, content):
+        if "portfolio" in content:
+            content.add("blog")
+        if "pages" in content:
+            content.add("documents")
+        if content:
+            cls.images = make_images(cls.rng, cls.volumes["images"])
+        if "documents" in content:
+            cls.documents = make_documents(cls.volumes["documents"])
+        if "blog" in content:
+            cls.blog_index, cls.tag_index = make_blog(cls.home, cls.rng, cls.volumes, cls.images)
+        if "pages" in content:
+            cls.pages = make_pages(cls.home, cls.rng, cls.volumes, cls.images, cls.documents)
+        if "portfolio" in content:
+            posts = list(cls.blog_index.get_children())
+            cls.portfolio = make_portfolio(cls.home, cls.rng, cls.volumes, cls.images, posts)
+        if "team" in content:
+            cls.members = make_team(cls.rng, cls.volumes, cls.images)
+
+    def assertQueryBudgets(self, urls):
+        """assertQueryBudget each of a list of (url, kwargs), in subtests"""
+        for url, kwargs in urls:
+            with self.subTest(url=url, **kwargs.get("data", {})):
+                self.assertQueryBudget(url, **kwargs)
+
+    def assertQueryBudget(self, url, status_code=200, **kwargs):
+        """
+        Request url once to generate renditions, then again with every cache
+        namespace emptied, renditions included, counting queries against the
+        QUERY_BUDGETS entry for its endpoint. Returns the second response.
+        """
+        budgets = getattr(settings, "QUERY_BUDGETS", {})
+        # The middleware would raise before the test could list the queries
+        with override_settings(QUERY_BUDGETS={}):
+            response = self.client.get(url, **kwargs)
+            self.assertEqual(response.status_code, status_code, url)
+
+            # Measure the uncached path, with the renditions generated but
+            # looked up in the database, as after a deploy or cache restart.
+            # Wagtail reads the renditions cache directly, not by generation.
+            for alias in NAMESPACES:
+                namespace(alias).invalidate()
+            caches["renditions"].clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, **kwargs)
+            self.assertEqual(response.status_code, status_code, url)
+
+            endpoint = get_endpoint(response.wsgi_request)
+            budget = budgets.get(endpoint)
+            self.assertIsNotNone(budget, f"{endpoint} has no entry in QUERY_BUDGETS")
+            self.assertLessEqual(
+                len(queries), budget,
+                f"{url} ({endpoint}) ran {len(queries)} queries, over its budget of {budget}:\n"
+                + "\n".join(query["sql"] for query in queries.captured_queries),
+            )
+
+            if os.environ.get("PERF_BENCHMARK"):
+                self.record_benchmark(endpoint, url, kwargs)
+        return response
+
+    def record_benchmark(self, endpoint, url, kwargs):
+        runs = int(os.environ.get("PERF_BENCHMARK_RUNS", 10))
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            self.client.get(url, **kwargs)
+            timings.append((time.perf_counter() - start) * 1000)
+        median = statistics.median(timings)
+
+        path = os.environ.get("PERF_RESULTS")
+        if path:
+            results = {}
+            if os.path.exists(path):
+                with open(path) as f:
+                    results = json.load(f)
+            results[endpoint] = {"url": url, "median_ms": round(median, 3), "runs": runs, "volumes": self.volumes}
+            with open(path, "w") as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+
+        baseline_path = os.environ.get("PERF_BASELINE")
+        if baseline_path:
+            with open(baseline_path) as f:
+                baseline = json.load(f).get(endpoint)
+            if baseline:
+                tolerance = float(os.environ.get("PERF_TOLERANCE", 0.5))
+                self.assertLessEqual(
+                    median, baseline["median_ms"] * (1 + tolerance),
+                    f"{endpoint} took {median:.1f}ms, against {baseline['median_ms']:.1f}ms in {baseline_path}",
+                )
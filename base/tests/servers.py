@@ -0,0 +1,137 @@
+"""
+Local stand-ins for the external services the site talks to: a purging
+reverse proxy, an oEmbed provider and a mail relay.
+"""
+
+import json
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class LocalServer:
+    """
+    Minimal HTTP server on a free local port, standing in for an external
+    service. Subclasses define ``handle(handler)`` for each request.
+    """
+
+    def __init__(self):
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append(self)
+                server.handle(self)
+
+            do_PURGE = do_GET
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = "http://127.0.0.1:%d/" % self.server.server_port
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def respond(self, handler, body=b"", content_type="text/plain"):
+        handler.send_response(200)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+
+class LocalPurgeProxy(LocalServer):
+    """
+    Stand-in for a reverse proxy that records the PURGE requests it receives.
+    """
+
+    @property
+    def purged(self):
+        return [request.headers["Surrogate-Key"].split() for request in self.requests]
+
+    def handle(self, handler):
+        self.respond(handler)
+
+
+class LocalOEmbedProvider(LocalServer):
+    """
+    Stand-in oEmbed provider for URLs under https://video.example.com/.
+    """
+
+    html = '<iframe src="https://video.example.com/player"></iframe>'
+
+    def finders_setting(self):
+        return [{
+            "class": "wagtail.embeds.finders.oembed",
+            "providers": [{"endpoint": self.url, "urls": [r"^https://video\.example\.com/.+$"]}],
+        }]
+
+    def handle(self, handler):
+        body = json.dumps({"type": "video", "html": self.html, "title": "Video", "width": 480, "height": 270})
+        self.respond(handler, body.encode(), "application/json")
+
+
+class LocalSMTPServer:
+    """
+    Minimal SMTP server on a free local port that records the messages it
+    accepts, standing in for a mail relay. Set ``fail`` to refuse them.
+    """
+
+    def __init__(self):
+        self.messages = []
+        self.fail = False
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line):
+                self.wfile.write(line.encode() + b"\r\n")
+
+            def handle(self):
+                self.reply("220 localhost")
+                for line in self.rfile:
+                    command = line.decode().strip().upper()
+                    if command.startswith("EHLO") or command.startswith("HELO"):
+                        self.reply("250 localhost")
+                    elif command.startswith("MAIL") and server.fail:
+                        self.reply("451 Try again later")
+                    elif command == "DATA":
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        data = []
+                        for data_line in self.rfile:
+                            if data_line == b".\r\n":
+                                break
+                            data.append(data_line)
+                        server.messages.append(b"".join(data).decode())
+                        self.reply("250 OK")
+                    elif command == "QUIT":
+                        self.reply("221 Bye")
+                        return
+                    else:
+                        self.reply("250 OK")
+
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def settings(self):
+        return {
+            "EMAIL_BACKEND": "django.core.mail.backends.smtp.EmailBackend",
+            "EMAIL_HOST": "127.0.0.1",
+            "EMAIL_PORT": self.port,
+        }
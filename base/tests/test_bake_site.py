@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from wagtail.log_actions import log
+from wagtail.test.utils import WagtailPageTestCase
+
+from base.management.commands.bake_site import read_manifest, write_manifest
+from base.models import NavigationSettings
+from blog.models import BlogIndexPage, BlogPage, BlogTagIndexPage
+from home.models import HomePage
+
+
+class BakeSiteTests(WagtailPageTestCase):
+    """
+    Tests for the bake_site static pre-rendering command.
+    """
+
+    def setUp(self):
+        self.output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output)
+        home = HomePage.objects.get(slug="home")
+        self.blog = BlogIndexPage(title="Blog", slug="blog")
+        home.add_child(instance=self.blog)
+        self.post = BlogPage(title="First post", slug="first-post", date="2025-01-01", intro="Intro")
+        self.blog.add_child(instance=self.post)
+        self.post.tags.add("python")
+        self.post.save()
+        home.add_child(instance=BlogTagIndexPage(title="Tags", slug="tags"))
+
+    def bake(self, **options):
+        call_command("bake_site", output=self.output, workers=1, stdout=open(os.devnull, "w"), **options)
+
+    def read(self, *parts):
+        with open(os.path.join(self.output, *parts, "index.html")) as f:
+            return f.read()
+
+    def test_bakes_pages_and_tag_listings(self):
+        self.bake()
+
+        self.assertIn("First post", self.read("blog", "first-post"))
+        self.assertIn("<h1>Home</h1>", self.read())
+        self.assertIn("First post", self.read("tags", "tag=python"))
+
+    def test_incremental_bake_only_renders_affected_pages(self):
+        self.bake()
+        os.remove(os.path.join(self.output, "index.html"))
+        os.remove(os.path.join(self.output, "blog", "index.html"))
+        self.age_last_bake()
+
+        self.post.title = "Renamed post"
+        self.post.save_revision().publish()
+        self.bake(incremental=True)
+
+        self.assertIn("Renamed post", self.read("blog", "first-post"))
+        self.assertIn("Renamed post", self.read("blog"))
+        self.assertFalse(os.path.exists(os.path.join(self.output, "index.html")))
+
+    def test_unpublished_pages_are_removed(self):
+        self.bake()
+        self.age_last_bake()
+
+        self.post.unpublish()
+        self.bake(incremental=True)
+
+        self.assertFalse(os.path.exists(os.path.join(self.output, "blog", "first-post")))
+        self.assertFalse(os.path.exists(os.path.join(self.output, "tags", "tag=python")))
+        # Listings that showed the page are rebaked too
+        self.assertNotIn("First post", self.read("blog"))
+
+    def test_shared_content_change_rebakes_everything(self):
+        self.bake()
+        os.remove(os.path.join(self.output, "index.html"))
+        self.age_last_bake()
+
+        navigation = NavigationSettings.load()
+        navigation.github_url = "https://github.com/example"
+        navigation.save()
+        log(instance=navigation, action="wagtail.edit")
+        self.bake(incremental=True)
+
+        self.assertIn("<h1>Home</h1>", self.read())
+
+    def test_only_baked_files_are_removed(self):
+        # e.g. hand-written pages served from the same directory
+        os.makedirs(os.path.join(self.output, "landing"))
+        for path in (("landing", "index.html"), ("robots.txt",)):
+            with open(os.path.join(self.output, *path), "w") as f:
+                f.write("Kept")
+        self.bake()
+
+        self.post.unpublish()
+        self.bake()
+
+        self.assertFalse(os.path.exists(os.path.join(self.output, "blog", "first-post")))
+        self.assertEqual(self.read("landing"), "Kept")
+        self.assertTrue(os.path.exists(os.path.join(self.output, "robots.txt")))
+        self.assertNotIn(os.path.join("blog", "first-post", "index.html"), read_manifest(self.output)[1])
+
+    def age_last_bake(self):
+        _, files = read_manifest(self.output)
+        write_manifest(self.output, timezone.now() - timedelta(minutes=1), files)
@@ -0,0 +1,21 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+
+class BenchmarkServersTests(SimpleTestCase):
+    """
+    Tests for the server benchmark's checks before it starts any servers.
+    """
+
+    def test_missing_server_is_reported_before_starting_any(self):
+        installed = {"gunicorn"}
+        find_spec = mock.Mock(side_effect=lambda module: object() if module in installed else None)
+
+        with mock.patch("importlib.util.find_spec", find_spec), mock.patch("subprocess.Popen") as popen:
+            with self.assertRaisesMessage(CommandError, "The asgi profile needs uvicorn"):
+                call_command("benchmark_servers", profile=["wsgi", "asgi"], stdout=StringIO())
+        popen.assert_not_called()
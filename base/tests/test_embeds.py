@@ -0,0 +1,129 @@
+import os
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import override_settings
+
+from wagtail.test.utils import WagtailPageTestCase
+
+from wagtail.embeds.finders import get_finders
+from wagtail.embeds.models import Embed
+
+from base.testing import clear_caches
+from base.tests.servers import LocalOEmbedProvider
+from blog.models import BlogTagIndexPage
+from home.models import HomePage
+from pages.models import FlexiblePage
+
+
+class EmbedPrefetchTests(WagtailPageTestCase):
+    """
+    Tests for fetching embeds on save and rendering them without fetching.
+    """
+
+    def setUp(self):
+        self.provider = LocalOEmbedProvider().__enter__()
+        self.addCleanup(self.provider.__exit__)
+        settings_override = self.settings(WAGTAILEMBEDS_FINDERS=self.provider.finders_setting())
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        get_finders.cache_clear()
+        self.addCleanup(get_finders.cache_clear)
+
+        self.home = HomePage.objects.get(slug="home")
+
+    def create_page(self):
+        page = FlexiblePage(
+            title="Video", slug="video",
+            body=[("embed", "https://video.example.com/1")],
+        )
+        self.home.add_child(instance=page)
+        return page
+
+    def publish_page(self):
+        page = self.create_page()
+        with self.captureOnCommitCallbacks(execute=True):
+            page.save_revision().publish()
+        return page
+
+    def test_embed_is_fetched_on_publish(self):
+        page = self.create_page()
+        with self.captureOnCommitCallbacks(execute=True):
+            page.save_revision()
+        self.assertEqual(self.provider.requests, [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            page.save_revision().publish()
+
+        self.assertEqual(len(self.provider.requests), 1)
+        self.assertTrue(Embed.objects.filter(url="https://video.example.com/1").exists())
+
+    def test_pages_without_embed_fields_are_skipped(self):
+        page = BlogTagIndexPage(title="Tags", slug="tags")
+        self.home.add_child(instance=page)
+
+        with mock.patch("base.signal_handlers.find_embeds") as find_embeds:
+            page.save_revision().publish()
+        find_embeds.assert_not_called()
+
+    def test_assigned_embeds_render_from_storage(self):
+        page = FlexiblePage(title="Video", body=[("embed", "https://video.example.com/2")])
+
+        html = page.body.render_as_block()
+
+        self.assertIn('<a href="https://video.example.com/2">', html)
+        self.assertEqual(self.provider.requests, [])
+
+    def test_clean_rejects_urls_without_embeds(self):
+        block = FlexiblePage.body.field.stream_block.child_blocks["embed"]
+
+        block.clean(block.to_python("https://video.example.com/1"))
+        with self.assertRaisesMessage(ValidationError, "Cannot find an embed for this URL."):
+            block.clean(block.to_python("https://unknown.example.com/1"))
+
+    def test_rendering_never_fetches(self):
+        page = self.publish_page()
+
+        response = self.client.get(page.url)
+        self.assertContains(response, self.provider.html)
+        self.assertEqual(len(self.provider.requests), 1)
+
+        Embed.objects.all().delete()
+        response = self.client.get(page.url)
+        self.assertContains(response, '<a href="https://video.example.com/1">')
+        self.assertEqual(len(self.provider.requests), 1)
+
+    @override_settings(PAGE_CACHE_ENABLED=True, PAGE_CONDITIONAL_GET_ENABLED=True)
+    def test_fetched_embed_purges_pages(self):
+        clear_caches()
+        page = FlexiblePage(
+            title="Video", slug="video",
+            body=[("embed", "https://video.example.com/1")],
+        )
+        self.home.add_child(instance=page)
+        with self.captureOnCommitCallbacks() as callbacks:
+            page.save_revision().publish()
+
+        response = self.client.get(page.url)
+        self.assertContains(response, '<a href="https://video.example.com/1">')
+        etag = response["ETag"]
+
+        # The task fetching the embed runs
+        for callback in callbacks:
+            callback()
+        response = self.client.get(page.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response["X-Page-Cache"], "miss")
+        self.assertContains(response, self.provider.html)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_refresh_refetches_stale_embeds(self):
+        self.publish_page()
+        self.provider.html = '<iframe src="https://video.example.com/new-player"></iframe>'
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("refresh_embeds", ttl=0, stdout=open(os.devnull, "w"))
+
+        self.assertEqual(len(self.provider.requests), 2)
+        self.assertEqual(Embed.objects.get().html, self.provider.html)
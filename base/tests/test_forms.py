@@ -0,0 +1,216 @@
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from wagtail.test.utils import WagtailPageTestCase
+
+from base.analytics import get_form_analytics
+from base.models import FormAnswerCount, FormField, FormPage, QueuedFormEmail
+from base.tasks import send_form_emails
+from base.tests.servers import LocalSMTPServer
+from home.models import HomePage
+
+
+class FormEmailTests(WagtailPageTestCase):
+    """
+    Tests for queuing FormPage emails and sending them in batches.
+    """
+
+    def setUp(self):
+        self.page = FormPage(
+            title="Contact", slug="contact", to_address="team@example.com",
+            from_address="site@example.com", subject="New enquiry",
+        )
+        HomePage.objects.get(slug="home").add_child(instance=self.page)
+        FormField.objects.create(page=self.page, label="Name", field_type="singleline")
+
+        self.smtp = LocalSMTPServer()
+        self.enterContext(self.smtp)
+        self.enterContext(self.settings(**self.smtp.settings()))
+
+    def submit(self, name):
+        response = self.client.post(self.page.url, {"name": name})
+        self.assertEqual(response.status_code, 200)
+
+    def test_submission_is_queued_not_sent(self):
+        self.submit("Ada")
+
+        self.assertEqual(self.page.get_submission_class().objects.count(), 1)
+        self.assertEqual(QueuedFormEmail.objects.get().to_address, "team@example.com")
+        self.assertEqual(self.smtp.messages, [])
+
+    def test_task_sends_queued_email(self):
+        # The task is enqueued once the submission is committed
+        with self.captureOnCommitCallbacks(execute=True):
+            self.submit("Ada")
+
+        self.assertEqual(len(self.smtp.messages), 1)
+        self.assertIn("Subject: New enquiry", self.smtp.messages[0])
+        self.assertIn("Ada", self.smtp.messages[0])
+        self.assertIsNotNone(QueuedFormEmail.objects.get().sent_at)
+
+    def test_waiting_emails_are_sent_as_digest(self):
+        for name in ("Ada", "Grace", "Alan"):
+            self.submit(name)
+
+        send_form_emails.call()
+
+        self.assertEqual(len(self.smtp.messages), 1)
+        self.assertIn("New enquiry (3 submissions)", self.smtp.messages[0])
+        for name in ("Ada", "Grace", "Alan"):
+            self.assertIn(name, self.smtp.messages[0])
+
+    def test_failed_send_is_retried(self):
+        self.submit("Ada")
+        self.smtp.fail = True
+
+        with self.assertLogs("base.tasks", "WARNING"):
+            send_form_emails.call()
+
+        email = QueuedFormEmail.objects.get()
+        self.assertEqual((email.attempts, email.sent_at), (1, None))
+        self.assertGreater(email.next_attempt_at, timezone.now())
+
+        # Not due yet
+        self.smtp.fail = False
+        send_form_emails.call()
+        self.assertEqual(self.smtp.messages, [])
+
+        QueuedFormEmail.objects.update(next_attempt_at=timezone.now())
+        send_form_emails.call()
+        self.assertEqual(len(self.smtp.messages), 1)
+
+    def test_gives_up_after_max_attempts(self):
+        self.submit("Ada")
+        self.smtp.fail = True
+
+        with self.settings(FORM_EMAIL_MAX_ATTEMPTS=1), self.assertLogs("base.tasks", "WARNING"):
+            send_form_emails.call()
+
+        email = QueuedFormEmail.objects.get()
+        self.assertIsNone(email.next_attempt_at)
+        self.assertIn("Try again later", email.last_error)
+
+
+class FormSubmissionExportTests(WagtailPageTestCase):
+    """
+    Tests for streaming exports of form submissions.
+    """
+
+    def setUp(self):
+        self.page = FormPage(title="Contact", slug="contact")
+        HomePage.objects.get(slug="home").add_child(instance=self.page)
+        FormField.objects.create(page=self.page, label="Name", field_type="singleline")
+
+        submission_class = self.page.get_submission_class()
+        submissions = submission_class.objects.bulk_create(
+            submission_class(page=self.page, form_data={"name": f"Person {i}"}) for i in range(30)
+        )
+        # Ten a day for three days
+        start = timezone.now() - timedelta(days=3)
+        for i, submission in enumerate(submissions):
+            submission.submit_time = start + timedelta(days=i // 10)
+        submission_class.objects.bulk_update(submissions, ["submit_time"])
+        self.start = start
+
+        self.login()
+        self.url = reverse("wagtailforms:list_submissions", args=[self.page.pk])
+
+    def test_listing(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Person 29")
+
+    def test_csv_export_is_streamed(self):
+        with mock.patch("base.views.EXPORT_CHUNK_SIZE", 7):
+            response = self.client.get(self.url, {"export": "csv"})
+            rows = b"".join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(rows[0], "Submission date,Name")
+        self.assertEqual(len(rows), 31)
+        self.assertTrue(rows[1].endswith(",Person 0"))
+
+    def test_export_date_range(self):
+        day = (self.start + timedelta(days=1)).date().isoformat()
+        response = self.client.get(self.url, {"export": "csv", "date_from": day, "date_to": day})
+        rows = b"".join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual([row.split(",")[1] for row in rows[1:]], [f"Person {i}" for i in range(10, 20)])
+
+    def test_xlsx_export(self):
+        response = self.client.get(self.url, {"export": "xlsx"})
+        workbook = load_workbook(BytesIO(b"".join(response.streaming_content)))
+
+        rows = list(workbook.active.values)
+        self.assertEqual(len(rows), 31)
+        self.assertEqual(rows[1][1], "Person 0")
+
+
+class FormAnalyticsTests(WagtailPageTestCase):
+    """
+    Tests for the running form submission counts.
+    """
+
+    def setUp(self):
+        self.page = FormPage(title="Survey", slug="survey")
+        HomePage.objects.get(slug="home").add_child(instance=self.page)
+        FormField.objects.create(page=self.page, label="Name", field_type="singleline")
+        FormField.objects.create(page=self.page, label="Colour", field_type="radio", choices="Red,Blue")
+        FormField.objects.create(page=self.page, label="Pets", field_type="checkboxes", choices="Cat,Dog", required=False)
+
+    def submit(self, **data):
+        response = self.client.post(self.page.url, data)
+        self.assertEqual(response.status_code, 200)
+
+    def submit_all(self):
+        self.submit(name="Ada", colour="Red", pets=["Cat", "Dog"])
+        self.submit(name="Grace", colour="Red", pets=["Cat"])
+        self.submit(name="Alan", colour="Blue")
+
+    def test_counts_follow_submissions(self):
+        self.submit_all()
+
+        with self.assertNumQueries(2):
+            analytics = get_form_analytics(self.page)
+
+        self.assertEqual(analytics["total"], 3)
+        self.assertEqual(analytics["daily"], [{"date": timezone.localdate(), "count": 3}])
+        self.assertEqual(analytics["fields"], {"colour": {"Red": 2, "Blue": 1}, "pets": {"Cat": 2, "Dog": 1}})
+
+    def test_deleted_submission_is_uncounted(self):
+        self.submit_all()
+
+        self.page.get_submission_class().objects.filter(form_data__name="Ada").delete()
+
+        analytics = get_form_analytics(self.page)
+        self.assertEqual(analytics["total"], 2)
+        self.assertEqual(analytics["fields"]["pets"], {"Cat": 1})
+
+    def test_rebuild(self):
+        self.submit_all()
+        expected = get_form_analytics(self.page)
+        FormAnswerCount.objects.all().delete()
+
+        call_command("rebuild_form_analytics", stdout=StringIO())
+
+        self.assertEqual(get_form_analytics(self.page), expected)
+
+    def test_endpoint(self):
+        self.submit_all()
+        url = reverse("form_analytics", args=[self.page.pk])
+
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.login()
+        response = self.client.get(url)
+        self.assertEqual(response.json()["fields"]["colour"], {"Red": 2, "Blue": 1})
+
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        self.assertEqual(self.client.get(url, {"start": tomorrow}).json()["total"], 0)
+        self.assertEqual(self.client.get(url, {"start": "2024-13-01"}).status_code, 400)
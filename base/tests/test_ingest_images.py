@@ -0,0 +1,96 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from PIL import Image as PILImage
+
+from wagtail.images import get_image_model
+
+from base import page_cache
+from base.management.commands import ingest_images
+from base.management.commands.ingest_images import RENDITIONS, TEAM_PHOTO_RENDITIONS
+from base.testing import PerformanceTestCase
+from mysite.cache import namespace
+from team.models import TeamMember
+
+
+class IngestImagesTests(PerformanceTestCase):
+    """
+    Tests for the image ingest command.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.write_image("harbour.png", (0, 0, 255))
+        self.write_image("same-as-harbour.png", (0, 0, 255))
+        self.write_image("events/launch.png", (0, 255, 0))
+        self.write_image("team/jane-doe.png", (255, 0, 0))
+        self.write_image("team-nobody.png", (255, 255, 0))
+        with open(os.path.join(self.directory, "broken.png"), "wb") as f:
+            f.write(b"not an image")
+        with open(os.path.join(self.directory, "notes.txt"), "w") as f:
+            f.write("Not an image either")
+        self.member = TeamMember.objects.create(name="Jane Doe", job_title="Editor")
+
+    def write_image(self, name, colour):
+        path = os.path.join(self.directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        PILImage.new("RGB", (64, 48), colour).save(path, "PNG")
+
+    def ingest_images(self, **options):
+        stderr = StringIO()
+        # Renditions are generated by tasks enqueued on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("ingest_images", self.directory, workers=2, stdout=StringIO(), stderr=stderr, **options)
+        return stderr.getvalue()
+
+    def test_ingest(self):
+        stderr = self.ingest_images()
+
+        Image = get_image_model()
+        self.assertEqual(
+            sorted(Image.objects.values_list("title", flat=True)), ["harbour", "jane-doe", "launch", "team-nobody"],
+        )
+        self.assertIn("broken.png", stderr)
+        self.assertIn("team-nobody.png", stderr)
+        harbour = Image.objects.get(title="harbour")
+        self.assertEqual((harbour.width, harbour.height), (64, 48))
+        self.assertEqual(len(harbour.file_hash), 40)
+        self.assertEqual(
+            sorted(harbour.renditions.values_list("filter_spec", flat=True)), sorted(RENDITIONS),
+        )
+
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.photo.title, "jane-doe")
+        self.assertEqual(
+            sorted(self.member.photo.renditions.values_list("filter_spec", flat=True)), sorted(TEAM_PHOTO_RENDITIONS),
+        )
+
+        # Already uploaded files are skipped
+        self.ingest_images(no_renditions=True)
+        self.assertEqual(Image.objects.count(), 4)
+
+    def test_created_images_invalidate_caches(self):
+        Image = get_image_model()
+        generation = namespace("pages_api").get_generation()
+        version = page_cache.get_versions([page_cache.model_key(Image)])
+
+        self.ingest_images(no_renditions=True)
+
+        self.assertNotEqual(namespace("pages_api").get_generation(), generation)
+        self.assertNotEqual(page_cache.get_versions([page_cache.model_key(Image)]), version)
+
+    def test_spawned_workers(self):
+        # As on macOS and Windows, where workers don't inherit the loaded apps
+        spawn = multiprocessing.get_context("spawn")
+        with mock.patch.object(ingest_images, "ProcessPoolExecutor", partial(ProcessPoolExecutor, mp_context=spawn)):
+            self.ingest_images(no_renditions=True)
+
+        self.assertEqual(get_image_model().objects.count(), 4)
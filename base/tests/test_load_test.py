@@ -0,0 +1,117 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import LiveServerTestCase, override_settings
+from django.utils import timezone
+
+from wagtail.models import Locale, Page, Site
+
+from base.load import run_load, summarise
+from base.management.commands import load_test
+from base.management.commands.load_test import DEFAULT_WEIGHTS
+from base.models import FormField, FormPage
+from blog.models import BlogIndexPage, BlogPage, BlogTagIndexPage
+from home.models import HomePage
+
+
+@override_settings(QUERY_BUDGETS={})
+class LoadTestTests(LiveServerTestCase):
+    """
+    Tests for the load test command, against a live server.
+    """
+
+    def setUp(self):
+        home = self.get_home()
+        blog = home.add_child(instance=BlogIndexPage(title="Blog", slug="blog"))
+        post = BlogPage(title="Post", slug="post", date=timezone.localdate(), intro="Hello")
+        post.tags.add("news")
+        blog.add_child(instance=post)
+        home.add_child(instance=BlogTagIndexPage(title="Tags", slug="tags"))
+        self.form = home.add_child(instance=FormPage(title="Contact", slug="contact"))
+        FormField.objects.create(page=self.form, label="Email", field_type="email")
+        FormField.objects.create(page=self.form, label="Topic", field_type="dropdown", choices="Sales,Support")
+
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir)
+        self.output = os.path.join(output_dir, "results.json")
+
+    def get_home(self):
+        # The database is flushed after each test, taking the pages made by migrations
+        home = HomePage.objects.filter(slug="home").first()
+        if home is None:
+            locale, _ = Locale.objects.get_or_create(language_code="en")
+            home = Page.add_root(title="Root", slug="root", locale=locale).add_child(
+                instance=HomePage(title="Home", slug="home", locale=locale)
+            )
+            Site.objects.create(hostname="localhost", root_page=home, is_default_site=True)
+        return home
+
+    def load_test(self, **options):
+        # The live server shares the in-memory test database, so one client
+        call_command(
+            "load_test", url=self.live_server_url, duration=1, concurrency=1, output=self.output,
+            stdout=StringIO(), stderr=StringIO(), **options,
+        )
+        with open(self.output) as f:
+            return json.load(f)
+
+    def test_request_mix(self):
+        results = self.load_test()
+
+        self.assertEqual(set(results["routes"]), set(DEFAULT_WEIGHTS))
+        self.assertEqual(results["total"]["errors"], 0)
+        self.assertGreater(results["routes"]["blog_post"]["requests"], 0)
+        self.assertGreater(self.form.get_submission_class().objects.count(), 0)
+
+        baseline = self.output + ".baseline"
+        os.rename(self.output, baseline)
+        stdout = StringIO()
+        call_command(
+            "load_test", url=self.live_server_url, duration=0.5, concurrency=1, weight=["form_post=0"],
+            compare=baseline, stdout=stdout, stderr=StringIO(),
+        )
+        self.assertIn("req/s was", stdout.getvalue())
+        self.assertNotIn("form_post", stdout.getvalue())
+
+    def test_seed_picks_urls(self):
+        blog = BlogIndexPage.objects.get()
+        blog.add_child(instance=BlogPage(title="Other post", slug="other-post", date=timezone.localdate(), intro="Hello"))
+        command = load_test.Command(stderr=StringIO())
+
+        with mock.patch.object(load_test, "SAMPLE_SIZE", 1):
+            picked = [command.get_targets({"blog_post": 1}, seed)["blog_post"] for seed in [*range(10), 0]]
+
+        self.assertEqual(len({tuple(targets) for targets in picked}), 2)
+        self.assertEqual(picked[0], picked[-1])
+
+    def test_run_load(self):
+        def get_requests(number):
+            while True:
+                yield "ok", lambda: 1.0
+                yield "failing", mock.Mock(side_effect=OSError)
+
+        elapsed, routes = run_load(2, 0.05, get_requests)
+
+        self.assertGreaterEqual(elapsed, 0.05)
+        self.assertEqual(set(routes), {"ok", "failing"})
+        self.assertEqual(routes["failing"][0], [])
+        self.assertGreater(routes["failing"][1], 0)
+        self.assertEqual(set(routes["ok"][0]), {1.0})
+        self.assertEqual(summarise([3, 1, 2], 0, 1)["p50"], 2)
+
+    def test_replay(self):
+        log = os.path.join(os.path.dirname(self.output), "access.log")
+        with open(log, "w") as f:
+            f.write('127.0.0.1 - - [01/Jan/2025:00:00:00 +0000] "GET /blog/post/ HTTP/1.1" 200 1234\n')
+            f.write('127.0.0.1 - - [01/Jan/2025:00:00:01 +0000] "POST /contact/ HTTP/1.1" 200 1234\n')
+            f.write("/api/team/stats/\n")
+
+        results = self.load_test(replay=log)
+
+        self.assertEqual(set(results["routes"]), {"page:blog.BlogPage", "team-stats"})
+        self.assertEqual(results["total"]["errors"], 0)
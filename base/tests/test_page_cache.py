@@ -0,0 +1,173 @@
+from django.test import override_settings
+
+from wagtail.test.utils import WagtailPageTestCase
+
+from base import page_cache
+from base.models import FooterText, FormField, FormPage, NavigationSettings
+from base.testing import clear_caches
+from base.tests.servers import LocalPurgeProxy
+from home.models import HomePage
+from pages.models import StandardPage
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class PageCacheTests(WagtailPageTestCase):
+    """
+    Tests for the whole-page cache and surrogate key purging.
+    """
+
+    def setUp(self):
+        clear_caches()
+        self.home = HomePage.objects.get(slug="home")
+        self.page = StandardPage(title="About", slug="about", body="<p>Hello</p>")
+        self.home.add_child(instance=self.page)
+        self.url = self.page.url
+
+    def test_anonymous_page_is_cached(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Page-Cache"], "miss")
+        self.assertIn(page_cache.object_key(self.page), response["Surrogate-Key"])
+
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Page-Cache"], "hit")
+        self.assertContains(response, "Hello")
+
+    def test_authenticated_page_is_not_cached(self):
+        self.login()
+        response = self.client.get(self.url)
+        self.assertNotIn("X-Page-Cache", response)
+
+    def test_publish_purges_page(self):
+        self.client.get(self.url)
+
+        self.page.body = "<p>Updated</p>"
+        self.page.save_revision().publish()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Page-Cache"], "miss")
+        self.assertContains(response, "Updated")
+
+    def test_publishing_sibling_purges_navigation(self):
+        self.client.get(self.url)
+
+        sibling = StandardPage(title="Services", slug="services", show_in_menus=True)
+        self.home.add_child(instance=sibling)
+        sibling.save_revision().publish()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Page-Cache"], "miss")
+        self.assertContains(response, "Services")
+
+    def test_move_purges_page_descendants_and_listings(self):
+        child = StandardPage(title="Team", slug="team")
+        self.page.add_child(instance=child)
+        company = StandardPage(title="Company", slug="company")
+        self.home.add_child(instance=company)
+        urls = [self.url, child.url, company.url]
+        for url in urls:
+            self.client.get(url)
+
+        self.page.move(company, pos="last-child")
+
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertNotEqual(self.client.get(url).get("X-Page-Cache"), "hit")
+        self.assertEqual(self.client.get("/company/about/team/").status_code, 200)
+
+    def test_footer_change_purges_all_pages(self):
+        self.client.get(self.url)
+
+        footer = FooterText.objects.create(body="<p>Footer</p>")
+        footer.save_revision().publish()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Page-Cache"], "miss")
+
+    def test_purge_is_forwarded_to_proxy(self):
+        with LocalPurgeProxy() as proxy:
+            with self.settings(PAGE_CACHE_PURGE_URLS=[proxy.url]):
+                with self.captureOnCommitCallbacks() as callbacks:
+                    page_cache.purge(page_cache.object_key(self.page))
+                # Sent by a task once the transaction commits
+                self.assertEqual(proxy.purged, [])
+                for callback in callbacks:
+                    callback()
+
+        self.assertEqual(proxy.purged, [[page_cache.object_key(self.page)]])
+
+
+@override_settings(PAGE_CONDITIONAL_GET_ENABLED=True)
+class ConditionalGetTests(WagtailPageTestCase):
+    """
+    Tests for answering conditional requests for pages with 304 Not Modified.
+    """
+
+    def setUp(self):
+        clear_caches()
+        self.home = HomePage.objects.get(slug="home")
+        self.page = StandardPage(title="About", slug="about", body="<p>Hello</p>")
+        self.home.add_child(instance=self.page)
+        self.page.save_revision().publish()
+        self.url = self.page.url
+        # Created on first use, which would otherwise change the first ETag
+        NavigationSettings.load()
+
+    def test_page_has_validators(self):
+        response = self.client.get(self.url)
+
+        self.assertTrue(response["ETag"].startswith('W/"'))
+        self.assertIn("Last-Modified", response)
+        self.assertIn("no-cache", response["Cache-Control"])
+
+    def test_unchanged_page_is_not_rendered(self):
+        response = self.client.get(self.url)
+
+        for headers in ({"If-None-Match": response["ETag"]}, {"If-Modified-Since": response["Last-Modified"]}):
+            with self.subTest(headers=headers):
+                revalidated = self.client.get(self.url, headers=headers)
+                self.assertEqual(revalidated.status_code, 304)
+                self.assertEqual(revalidated.templates, [])
+                self.assertEqual(revalidated["ETag"], response["ETag"])
+
+    def test_publish_changes_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        self.page.body = "<p>Updated</p>"
+        self.page.save_revision().publish()
+
+        response = self.client.get(self.url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Updated")
+
+    def test_footer_change_changes_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        FooterText.objects.create(body="<p>Footer</p>").save_revision().publish()
+
+        response = self.client.get(self.url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_form_page_has_no_validators(self):
+        form = self.home.add_child(instance=FormPage(title="Contact", slug="contact"))
+        FormField.objects.create(page=form, label="Email", field_type="email")
+
+        response = self.client.get(form.url)
+        self.assertNotIn("ETag", response)
+        # Always rendered, with a fresh CSRF token
+        response = self.client.get(form.url, headers={"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "csrfmiddlewaretoken")
+
+    def test_authenticated_page_has_no_validators(self):
+        self.login()
+        response = self.client.get(self.url)
+        self.assertNotIn("ETag", response)
+
+    @override_settings(PAGE_CACHE_ENABLED=True)
+    def test_cached_page_is_revalidated(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        response = self.client.get(self.url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["X-Page-Cache"], "hit")
@@ -0,0 +1,26 @@
+from base.models import FormField, FormPage
+from base.testing import PerformanceTestCase
+
+
+class BaseQueryBudgetTests(PerformanceTestCase):
+    """
+    Query budgets for the home page, form pages and search.
+    """
+
+    content = ("images",)
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.home.image = cls.images[0]
+        cls.home.save()
+        cls.form = FormPage(title="Contact us", slug="contact-us", to_address="team@example.com")
+        cls.home.add_child(instance=cls.form)
+        for n in range(cls.volumes["faq_items"]):
+            FormField.objects.create(page=cls.form, label=f"Question {n}", field_type="singleline")
+
+    def test_page_types(self):
+        self.assertQueryBudgets([(self.home.url, {}), (self.form.url, {})])
+
+    def test_search(self):
+        self.assertQueryBudget("/search/", data={"query": "contact"})
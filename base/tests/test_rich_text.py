@@ -0,0 +1,46 @@
+from wagtail.test.utils import WagtailPageTestCase
+
+from base.rich_text import expand_db_html, expand_db_html_many
+from base.testing import clear_caches
+from home.models import HomePage
+from pages.models import StandardPage
+
+
+class RichTextCacheTests(WagtailPageTestCase):
+    """
+    Tests for cached rich text expansion.
+    """
+
+    def setUp(self):
+        clear_caches()
+        home = HomePage.objects.get(slug="home")
+        self.page = StandardPage(title="About", slug="about")
+        home.add_child(instance=self.page)
+        self.html = '<p><a linktype="page" id="%d">About us</a></p>' % self.page.pk
+
+    def test_expansion_is_cached(self):
+        self.assertIn('href="/about/"', expand_db_html(self.html))
+
+        with self.assertNumQueries(0):
+            self.assertIn('href="/about/"', expand_db_html(self.html))
+
+    def test_publish_invalidates_expansion(self):
+        expand_db_html(self.html)
+
+        self.page.slug = "about-us"
+        self.page.save_revision().publish()
+
+        self.assertIn('href="/about-us/"', expand_db_html(self.html))
+
+    def test_expand_many_resolves_links_in_one_pass(self):
+        links = ['<p><a linktype="page" id="%d">Link %d</a></p>' % (self.page.pk, i) for i in range(100)]
+        fields = ["".join(links[:50]), "".join(links[50:]), "", self.html]
+
+        # Pages in bulk (base and specific rows) plus the site root paths,
+        # however many links there are
+        with self.assertNumQueries(3):
+            expanded = expand_db_html_many(fields)
+
+        self.assertEqual(expanded[2], "")
+        self.assertEqual(sum(html.count('href="/about/"') for html in expanded), 101)
+        self.assertEqual(expanded[3], expand_db_html(self.html))
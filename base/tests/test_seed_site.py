@@ -0,0 +1,79 @@
+import subprocess
+import sys
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from wagtail.models import Page, ReferenceIndex
+
+from base.analytics import get_form_analytics
+from base.models import FormPage
+from base.testing import PerformanceTestCase
+from blog.models import Author, BlogIndexPage, BlogPage
+from pages.models import FlexiblePage
+from team.models import TeamMember
+
+
+class SeedSiteTests(PerformanceTestCase):
+    """
+    Tests for the bulk seeding command.
+    """
+
+    def seed_site(self, **options):
+        options = {
+            "posts": 30, "blogs": 2, "authors": 3, "tags": 5, "images": 3, "departments": 2, "members": 10,
+            "flexible_pages": 3, "blocks": 16, "submissions": 20, **options,
+        }
+        call_command("seed_site", stdout=StringIO(), **options)
+
+    def test_seeded_tree(self):
+        self.seed_site()
+
+        self.assertEqual(Page.find_problems(), ([], [], [], [], []))
+        self.assertEqual(BlogPage.objects.live().count(), 30)
+        self.assertEqual(FlexiblePage.objects.live().count(), 3)
+        blog = BlogIndexPage.objects.get(slug="seed-blog-1-0")
+        self.assertEqual(blog.get_children().count(), 15)
+        post = BlogPage.objects.child_of(blog).first()
+        self.assertEqual(post.url, f"/seed-blog-1-0/{post.slug}/")
+        self.assertTrue(post.tags.exists())
+        self.assertTrue(post.authors.exists())
+        self.assertTrue(post.gallery_images.exists())
+        self.assertEqual(TeamMember.objects.filter(social_links__isnull=False).distinct().count(), 10)
+        form = FormPage.objects.get(slug="seed-form-0")
+        self.assertEqual(get_form_analytics(form)["total"], 20)
+
+        for page in (blog, post, FlexiblePage.objects.first(), form):
+            with self.subTest(page=page.title):
+                self.assertQueryBudget(page.url)
+
+    def test_references_are_indexed(self):
+        self.seed_site()
+
+        for model in (BlogPage, FlexiblePage, TeamMember, Author):
+            with self.subTest(model=model.__name__):
+                self.assertTrue(ReferenceIndex.get_references_for_object(model.objects.first()).exists())
+
+    def test_seed_is_reproducible(self):
+        self.seed_site(seed=1)
+        with self.assertRaises(CommandError):
+            self.seed_site(seed=1)
+        titles = list(BlogPage.objects.order_by("slug").values_list("title", flat=True))
+
+        BlogPage.objects.all().delete()
+        Page.objects.filter(slug__endswith="-1", depth=3).delete()
+        self.seed_site(seed=1)
+        self.assertEqual(list(BlogPage.objects.order_by("slug").values_list("title", flat=True)), titles)
+
+    def test_runs_without_test_helpers(self):
+        script = (
+            "import django, sys; django.setup(); import base.management.commands.seed_site; "
+            "print(sorted(m for m in sys.modules if m.startswith(('wagtail.test', 'base.testing'))))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+        )
+
+        self.assertEqual(output.stdout.strip(), "[]")
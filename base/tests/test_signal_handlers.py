@@ -0,0 +1,49 @@
+from base.templatetags import navigation_tags
+from base.testing import PerformanceTestCase, clear_caches, make_images
+from blog.models import Author
+from mysite.cache import namespace
+from pages.models import StandardPage
+from team.models import Department, TeamMember
+
+
+class CacheNamespaceTests(PerformanceTestCase):
+    """
+    Tests for data cached in namespaces and invalidated when content changes.
+    """
+
+    def setUp(self):
+        clear_caches()
+        self.page = StandardPage(title="About", slug="about", show_in_menus=True)
+        self.home.add_child(instance=self.page)
+
+    def test_menu_is_cached_until_publish(self):
+        request = self.client.get(self.page.url).wsgi_request
+        with self.assertNumQueries(0):
+            menu = navigation_tags.get_menu({"request": request})
+        self.assertEqual([item["title"] for item in menu["items"]], ["About"])
+
+        services = StandardPage(title="Services", slug="services", show_in_menus=True)
+        self.home.add_child(instance=services)
+        services.save_revision().publish()
+
+        self.assertContains(self.client.get(self.page.url), "Services")
+
+    def test_team_stats_are_cached_until_team_changes(self):
+        self.assertEqual(self.client.get("/api/team/stats/").json()["departments"], 0)
+
+        Department.objects.create(name="Engineering")
+
+        self.assertEqual(self.client.get("/api/team/stats/").json()["departments"], 1)
+
+    def test_pages_api_is_cached_until_serialized_models_change(self):
+        changes = {
+            "author": lambda: Author.objects.create(name="Ada"),
+            "department": lambda: Department.objects.create(name="Engineering"),
+            "team member": lambda: TeamMember.objects.create(name="Ada", job_title="Developer"),
+            "image": lambda: make_images(self.rng, 1),
+        }
+        for name, change in changes.items():
+            with self.subTest(name):
+                generation = namespace("pages_api").get_generation()
+                change()
+                self.assertNotEqual(namespace("pages_api").get_generation(), generation)
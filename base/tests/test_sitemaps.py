@@ -0,0 +1,88 @@
+import gzip
+
+from django.utils import timezone
+
+from wagtail.models import Site
+from wagtail.test.utils import WagtailPageTestCase
+
+from base.testing import clear_caches
+from blog.models import BlogIndexPage, BlogPage
+from home.models import HomePage
+from mysite.cache import namespace
+from pages.models import StandardPage
+
+
+class SitemapTests(WagtailPageTestCase):
+    """
+    Tests for sitemaps built from per-section fragments.
+    """
+
+    def setUp(self):
+        clear_caches()
+        self.home = HomePage.objects.get(slug="home")
+        self.blog = BlogIndexPage(title="Blog", slug="blog")
+        self.home.add_child(instance=self.blog)
+        self.about = StandardPage(title="About", slug="about")
+        self.home.add_child(instance=self.about)
+        self.add_post("First post")
+
+    def add_post(self, title):
+        post = BlogPage(title=title, slug=title.lower().replace(" ", "-"), date=timezone.now().date(), intro=title)
+        self.blog.add_child(instance=post)
+        post.save_revision().publish()
+        return post
+
+    def test_index_lists_sections(self):
+        response = self.client.get("/sitemap.xml")
+
+        for section in ("home", "blog", "about"):
+            self.assertContains(response, f"/sitemap-{section}.xml")
+
+    def test_section_lists_its_pages(self):
+        response = self.client.get("/sitemap-blog.xml")
+
+        self.assertContains(response, "/blog/first-post/")
+        self.assertNotContains(response, "/about/")
+
+    def test_publish_rebuilds_only_its_section(self):
+        self.client.get("/sitemap-blog.xml")
+        self.client.get("/sitemap-about.xml")
+
+        self.add_post("Second post")
+
+        fragments = namespace("sitemaps")
+        site = Site.objects.get(is_default_site=True)
+        self.assertIsNotNone(fragments.get(f"{site.pk}:{self.about.path}"))
+        self.assertIsNone(fragments.get(f"{site.pk}:{self.blog.path}"))
+        self.assertContains(self.client.get("/sitemap-blog.xml"), "/blog/second-post/")
+
+    def test_large_sections_are_split(self):
+        self.add_post("Second post")
+
+        with self.settings(SITEMAP_LIMIT=1):
+            response = self.client.get("/sitemap.xml")
+
+        self.assertContains(response, "/sitemap-blog.xml?p=3")
+
+    def test_gzipped(self):
+        # Large enough to still shrink after gzip_page's random padding
+        for i in range(10):
+            self.add_post(f"Post {i}")
+
+        response = self.client.get("/sitemap-blog.xml", headers={"Accept-Encoding": "gzip"})
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn(b"/blog/first-post/", gzip.decompress(response.content))
+
+    def test_blog_feed(self):
+        post = self.add_post("Second post")
+
+        for url in ("/blog/feed/", "/blog/feed/atom/"):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, "Second post")
+                self.assertContains(response, "First post")
+
+        post.unpublish()
+
+        self.assertNotContains(self.client.get("/blog/feed/"), "Second post")
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.urls import path
+from django.utils.cache import get_conditional_response
+
+from wagtail import hooks
+from wagtail.contrib.forms.models import FormMixin
+
+from base import page_cache, views
+from base.embeds import StoredMediaEmbedHandler
+from base.rich_text import PrefetchingImageEmbedHandler
+
+
+def conditional_get_enabled():
+    return getattr(settings, "PAGE_CONDITIONAL_GET_ENABLED", False)
+
+
+@hooks.register("before_serve_page")
+def tag_page_for_cache(page, request, serve_args, serve_kwargs):
+    """Attach surrogate keys to requests for pages that may be cached"""
+    if not (getattr(settings, "PAGE_CACHE_ENABLED", False) or conditional_get_enabled()):
+        return
+    if request.user.is_authenticated or page.get_view_restrictions().exists():
+        return
+    request.page_cache_keys = page_cache.get_page_surrogate_keys(page, request)
+
+
+@hooks.register("before_serve_page")
+def answer_conditional_request(page, request, serve_args, serve_kwargs):
+    """Reply 304 Not Modified, before rendering, if the visitor's copy is current"""
+    keys = getattr(request, "page_cache_keys", None)
+    if not keys or not conditional_get_enabled() or request.method not in ("GET", "HEAD"):
+        return
+    # Form pages render a CSRF token, so a copy kept by the visitor could
+    # replay a stale one
+    if isinstance(page, FormMixin):
+        return
+    etag, last_modified = page_cache.get_page_validators(page, keys)
+    request.page_validators = (etag, last_modified)
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+@hooks.register("register_rich_text_features", order=100)
+def register_rich_text_embed_handlers(features):
+    # Runs after wagtail.images and wagtail.embeds register the default handlers
+    features.register_embed_type(PrefetchingImageEmbedHandler)
+    features.register_embed_type(StoredMediaEmbedHandler)
+
+
+@hooks.register("register_admin_urls")
+def register_form_analytics_url():
+    return [
+        path("form-analytics/<int:page_id>/", views.form_analytics, name="form_analytics"),
+    ]
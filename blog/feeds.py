@@ -0,0 +1,82 @@
+"""
+RSS and Atom feeds of the posts under a BlogIndexPage.
+
+The latest posts are kept as a fragment in the "feeds" cache namespace,
+one per index, and only rebuilt after a post under that index is
+published, unpublished, moved or deleted.
+"""
+
+from django.contrib.syndication.views import Feed
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.html import strip_tags
+
+from mysite.cache import namespace
+
+FEED_NAMESPACE = "feeds"
+FEED_LENGTH = 20
+
+
+def get_feed_items(index, request):
+    """Return the latest live posts under index as a list of dicts"""
+
+    def build():
+        from blog.models import BlogPage
+
+        posts = BlogPage.objects.child_of(index).live().public().order_by('-first_published_at')
+        return [
+            {
+                'title': post.title,
+                'location': post.get_url(request),
+                'description': post.intro,
+                'pubdate': post.first_published_at,
+                'updateddate': post.last_published_at,
+            }
+            for post in posts[:FEED_LENGTH]
+        ]
+
+    return namespace(FEED_NAMESPACE).get_or_set(f'index:{index.pk}', build)
+
+
+def invalidate_index(index):
+    """Drop the cached posts of a BlogIndexPage"""
+    namespace(FEED_NAMESPACE).delete(f'index:{index.pk}')
+
+
+class BlogFeed(Feed):
+    def get_object(self, request, index):
+        self.request = request
+        return index
+
+    def title(self, index):
+        return index.title
+
+    def link(self, index):
+        return index.get_url(self.request)
+
+    def description(self, index):
+        return strip_tags(index.intro)
+
+    def items(self, index):
+        return get_feed_items(index, self.request)
+
+    def item_title(self, item):
+        return item['title']
+
+    def item_link(self, item):
+        return item['location']
+
+    def item_description(self, item):
+        return item['description']
+
+    def item_pubdate(self, item):
+        return item['pubdate']
+
+    def item_updateddate(self, item):
+        return item['updateddate']
+
+
+class BlogAtomFeed(BlogFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, index):
+        return self.description(index)
@@ -0,0 +1,282 @@
+import importlib.util
+import json
+import os
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.text import slugify
+from taggit.models import Tag
+
+from wagtail.images import get_image_model
+from wagtail.models import Page
+from wagtail.search.backends import get_search_backends
+
+from base import page_cache
+from base.bulk import BATCH_SIZE, PathAllocator, batched, create_revisions, insert_pages, update_references
+from base.signal_handlers import invalidate_page_namespaces, rebuild_page_fragments
+from blog.models import Author, BlogIndexPage, BlogPage, BlogPageGalleryImage, BlogPageTag
+
+INTRO_LENGTH = BlogPage._meta.get_field('intro').max_length
+
+
+def read_json_lines(path, start):
+    """Yield (position, record) for each line of a JSON Lines file from position on"""
+    with open(path) as f:
+        for position, line in enumerate(f):
+            if position < start or not line.strip():
+                continue
+            try:
+                yield position, json.loads(line)
+            except ValueError as e:
+                raise CommandError(f'{path}, line {position + 1}: {e}')
+
+
+def read_markdown_files(path, start):
+    """Yield (position, record) for each Markdown file in a directory, in name order, from position on"""
+    if importlib.util.find_spec('markdown') is None:
+        raise CommandError('Importing Markdown needs the markdown package')
+    import markdown
+
+    names = sorted(name for name in os.listdir(path) if name.endswith('.md'))
+    for position, name in enumerate(names):
+        if position < start:
+            continue
+        with open(os.path.join(path, name)) as f:
+            record, text = parse_front_matter(f.read())
+        record.setdefault('slug', name[:-3])
+        record['body'] = markdown.markdown(text)
+        yield position, record
+
+
+def parse_front_matter(text):
+    """
+    Split "key: value" lines between --- lines from the rest of a Markdown
+    file. Values in [brackets] are comma-separated lists.
+    """
+    record = {}
+    if not text.startswith('---\n'):
+        return record, text
+    header, _, text = text[4:].partition('\n---\n')
+    for line in header.splitlines():
+        key, _, value = line.partition(':')
+        value = value.strip()
+        if value.startswith('[') and value.endswith(']'):
+            value = [item.strip() for item in value[1:-1].split(',') if item.strip()]
+        record[key.strip()] = value
+    return record, text
+
+
+def as_list(value):
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(',') if item.strip()]
+    return list(value or [])
+
+
+def parse_post(record, position):
+    """
+    Normalise an archived post: {"title", "slug", "date", "published_at",
+    "intro", "body", "tags": [name], "authors": [name], "gallery": [{"image":
+    image title, "caption"}]}. Only the title is required; without a slug,
+    or one slugify leaves nothing of, the slug is post-<position>.
+    """
+    if not isinstance(record, dict) or not record.get('title'):
+        raise ValueError('no title')
+    published_at = record.get('published_at')
+    published_at = parse_datetime(published_at) if isinstance(published_at, str) else None
+    post_date = parse_date(record['date']) if record.get('date') else None
+    post_date = post_date or (published_at.date() if published_at else timezone.localdate())
+    if published_at is None:
+        published_at = datetime.combine(post_date, time())
+    if timezone.is_naive(published_at):
+        published_at = timezone.make_aware(published_at)
+
+    gallery = []
+    for item in as_list(record.get('gallery') or record.get('images')):
+        item = item if isinstance(item, dict) else {'image': item}
+        gallery.append({'image': item['image'], 'caption': item.get('caption', '')[:250]})
+
+    return {
+        'title': record['title'][:255],
+        'slug': slugify(record.get('slug') or record['title'], allow_unicode=True)[:255] or f'post-{position}',
+        'date': post_date,
+        'published_at': published_at,
+        'intro': (record.get('intro') or '')[:INTRO_LENGTH],
+        'body': record.get('body') or '',
+        'tags': [tag[:100] for tag in as_list(record.get('tags'))],
+        'authors': [author[:255] for author in as_list(record.get('authors'))],
+        'gallery': gallery,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Import blog posts from a JSON Lines file, or a directory of Markdown files with front matter, '
+        'in batches. Resumes from its checkpoint file if interrupted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archive', help='A .jsonl file with a post per line, or a directory of .md files')
+        parser.add_argument('--parent', help='ID or slug of the blog index to import into (default: the first)')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--checkpoint', help='Progress file (default: the archive path + .checkpoint)')
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start from the top')
+
+    def handle(self, *args, **options):
+        archive = options['archive']
+        self.parent = self.get_parent(options['parent'])
+        checkpoint_path = options['checkpoint'] or archive.rstrip('/') + '.checkpoint'
+        checkpoint = {'position': 0, 'imported': 0, 'pending_index': []}
+        if os.path.exists(checkpoint_path) and not options['restart']:
+            with open(checkpoint_path) as f:
+                checkpoint = json.load(f)
+            self.stdout.write(f"Resuming after {checkpoint['position']} posts")
+
+        reader = read_markdown_files if os.path.isdir(archive) else read_json_lines
+        records = reader(archive, checkpoint['position'])
+        self.allocator = PathAllocator(self.parent)
+        self.authors, self.tags, self.images = {}, {}, {}
+
+        while True:
+            batch = [item for _, item in zip(range(options['batch_size']), records)]
+            if not batch:
+                break
+            with transaction.atomic():
+                imported = self.import_batch(batch)
+            checkpoint['position'] = batch[-1][0] + 1
+            checkpoint['imported'] += len(imported)
+            checkpoint['pending_index'] += [page.pk for page in imported]
+            self.save_checkpoint(checkpoint_path, checkpoint)
+            self.stdout.write(f"Imported {checkpoint['imported']} of {checkpoint['position']} posts")
+
+        # Indexed once at the end, including pages from interrupted runs
+        self.update_index(checkpoint['pending_index'])
+        update_references(BlogPage, checkpoint['pending_index'])
+        checkpoint['pending_index'] = []
+        self.save_checkpoint(checkpoint_path, checkpoint)
+
+        invalidate_page_namespaces(BlogPage)
+        page_cache.purge(page_cache.children_key(self.parent.pk), page_cache.model_key(BlogPage))
+        first_post = BlogPage.objects.child_of(self.parent).first()
+        if first_post:
+            rebuild_page_fragments(BlogPage, first_post)
+        self.stdout.write(self.style.SUCCESS(f"Imported {checkpoint['imported']} posts into {self.parent}"))
+
+    def get_parent(self, parent):
+        indexes = BlogIndexPage.objects.all()
+        if parent:
+            indexes = indexes.filter(pk=parent) if parent.isdigit() else indexes.filter(slug=parent)
+        index = indexes.first()
+        if index is None:
+            raise CommandError('No blog index to import into')
+        return index
+
+    def save_checkpoint(self, path, checkpoint):
+        with open(path + '.tmp', 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(path + '.tmp', path)
+
+    def import_batch(self, batch):
+        """Import a batch of (position, record), returning the pages created"""
+        posts = []
+        for position, record in batch:
+            try:
+                posts.append(parse_post(record, position))
+            except (KeyError, TypeError, ValueError) as e:
+                name = isinstance(record, dict) and (record.get('title') or record.get('slug'))
+                self.stderr.write(f"Skipping {name or 'a post'}: {e}")
+
+        # Posts already imported, e.g. before a checkpoint was lost, pages of
+        # any type with the same slug, and posts repeated in the archive
+        existing = set(
+            Page.objects.child_of(self.parent).filter(slug__in=[post['slug'] for post in posts])
+            .values_list('slug', flat=True)
+        )
+        unique = {}
+        for post in posts:
+            if post['slug'] in existing:
+                self.stderr.write(f"Skipping {post['title']}: {self.parent} already has a page with the slug {post['slug']}")
+            elif post['slug'] in unique:
+                self.stderr.write(f"Skipping {post['title']}: another post in the archive has the slug {post['slug']}")
+            else:
+                unique[post['slug']] = post
+        posts = list(unique.values())
+        if not posts:
+            return []
+
+        authors = self.get_authors({name for post in posts for name in post['authors']})
+        tags = self.get_tags({name for post in posts for name in post['tags']})
+        images = self.get_images({item['image'] for post in posts for item in post['gallery']})
+
+        pages, tagged_items, gallery_images, page_authors = [], [], [], []
+        for post in posts:
+            page = self.allocator.allocate(BlogPage(
+                title=post['title'], slug=post['slug'], date=post['date'], intro=post['intro'], body=post['body'],
+                first_published_at=post['published_at'], last_published_at=post['published_at'],
+            ))
+            # Also set on the page in memory, for its revision
+            page.tagged_items = [BlogPageTag(content_object=page, tag=tags[name]) for name in dict.fromkeys(post['tags'])]
+            page.authors = [authors[name] for name in dict.fromkeys(post['authors'])]
+            page.gallery_images = [
+                BlogPageGalleryImage(page=page, image_id=images[item['image']], caption=item['caption'], sort_order=order)
+                for order, item in enumerate(item for item in post['gallery'] if images.get(item['image']))
+            ]
+            pages.append(page)
+            tagged_items += page.tagged_items.all()
+            gallery_images += page.gallery_images.all()
+            page_authors += [(page, author) for author in page.authors.all()]
+
+        insert_pages(pages)
+        BlogPageTag.objects.bulk_create(tagged_items, batch_size=BATCH_SIZE)
+        BlogPageGalleryImage.objects.bulk_create(gallery_images, batch_size=BATCH_SIZE)
+        through = BlogPage.authors.through
+        through.objects.bulk_create(
+            [through(blogpage_id=page.pk, author_id=author.pk) for page, author in page_authors], batch_size=BATCH_SIZE,
+        )
+        # After the children are inserted, so the revisions have their IDs
+        create_revisions(pages)
+        self.allocator.save()
+        return pages
+
+    def get_authors(self, names):
+        """{name: Author}, creating any that don't exist"""
+        missing = names - self.authors.keys()
+        if missing:
+            for author in Author.objects.filter(name__in=missing).order_by('pk'):
+                self.authors.setdefault(author.name, author)
+            new = [Author(name=name) for name in missing - self.authors.keys()]
+            for author in Author.objects.bulk_create(new):
+                self.authors[author.name] = author
+        return self.authors
+
+    def get_tags(self, names):
+        """{name: Tag}, creating any that don't exist"""
+        missing = names - self.tags.keys()
+        if missing:
+            existing = {tag.name: tag for tag in Tag.objects.filter(name__in=missing)}
+            Tag.objects.bulk_create(
+                [Tag(name=name, slug=slugify(name)[:100]) for name in missing - existing.keys()], ignore_conflicts=True,
+            )
+            self.tags.update({tag.name: tag for tag in Tag.objects.filter(name__in=missing)})
+            # Left out for a slug another tag has, which saving one at a time makes unique
+            for name in missing - self.tags.keys():
+                self.tags[name] = Tag.objects.create(name=name)
+        return self.tags
+
+    def get_images(self, titles):
+        """{title: image ID, or None if there's no such image} for gallery images"""
+        missing = titles - self.images.keys()
+        if missing:
+            found = dict(get_image_model().objects.filter(title__in=missing).values_list('title', 'pk'))
+            for title in sorted(missing - found.keys()):
+                self.stderr.write(f'No image titled {title!r}; leaving it out of galleries')
+                self.images[title] = None
+            self.images.update(found)
+        return self.images
+
+    def update_index(self, page_ids):
+        for backend in get_search_backends(with_auto_update=True):
+            for ids in batched(page_ids, BATCH_SIZE):
+                backend.add_bulk(BlogPage, list(BlogPage.objects.filter(pk__in=ids)))
@@ -1,5 +1,7 @@
 from django import forms
 from django.db import models
+from django.db.models import Prefetch
+from django.views.decorators.gzip import gzip_page
 
 from modelcluster.fields import ParentalKey, ParentalManyToManyField
 
@@ -7,34 +9,55 @@ from modelcluster.contrib.taggit import ClusterTaggableManager
 from taggit.models import TaggedItemBase
 
 from wagtail.models import Page, Orderable
+from wagtail.contrib.routable_page.models import RoutablePageMixin, path
 from wagtail.fields import RichTextField
 from wagtail.admin.panels import MultiFieldPanel, FieldPanel
 from wagtail.snippets.models import register_snippet
 
-from slugify import slugify
-
 from wagtail.search import index
 
 from wagtail.api import APIField
 from rest_framework.fields import DateField, CharField
-from wagtail.rich_text import expand_db_html
+
+from base.rich_text import expand_db_html, prefetch_rich_text
 
 class RichTextSerializer(CharField):
     def to_representation(self, instance):
         representation = super().to_representation(instance)
         return expand_db_html(representation)
 
-class BlogIndexPage(Page):
+class BlogIndexPage(RoutablePageMixin, Page):
     intro = RichTextField(blank=True)
     def get_context(self, request):
         # Update context to include only published posts, ordered by reverse-chron
         context = super().get_context(request)
-        blogpages = self.get_children().live().order_by('-first_published_at')
+        blogpages = (
+            BlogPage.objects.child_of(self).live().order_by('-first_published_at')
+            # Each post shows the first image of its gallery, with its renditions
+            .prefetch_related(
+                Prefetch(
+                    'gallery_images',
+                    queryset=BlogPageGalleryImage.objects.select_related('image').prefetch_related('image__renditions'),
+                )
+            )
+        )
+        # Resolve links in every post body with one query per link type
+        prefetch_rich_text(self.intro, *(post.body for post in blogpages))
         context['blogpages'] = blogpages
         return context
 
     content_panels = Page.content_panels + ["intro"]
 
+    @path('feed/')
+    def rss_feed(self, request):
+        from blog.feeds import BlogFeed
+        return gzip_page(BlogFeed())(request, index=self)
+
+    @path('feed/atom/')
+    def atom_feed(self, request):
+        from blog.feeds import BlogAtomFeed
+        return gzip_page(BlogAtomFeed())(request, index=self)
+
 class BlogPageTag(TaggedItemBase):
     content_object = ParentalKey(
         'BlogPage',
@@ -51,6 +74,14 @@ class BlogPage(Page):
 
     tags = ClusterTaggableManager(through=BlogPageTag, blank=True)
 
+    def get_context(self, request, *args, **kwargs):
+        context = super().get_context(request, *args, **kwargs)
+        # One query each for the authors and gallery, images included, and
+        # one for each's renditions
+        context['authors'] = self.authors.select_related('author_image').prefetch_related('author_image__renditions')
+        context['gallery_images'] = self.gallery_images.select_related('image').prefetch_related('image__renditions')
+        return context
+
     # Add the main_image method:
     def main_image(self):
         gallery_item = self.gallery_images.first()
@@ -115,6 +146,9 @@ class Author(models.Model):
     ]
 
 class BlogTagIndexPage(Page):
+    # Lists every BlogPage with the requested tag
+    cache_dependencies = ['blog.BlogPage']
+
     def get_context(self, request):
 
         # Filter by tag
@@ -124,4 +158,9 @@ class BlogTagIndexPage(Page):
         # Update template context
         context = super().get_context(request)
         context['blogpages'] = blogpages
-        return context
\ No newline at end of file
+        return context
+
+    def get_static_site_queries(self):
+        # One baked listing per tag used on a live post
+        tags = BlogPageTag.objects.filter(content_object__live=True)
+        return [{'tag': name} for name in tags.values_list('tag__name', flat=True).distinct()]
\ No newline at end of file
@@ -1,3 +1,159 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import override_settings
+
+from wagtail.models import Page
+
+from base.testing import PerformanceTestCase
+from blog.management.commands.import_blog import Command as ImportBlogCommand
+from blog.models import Author, BlogIndexPage, BlogPage
+from pages.models import StandardPage
+
+
+class BlogQueryBudgetTests(PerformanceTestCase):
+    """
+    Query budgets for the blog's page types, with a realistic number of posts.
+    """
+
+    content = ("blog",)
+
+    def test_blog_index_page(self):
+        response = self.assertQueryBudget(self.blog_index.url)
+        self.assertEqual(len(response.context["blogpages"]), self.volumes["posts"])
+
+    def test_blog_page(self):
+        self.assertQueryBudget(self.blog_index.get_children().last().url)
+
+    def test_blog_tag_index_page(self):
+        response = self.assertQueryBudget(self.tag_index.url, data={"tag": "tag-0"})
+        self.assertTrue(response.context["blogpages"])
+
+    def test_blog_feeds(self):
+        self.assertQueryBudget(self.blog_index.url + "feed/")
+
+
+class ImportBlogTests(PerformanceTestCase):
+    """
+    Tests for the bulk blog importer.
+    """
+
+    content = ("images",)
+
+    def setUp(self):
+        self.index = self.home.add_child(instance=BlogIndexPage(title="Blog", slug="blog"))
+        self.image = self.images[0]
+        Author.objects.create(name="Ada")
+
+        archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, archive_dir)
+        self.archive = os.path.join(archive_dir, "posts.jsonl")
+        self.write_archive([
+            {
+                "title": f"Post {n}", "date": "2020-01-02", "intro": "Hello", "body": "<p>Body</p>",
+                "tags": ["news", f"tag-{n}"], "authors": ["Ada", "Grace"],
+                "gallery": [{"image": self.image.title, "caption": "Caption"}, {"image": "missing"}],
+            }
+            for n in range(5)
+        ])
+
+    def write_archive(self, records):
+        with open(self.archive, "w") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+
+    def import_blog(self, *args, **options):
+        """Run the importer, returning the IDs of the pages it indexed"""
+        backend = mock.Mock()
+        with mock.patch("blog.management.commands.import_blog.get_search_backends", return_value=[backend]):
+            call_command(
+                "import_blog", self.archive, *args, **{"batch_size": 2, "stdout": StringIO(), "stderr": StringIO(), **options},
+            )
+        return sorted(page.pk for call in backend.add_bulk.call_args_list for page in call.args[1])
+
+    def test_import(self):
+        indexed = self.import_blog()
+
+        self.assertEqual(Page.find_problems(), ([], [], [], [], []))
+        posts = BlogPage.objects.child_of(self.index).live()
+        self.assertEqual(posts.count(), 5)
+        post = posts.get(slug="post-3")
+        self.assertEqual(post.url, "/blog/post-3/")
+        self.assertEqual(sorted(post.tags.names()), ["news", "tag-3"])
+        self.assertEqual(sorted(post.authors.values_list("name", flat=True)), ["Ada", "Grace"])
+        self.assertEqual(list(post.gallery_images.values_list("image", "caption")), [(self.image.pk, "Caption")])
+        self.assertEqual(Author.objects.filter(name="Ada").count(), 1)
+
+        # Published revisions holding the whole post, as if published in the admin
+        self.assertEqual(post.live_revision, post.latest_revision)
+        revision = post.latest_revision.as_object()
+        self.assertEqual(revision.title, "Post 3")
+        self.assertEqual(sorted(tag.name for tag in revision.tags.all()), ["news", "tag-3"])
+        self.assertEqual(revision.gallery_images.get().pk, post.gallery_images.get().pk)
+
+        self.assertEqual(indexed, sorted(posts.values_list("pk", flat=True)))
+        self.assertEqual(self.client.get(post.url).status_code, 200)
+
+    def test_slugs(self):
+        self.write_archive([
+            {"title": "東京の夜"}, {"title": "大阪の朝"}, {"title": "!!!"}, {"title": "Post 1"}, {"title": "Post 1"},
+        ])
+        stderr = StringIO()
+        self.import_blog(stderr=stderr)
+
+        posts = BlogPage.objects.child_of(self.index)
+        self.assertEqual(sorted(posts.values_list("slug", flat=True)), ["post-1", "post-2", "大阪の朝", "東京の夜"])
+        self.assertEqual(Page.find_problems(), ([], [], [], [], []))
+        # The repeated post is reported rather than dropped silently
+        self.assertEqual(stderr.getvalue().count("Skipping Post 1"), 1)
+
+    def test_resume(self):
+        with mock.patch.object(ImportBlogCommand, "update_index", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.import_blog()
+        with open(self.archive + ".checkpoint") as f:
+            checkpoint = json.load(f)
+        self.assertEqual(checkpoint["position"], 5)
+        self.assertEqual(len(checkpoint["pending_index"]), 5)
+
+        # Posts added since are imported, and those from the last run indexed
+        self.write_archive([{"title": f"Post {n}"} for n in range(7)])
+        indexed = self.import_blog()
+
+        posts = BlogPage.objects.child_of(self.index)
+        self.assertEqual(posts.count(), 7)
+        self.assertEqual(indexed, sorted(posts.values_list("pk", flat=True)))
+
+        # Without the checkpoint, posts already imported are skipped
+        self.assertEqual(self.import_blog(restart=True), [])
+        self.assertEqual(posts.count(), 7)
+
+    def test_slugs_of_other_page_types_are_skipped(self):
+        self.index.add_child(instance=StandardPage(title="About", slug="post-1"))
+        stderr = StringIO()
+
+        self.import_blog(stderr=stderr)
+
+        self.assertEqual(BlogPage.objects.child_of(self.index).count(), 4)
+        self.assertIn("already has a page with the slug post-1", stderr.getvalue())
+        self.assertEqual(Page.find_problems(), ([], [], [], [], []))
+
+    @override_settings(PAGE_CACHE_ENABLED=True)
+    def test_editing_a_gallery_image_purges_imported_posts(self):
+        self.import_blog()
+        url = BlogPage.objects.get(slug="post-0").url
+        caches["pages"].clear()
+        caches["state"].clear()
+        self.assertEqual(self.client.get(url)["X-Page-Cache"], "miss")
+        self.assertEqual(self.client.get(url)["X-Page-Cache"], "hit")
+
+        self.image.title = "Renamed"
+        self.image.save()
+
+        self.assertEqual(self.client.get(url)["X-Page-Cache"], "miss")
@@ -0,0 +1,16 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_save
+
+
+class DashboardConfig(AppConfig):
+    name = 'dashboard'
+
+    def ready(self):
+        from wagtail.images import get_image_model
+
+        from dashboard.middleware import count_created_renditions, count_rendition
+
+        # Requests generating renditions are counted, and left out of query budgets
+        image_model = get_image_model()
+        post_save.connect(count_rendition, sender=image_model.get_rendition_model(), dispatch_uid="dashboard_renditions")
+        image_model.create_renditions = count_created_renditions(image_model.create_renditions)
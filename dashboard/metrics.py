@@ -0,0 +1,140 @@
+"""
+In-process performance metrics, shown on the admin dashboard.
+
+Each process aggregates what it measures per (metric, key) -- a count, a
+total, a maximum and a histogram over fixed BUCKETS -- and merges those
+aggregates into one record in the default cache every FLUSH_INTERVAL
+seconds, instead of writing anything per request. Percentiles are read
+from the merged histograms, so they are accurate to a bucket.
+
+Metrics recorded by this app:
+
+* ``templates``: milliseconds to render each template of a TemplateResponse
+* ``requests``: milliseconds per request, by endpoint
+* ``queries``: database queries per request, by endpoint
+* ``db_time``: milliseconds spent in queries per request, by endpoint
+* ``template_time``: milliseconds spent rendering per request, by endpoint
+* ``cache_hits``, ``cache_misses``: namespace cache lookups per request, by endpoint
+* ``search``: milliseconds per site search, keyed "cached" or "uncached"
+* ``renditions``: image renditions generated per instrumented request that generated any
+"""
+
+import bisect
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from mysite.cache import METRICS_ALIAS
+
+METRICS_KEY = "performance-metrics"
+LOCK_KEY = "performance-metrics-lock"
+FLUSH_INTERVAL = 10
+
+# Upper bounds of the histogram buckets, in the metric's own unit
+BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Keys kept per metric; further keys are counted under OTHER_KEY
+MAX_KEYS = 200
+OTHER_KEY = "(other)"
+
+
+def new_aggregate():
+    return {"count": 0, "total": 0, "max": 0, "buckets": [0] * (len(BUCKETS) + 1)}
+
+
+def merge(into, metrics):
+    """Add {metric: {key: aggregate}} into another such dict"""
+    for metric, aggregates in metrics.items():
+        merged = into.setdefault(metric, {})
+        for key, aggregate in aggregates.items():
+            if key not in merged and len(merged) >= MAX_KEYS:
+                key = OTHER_KEY
+            target = merged.setdefault(key, new_aggregate())
+            target["count"] += aggregate["count"]
+            target["total"] += aggregate["total"]
+            target["max"] = max(target["max"], aggregate["max"])
+            target["buckets"] = [a + b for a, b in zip(target["buckets"], aggregate["buckets"])]
+
+
+def mean(aggregate):
+    return aggregate["total"] / aggregate["count"] if aggregate["count"] else 0
+
+
+def percentile(aggregate, p):
+    """The upper bound of the bucket holding the p-th percentile (0-100)"""
+    rank = aggregate["count"] * p / 100
+    seen = 0
+    for bound, count in zip(BUCKETS + (aggregate["max"],), aggregate["buckets"]):
+        seen += count
+        if count and seen >= rank:
+            return min(bound, aggregate["max"])
+    return aggregate["max"]
+
+
+class Collector:
+    """Aggregates of recorded values, flushed to the shared cache in batches"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.last_flush = time.monotonic()
+
+    def record(self, metric, key, value=0):
+        with self.lock:
+            aggregates = self.pending.setdefault(metric, {})
+            aggregate = aggregates.get(key)
+            if aggregate is None:
+                aggregate = aggregates[key] = new_aggregate()
+            aggregate["count"] += 1
+            aggregate["total"] += value
+            aggregate["max"] = max(aggregate["max"], value)
+            aggregate["buckets"][bisect.bisect_left(BUCKETS, value)] += 1
+            due = time.monotonic() - self.last_flush >= FLUSH_INTERVAL
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.last_flush = time.monotonic()
+        if not pending:
+            return
+
+        cache = caches[METRICS_ALIAS]
+        # Merging is a read-modify-write, so only one process at a time; if
+        # another holds the lock, keep the aggregates for the next flush
+        if not cache.add(LOCK_KEY, True, 5):
+            with self.lock:
+                merge(pending, self.pending)
+                self.pending = pending
+            return
+        try:
+            stored = cache.get(METRICS_KEY) or {"since": time.time(), "metrics": {}}
+            merge(stored["metrics"], pending)
+            cache.set(METRICS_KEY, stored, None)
+        finally:
+            cache.delete(LOCK_KEY)
+
+    def get(self):
+        """Return {"since": timestamp, "metrics": {metric: {key: aggregate}}} across all processes"""
+        self.flush()
+        return caches[METRICS_ALIAS].get(METRICS_KEY) or {"since": None, "metrics": {}}
+
+    def reset(self):
+        with self.lock:
+            self.pending.clear()
+        caches[METRICS_ALIAS].delete(METRICS_KEY)
+
+
+collector = Collector()
+
+
+def record(metric, key, value=0):
+    if getattr(settings, "PERFORMANCE_METRICS_ENABLED", False):
+        collector.record(metric, key, value)
+
+
+def get_metrics():
+    return collector.get()
@@ -0,0 +1,220 @@
+import contextvars
+import functools
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from dashboard.metrics import record
+from mysite.cache import request_cache_counts
+
+logger = logging.getLogger(__name__)
+
+# The RequestStats of the request being instrumented, for counting renditions
+request_stats = contextvars.ContextVar("request_stats", default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def get_endpoint(request):
+    """Name requests by page type for Wagtail pages, otherwise by URL name"""
+    endpoint = getattr(request, "metrics_endpoint", None)
+    if endpoint:
+        return endpoint
+    match = request.resolver_match
+    if match is None:
+        # Answered by middleware (e.g. from the page cache) before URL resolution
+        return "(middleware)"
+    return match.view_name or match._func_path
+
+
+def get_template_name(response):
+    """The template a TemplateResponse renders, or the first of its candidates"""
+    template = response.template_name
+    if isinstance(template, (list, tuple)):
+        template = template[0] if template else None
+    if template is None or isinstance(template, str):
+        return template
+    return getattr(template, "origin", None) and template.origin.name
+
+
+def check_query_budget(endpoint, queries):
+    """
+    Log, or raise QueryBudgetExceeded when QUERY_BUDGET_ACTION is "raise",
+    if an endpoint ran more queries than QUERY_BUDGETS allows it.
+    """
+    budget = getattr(settings, "QUERY_BUDGETS", {}).get(endpoint)
+    if budget is None or queries <= budget:
+        return
+    message = f"{endpoint} ran {queries} queries, over its budget of {budget}"
+    if getattr(settings, "QUERY_BUDGET_ACTION", "log") == "raise":
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+class RequestStats:
+    """What one instrumented request cost"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0
+        self.template_time = 0
+        self.cache = {"hits": 0, "misses": 0}
+        self.renditions = 0
+
+    def execute(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += (time.perf_counter() - start) * 1000
+
+
+def count_rendition(sender, created, **kwargs):
+    """post_save of the rendition model, sent when renditions are created one at a time"""
+    stats = request_stats.get()
+    if created and stats is not None:
+        stats.renditions += 1
+
+
+def count_created_renditions(create_renditions):
+    """
+    Wrap an image model's create_renditions, which bulk-creates several
+    renditions at once without sending post_save. For a single rendition it
+    calls create_rendition, which saves it and is left to count_rendition.
+    """
+
+    @functools.wraps(create_renditions)
+    def wrapper(image, *filters):
+        stats = request_stats.get()
+        if stats is not None and len(filters) > 1:
+            stats.renditions += len(filters)
+        return create_renditions(image, *filters)
+
+    return wrapper
+
+
+class PerformanceMetricsMiddleware:
+    """
+    Instrument a sample of requests (PERFORMANCE_METRICS_SAMPLE_RATE) and
+    record, by endpoint, their duration, query count, database time,
+    template render time and cache hits in ``dashboard.metrics``, along
+    with the time taken to render each template. Instrumented requests are
+    also checked against QUERY_BUDGETS, which works without the metrics,
+    unless they generated image renditions.
+
+    Placed near the top of the stack so other middleware's queries are
+    counted too, but after WhiteNoise so static files are left out.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.enabled = getattr(settings, "PERFORMANCE_METRICS_ENABLED", False)
+        if not (self.enabled or getattr(settings, "QUERY_BUDGETS", {})):
+            raise MiddlewareNotUsed
+        self.sample_rate = getattr(settings, "PERFORMANCE_METRICS_SAMPLE_RATE", 1.0)
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+            # Otherwise Django runs the sync hook on a thread
+            self.process_template_response = self.aprocess_template_response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.is_sampled():
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        stats, tokens = self.start(request)
+        try:
+            with self.wrap_connections(stats):
+                response = self.get_response(request)
+        finally:
+            self.stop(tokens)
+        self.finish(request, stats, start)
+        return response
+
+    async def __acall__(self, request):
+        if not self.is_sampled():
+            return await self.get_response(request)
+
+        start = time.perf_counter()
+        stats, tokens = self.start(request)
+        try:
+            # Async views query through sync_to_async, on this request's
+            # thread for sync code, which has connections of its own
+            stack = await sync_to_async(self.wrap_connections)(stats)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        finally:
+            self.stop(tokens)
+        self.finish(request, stats, start)
+        return response
+
+    def is_sampled(self):
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def start(self, request):
+        stats = request.performance_stats = RequestStats()
+        return stats, (request_cache_counts.set(stats.cache), request_stats.set(stats))
+
+    def stop(self, tokens):
+        cache_token, stats_token = tokens
+        request_cache_counts.reset(cache_token)
+        request_stats.reset(stats_token)
+
+    def wrap_connections(self, stats):
+        """Count queries on this thread's connections until the returned stack is closed"""
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(stats.execute))
+        return stack
+
+    def finish(self, request, stats, start):
+        elapsed = (time.perf_counter() - start) * 1000
+        endpoint = get_endpoint(request)
+        if self.enabled:
+            record("requests", endpoint, elapsed)
+            record("queries", endpoint, stats.queries)
+            record("db_time", endpoint, stats.db_time)
+            record("template_time", endpoint, stats.template_time)
+            record("cache_hits", endpoint, stats.cache["hits"])
+            record("cache_misses", endpoint, stats.cache["misses"])
+            if stats.renditions:
+                record("renditions", "generated", stats.renditions)
+        # Generating an image's renditions is a one-off cost, paid by the
+        # first request to show it, so those requests aren't held to budgets
+        if not stats.renditions:
+            check_query_budget(endpoint, stats.queries)
+
+    def process_template_response(self, request, response):
+        # The outermost middleware's hook runs last, right before rendering
+        stats = getattr(request, "performance_stats", None)
+        name = get_template_name(response)
+        if stats is not None and name:
+            start = time.perf_counter()
+
+            def record_render(response):
+                elapsed = (time.perf_counter() - start) * 1000
+                stats.template_time += elapsed
+                if self.enabled:
+                    record("templates", name, elapsed)
+
+            response.add_post_render_callback(record_render)
+        return response
+
+    async def aprocess_template_response(self, request, response):
+        return type(self).process_template_response(self, request, response)
@@ -0,0 +1,171 @@
+"""
+Admin dashboard panels showing the performance data in ``dashboard.metrics``.
+
+Each panel is a table built from one snapshot of the metrics, read from the
+cache once per dashboard view by ``get_performance_panels``.
+"""
+
+from datetime import datetime, timezone
+
+from django.utils.translation import gettext_lazy as _
+
+from django_tasks.backends.database.models import DBTaskResult
+from django_tasks.task import ResultStatus
+from wagtail.admin.ui.components import Component
+
+from base.tasks import generate_renditions
+from dashboard.metrics import get_metrics, mean, percentile
+from mysite.cache import get_metrics as get_cache_metrics
+
+# Rows shown in panels listing templates or endpoints
+PANEL_ROWS = 10
+
+
+def format_ms(value):
+    return f"{value:,.1f} ms"
+
+
+class MetricsPanel(Component):
+    template_name = "dashboard/panels/metrics.html"
+    name = ""
+    heading = ""
+    help_text = ""
+    columns = ()
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def get_aggregates(self, metric):
+        return self.snapshot["metrics"].get(metric, {})
+
+    def get_rows(self):
+        """The table's rows, each a list of cells matching columns"""
+        return []
+
+    def get_context_data(self, parent_context):
+        since = self.snapshot["since"]
+        return {
+            "panel_id": self.name.replace("_", "-"),
+            "heading": self.heading,
+            "help_text": self.help_text,
+            "columns": self.columns,
+            "rows": self.get_rows(),
+            "since": since and datetime.fromtimestamp(since, timezone.utc),
+        }
+
+
+class SlowestTemplatesPanel(MetricsPanel):
+    name = "slowest_templates"
+    order = 400
+    heading = _("Slowest page templates")
+    help_text = _("Time to render each template, slowest 95th percentile first.")
+    columns = (_("Template"), _("Renders"), _("Mean"), _("95th percentile"), _("Max"))
+
+    def get_rows(self):
+        aggregates = sorted(
+            self.get_aggregates("templates").items(),
+            key=lambda item: (percentile(item[1], 95), mean(item[1])),
+            reverse=True,
+        )
+        return [
+            [name, aggregate["count"], format_ms(mean(aggregate)),
+             format_ms(percentile(aggregate, 95)), format_ms(aggregate["max"])]
+            for name, aggregate in aggregates[:PANEL_ROWS]
+        ]
+
+
+class EndpointQueriesPanel(MetricsPanel):
+    name = "endpoint_queries"
+    order = 410
+    heading = _("Queries per endpoint")
+    help_text = _("Database queries per request, most queries first. Pages are listed by page type.")
+    columns = (
+        _("Endpoint"), _("Requests"), _("Mean queries"), _("95th percentile"), _("Max"),
+        _("Mean DB time"), _("Mean time"),
+    )
+
+    def get_rows(self):
+        db_times = self.get_aggregates("db_time")
+        timings = self.get_aggregates("requests")
+        aggregates = sorted(self.get_aggregates("queries").items(), key=lambda item: mean(item[1]), reverse=True)
+        rows = []
+        for endpoint, aggregate in aggregates[:PANEL_ROWS]:
+            db_time, timing = db_times.get(endpoint), timings.get(endpoint)
+            rows.append([
+                endpoint, aggregate["count"], f"{mean(aggregate):.1f}", percentile(aggregate, 95),
+                aggregate["max"], format_ms(mean(db_time)) if db_time else "-",
+                format_ms(mean(timing)) if timing else "-",
+            ])
+        return rows
+
+
+class CacheHitRatePanel(MetricsPanel):
+    name = "cache_hit_rates"
+    order = 420
+    heading = _("Cache hit rates")
+    help_text = _("Hits and misses per cache namespace.")
+    columns = (_("Namespace"), _("Hits"), _("Misses"), _("Hit rate"))
+
+    def get_rows(self):
+        rows = []
+        for alias, counts in get_cache_metrics().items():
+            total = counts["hits"] + counts["misses"]
+            rate = f"{counts['hits'] / total:.1%}" if total else "-"
+            rows.append([alias, counts["hits"], counts["misses"], rate])
+        return rows
+
+    def get_context_data(self, parent_context):
+        # Counted separately by mysite.cache, since the counters were last reset
+        return {**super().get_context_data(parent_context), "since": None}
+
+
+class RenditionBacklogPanel(MetricsPanel):
+    name = "rendition_backlog"
+    order = 430
+    heading = _("Rendition backlog")
+    help_text = _(
+        "Rendition tasks queued by ingest_images for the task worker, and renditions "
+        "the worker hadn't generated yet when a request needed them."
+    )
+    columns = (_("Renditions"), _("Count"))
+
+    def get_rows(self):
+        generated = self.get_aggregates("renditions").get("generated")
+        # Only the database task backend keeps a queue; others run tasks as they're enqueued
+        queued = DBTaskResult.objects.filter(
+            task_path=generate_renditions.module_path, status__in=[ResultStatus.READY, ResultStatus.RUNNING]
+        ).values_list("args_kwargs", flat=True)
+        # Each task generates the renditions of its first argument's image ids
+        image_ids = [args_kwargs["args"][0] for args_kwargs in queued]
+        return [
+            [_("Queued tasks"), len(image_ids)],
+            [_("Images in queued tasks"), sum(map(len, image_ids))],
+            [_("Generated while serving requests"), generated["total"] if generated else 0],
+        ]
+
+
+class SearchLatencyPanel(MetricsPanel):
+    name = "search_latency"
+    order = 440
+    heading = _("Search latency")
+    help_text = _("Time to find the results of a site search, with and without the search cache.")
+    columns = (_("Searches"), _("Count"), _("50th percentile"), _("90th percentile"), _("99th percentile"), _("Max"))
+
+    def get_rows(self):
+        rows = []
+        for key, label in (("uncached", _("Uncached")), ("cached", _("Cached"))):
+            aggregate = self.get_aggregates("search").get(key)
+            if aggregate:
+                rows.append([
+                    label, aggregate["count"], *(format_ms(percentile(aggregate, p)) for p in (50, 90, 99)),
+                    format_ms(aggregate["max"]),
+                ])
+        return rows
+
+
+PANELS = [SlowestTemplatesPanel, EndpointQueriesPanel, CacheHitRatePanel, RenditionBacklogPanel, SearchLatencyPanel]
+
+
+def get_performance_panels():
+    snapshot = get_metrics()
+    return [panel(snapshot) for panel in PANELS]
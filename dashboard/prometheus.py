@@ -0,0 +1,73 @@
+"""
+The metrics in ``dashboard.metrics`` and ``mysite.cache`` as Prometheus text.
+
+Histograms are cumulative since the metrics were last reset, with the
+collector's BUCKETS as their bounds, converted to seconds for timings.
+"""
+
+from dashboard.metrics import BUCKETS
+
+# metric -> (Prometheus name, label, scale from the recorded unit, help)
+HISTOGRAMS = {
+    "requests": ("mysite_request_duration_seconds", "endpoint", 1000, "Time to answer a request."),
+    "queries": ("mysite_request_queries", "endpoint", 1, "Database queries per request."),
+    "db_time": ("mysite_request_db_seconds", "endpoint", 1000, "Time spent in database queries per request."),
+    "template_time": (
+        "mysite_request_template_seconds", "endpoint", 1000, "Time spent rendering templates per request.",
+    ),
+    "templates": ("mysite_template_render_seconds", "template", 1000, "Time to render a template."),
+    "search": ("mysite_search_duration_seconds", "cache", 1000, "Time to find the results of a site search."),
+}
+
+# metric -> (Prometheus name, label, help), exported as the total recorded
+COUNTERS = {
+    "cache_hits": ("mysite_request_cache_hits_total", "endpoint", "Cache hits while answering requests."),
+    "cache_misses": ("mysite_request_cache_misses_total", "endpoint", "Cache misses while answering requests."),
+}
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_histogram(lines, name, label, scale, aggregates):
+    for key, aggregate in sorted(aggregates.items()):
+        labels = f'{label}="{escape(key)}"'
+        seen = 0
+        for bound, count in zip(BUCKETS, aggregate["buckets"]):
+            seen += count
+            lines.append(f'{name}_bucket{{{labels},le="{format_number(bound / scale)}"}} {seen}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {aggregate["count"]}')
+        lines.append(f"{name}_sum{{{labels}}} {format_number(aggregate['total'] / scale)}")
+        lines.append(f"{name}_count{{{labels}}} {aggregate['count']}")
+
+
+def render_metrics(snapshot, cache_metrics):
+    """Return the text exposition of a metrics snapshot and the cache hit counts"""
+    metrics = snapshot["metrics"]
+    lines = []
+
+    for metric, (name, label, scale, help_text) in HISTOGRAMS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        render_histogram(lines, name, label, scale, metrics.get(metric, {}))
+
+    for metric, (name, label, help_text) in COUNTERS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for key, aggregate in sorted(metrics.get(metric, {}).items()):
+            lines.append(f'{name}{{{label}="{escape(key)}"}} {aggregate["total"]}')
+
+    name = "mysite_renditions_generated_total"
+    lines += [f"# HELP {name} Image renditions generated while serving requests.", f"# TYPE {name} counter"]
+    lines.append(f"{name} {metrics.get('renditions', {}).get('generated', {}).get('total', 0)}")
+
+    for result in ("hits", "misses"):
+        name = f"mysite_cache_{result}_total"
+        lines += [f"# HELP {name} Cache {result} per namespace.", f"# TYPE {name} counter"]
+        for alias, counts in cache_metrics.items():
+            lines.append(f'{name}{{namespace="{escape(alias)}"}} {counts[result]}')
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,182 @@
+from django.core.cache import caches
+from django.test import override_settings
+from django.urls import reverse
+
+from base.tasks import generate_renditions
+from base.testing import PerformanceTestCase, clear_caches
+from dashboard.metrics import METRICS_ALIAS, LOCK_KEY, Collector, collector, get_metrics, percentile
+from dashboard.middleware import QueryBudgetExceeded, RequestStats, request_stats
+from dashboard.panels import RenditionBacklogPanel
+from pages.models import StandardPage
+
+
+@override_settings(PERFORMANCE_METRICS_ENABLED=True)
+class MetricsTestCase(PerformanceTestCase):
+    """
+    A test case with metrics collected from empty, and a published page to request.
+    """
+
+    content = ("images",)
+
+    def setUp(self):
+        clear_caches()
+        collector.reset()
+        self.page = StandardPage(title="About", slug="about", body="<p>Hello</p>")
+        self.home.add_child(instance=self.page)
+        self.page.save_revision().publish()
+
+
+class PerformanceDashboardTests(MetricsTestCase):
+    """
+    Tests for the performance metrics collector and the dashboard panels.
+    """
+
+    def test_collector_aggregates(self):
+        collector = Collector()
+        for value in range(1, 101):
+            collector.record("requests", "home", value)
+
+        aggregate = collector.get()["metrics"]["requests"]["home"]
+        self.assertEqual((aggregate["count"], aggregate["total"], aggregate["max"]), (100, 5050, 100))
+        self.assertEqual(percentile(aggregate, 50), 50)
+        self.assertEqual(percentile(aggregate, 90), 100)
+
+    def test_flush_waits_for_lock(self):
+        collector = Collector()
+        collector.record("requests", "home", 5)
+        caches[METRICS_ALIAS].add(LOCK_KEY, True)
+
+        collector.flush()
+        self.assertEqual(caches[METRICS_ALIAS].get("performance-metrics"), None)
+
+        caches[METRICS_ALIAS].delete(LOCK_KEY)
+        self.assertEqual(collector.get()["metrics"]["requests"]["home"]["count"], 1)
+
+    def test_requests_are_recorded(self):
+        self.client.get(self.page.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.page.save_revision().publish()
+        self.client.get("/search/", {"query": "About"})
+        self.client.get("/search/", {"query": "About"})
+
+        metrics = get_metrics()["metrics"]
+        self.assertGreater(metrics["queries"]["page:pages.StandardPage"]["total"], 0)
+        self.assertEqual(metrics["requests"]["page:pages.StandardPage"]["count"], 1)
+        self.assertEqual(metrics["templates"]["pages/standard_page.html"]["count"], 1)
+        self.assertEqual(metrics["search"]["uncached"]["count"], 1)
+        self.assertEqual(metrics["search"]["cached"]["count"], 1)
+
+    def test_dashboard_panels(self):
+        self.client.get(self.page.url)
+        self.login()
+
+        response = self.client.get(reverse("wagtailadmin_home"))
+
+        for heading in ("Slowest page templates", "Queries per endpoint", "Cache hit rates",
+                        "Rendition backlog", "Search latency"):
+            self.assertContains(response, heading)
+        self.assertContains(response, "pages/standard_page.html")
+        self.assertContains(response, "page:pages.StandardPage")
+
+    @override_settings(TASKS={"default": {"BACKEND": "django_tasks.backends.database.DatabaseBackend"}})
+    def test_rendition_backlog_counts_queued_tasks(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            generate_renditions.enqueue([1, 2], ["fill-10x10"])
+            generate_renditions.enqueue([3], ["fill-10x10"])
+
+        rows = RenditionBacklogPanel({"metrics": {}, "since": None}).get_rows()
+
+        self.assertEqual([count for label, count in rows], [2, 3, 0])
+
+    @override_settings(PERFORMANCE_METRICS_ENABLED=False)
+    def test_disabled(self):
+        self.client.get(self.page.url)
+        self.login()
+
+        self.assertEqual(get_metrics()["metrics"], {})
+        self.assertNotContains(self.client.get(reverse("wagtailadmin_home")), "Slowest page templates")
+
+
+class RequestInstrumentationTests(MetricsTestCase):
+    """
+    Tests for per-request instrumentation, query budgets and the Prometheus export.
+    """
+
+    def test_request_costs_are_recorded(self):
+        self.client.get(self.page.url)
+        self.client.get("/search/", {"query": "About"})
+        self.client.get("/search/", {"query": "About"})
+
+        metrics = get_metrics()["metrics"]
+        self.assertGreater(metrics["db_time"]["page:pages.StandardPage"]["total"], 0)
+        self.assertGreater(metrics["template_time"]["page:pages.StandardPage"]["total"], 0)
+        # The second search is answered from the search cache
+        self.assertEqual(metrics["cache_hits"]["search"]["count"], 2)
+        self.assertGreater(metrics["cache_hits"]["search"]["max"], metrics["cache_hits"]["search"]["total"] / 2)
+
+    @override_settings(PERFORMANCE_METRICS_SAMPLE_RATE=0)
+    def test_sampling(self):
+        self.client.get(self.page.url)
+
+        self.assertEqual(get_metrics()["metrics"], {})
+
+    def test_query_budget(self):
+        with override_settings(QUERY_BUDGETS={"page:pages.StandardPage": 1}, QUERY_BUDGET_ACTION="raise"):
+            with self.assertRaisesMessage(QueryBudgetExceeded, "over its budget of 1"):
+                self.client.get(self.page.url)
+
+        with override_settings(QUERY_BUDGETS={"page:pages.StandardPage": 1}, QUERY_BUDGET_ACTION="log"):
+            with self.assertLogs("dashboard.middleware", "WARNING"):
+                self.assertEqual(self.client.get(self.page.url).status_code, 200)
+
+    @override_settings(QUERY_BUDGETS={"page:pages.StandardPage": 1}, QUERY_BUDGET_ACTION="raise")
+    def test_query_budget_skips_rendition_generation(self):
+        self.page.header_image = self.images[0]
+        self.page.save_revision().publish()
+
+        self.assertEqual(self.client.get(self.page.url).status_code, 200)
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(self.page.url)
+
+    def test_created_renditions_counted(self):
+        image = self.images[0]
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        try:
+            image.get_rendition("fill-30x30")
+            # Several renditions at once are bulk-created, without post_save
+            image.get_renditions("fill-10x10", "fill-20x20")
+            # Existing renditions aren't counted again
+            image.get_renditions("fill-10x10", "fill-20x20", "fill-30x30")
+        finally:
+            request_stats.reset(token)
+
+        self.assertEqual(stats.renditions, 3)
+
+    @override_settings(
+        QUERY_BUDGETS={"page:pages.StandardPage": 1}, QUERY_BUDGET_ACTION="raise", PERFORMANCE_METRICS_ENABLED=False,
+    )
+    def test_query_budget_without_metrics(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(self.page.url)
+
+    def test_prometheus_metrics(self):
+        self.client.get(self.page.url)
+        url = reverse("prometheus_metrics")
+
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.login()
+        response = self.client.get(url)
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+        self.assertContains(response, "# TYPE mysite_request_queries histogram")
+        self.assertContains(response, 'mysite_request_duration_seconds_count{endpoint="page:pages.StandardPage"} 1')
+        self.assertContains(response, 'mysite_request_queries_bucket{endpoint="page:pages.StandardPage",le="+Inf"} 1')
+        self.assertContains(response, 'mysite_cache_hits_total{namespace="search"}')
+
+    @override_settings(PERFORMANCE_METRICS_TOKEN="secret")
+    def test_prometheus_token(self):
+        url = reverse("prometheus_metrics")
+
+        self.assertEqual(self.client.get(url, headers={"Authorization": "Bearer wrong"}).status_code, 403)
+        self.assertEqual(self.client.get(url, headers={"Authorization": "Bearer secret"}).status_code, 200)
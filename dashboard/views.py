@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+from dashboard.metrics import get_metrics
+from dashboard.prometheus import render_metrics
+from mysite.cache import get_metrics as get_cache_metrics
+
+
+def is_scraper(request):
+    """Whether a request may read the metrics: PERFORMANCE_METRICS_TOKEN as a bearer token, or a staff login"""
+    token = getattr(settings, "PERFORMANCE_METRICS_TOKEN", None)
+    if token:
+        return constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}")
+    return request.user.is_staff
+
+
+def prometheus_metrics(request):
+    if not getattr(settings, "PERFORMANCE_METRICS_ENABLED", False):
+        raise Http404
+    if not is_scraper(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render_metrics(get_metrics(), get_cache_metrics()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
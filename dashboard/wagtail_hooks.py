@@ -0,0 +1,22 @@
+from django.conf import settings
+
+from wagtail import hooks
+
+from dashboard.panels import get_performance_panels
+
+
+def performance_metrics_enabled():
+    return getattr(settings, "PERFORMANCE_METRICS_ENABLED", False)
+
+
+@hooks.register("before_serve_page", order=-1)
+def name_page_endpoint(page, request, serve_args, serve_kwargs):
+    """Count page requests by page type rather than as one Wagtail view"""
+    # Runs before base's hooks, which may answer the request themselves
+    request.metrics_endpoint = f"page:{page.specific_class._meta.label}"
+
+
+@hooks.register("construct_homepage_panels")
+def add_performance_panels(request, panels):
+    if performance_metrics_enabled():
+        panels.extend(get_performance_panels())
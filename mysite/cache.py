@@ -0,0 +1,253 @@
+"""
+Cache configuration and namespaced cache access.
+
+Every subsystem gets its own cache alias ("namespace") on one shared
+backend: Redis when REDIS_URL is set, files under CACHE_DIR when that is
+set, otherwise per-process local memory (fine for runserver and tests).
+
+``CacheNamespace`` stores keys under a generation token kept in the cache
+itself, so ``invalidate()`` drops everything in a namespace at once, across
+every worker. Generation tokens, like the page cache and rich text versions
+and the metrics counters, live in the "state" alias, which is never culled:
+losing one would serve stale entries or drop counts. Hits and misses are counted per namespace in-process and
+flushed to the shared cache periodically, see ``get_metrics``, and also
+added to ``request_cache_counts`` when a request is being instrumented.
+"""
+
+import contextvars
+import inspect
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+# Alias name -> default timeout in seconds
+NAMESPACES = {
+    # Wagtail looks up renditions in a cache with this alias when present
+    "renditions": 24 * 60 * 60,
+    # Whole rendered pages, see base.page_cache
+    "pages": 60 * 60,
+    "pages_api": 5 * 60,
+    "rich_text": 24 * 60 * 60,
+    "search": 5 * 60,
+    "navigation": 60 * 60,
+    "team": 60 * 60,
+    # Per-section sitemap and per-index feed fragments, dropped on publish
+    "sitemaps": 24 * 60 * 60,
+    "feeds": 24 * 60 * 60,
+}
+
+# Alias name -> most entries kept by the file-based and local memory
+# backends (whose default is 300), sized for a site of a few thousand pages
+# and images (the volumes of PERF_SCALE=50). The file-based backend lists
+# its directory on every write, so these are also why a bigger site wants
+# Redis, which has no limit of its own.
+MAX_ENTRIES = {
+    "default": 5000,
+    # About a dozen renditions per image
+    "renditions": 50000,
+    "pages": 20000,
+    "pages_api": 20000,
+    "rich_text": 50000,
+    "search": 5000,
+    "navigation": 1000,
+    "team": 1000,
+    "sitemaps": 1000,
+    "feeds": 1000,
+    # Never culled: a few small keys per namespace, page and metric
+    "state": sys.maxsize,
+}
+# When full, drop a quarter of the entries (the default is a third)
+CULL_FREQUENCY = 4
+
+# Alias for keys that must not be evicted, see the module docstring
+STATE_ALIAS = "state"
+
+GENERATION_KEY = "namespace-generation"
+METRICS_ALIAS = STATE_ALIAS
+METRICS_FLUSH_INTERVAL = 10
+
+_MISSING = object()
+
+# {"hits": n, "misses": n} for the current request, set while it's instrumented
+request_cache_counts = contextvars.ContextVar("request_cache_counts", default=None)
+
+
+def caches_from_env(environ=os.environ, default_dir=None):
+    """
+    Build the CACHES setting. REDIS_URL selects Redis (which needs the
+    "redis" package), CACHE_DIR (or default_dir) a file-based cache shared
+    by every process on the host.
+    """
+    redis_url = environ.get("REDIS_URL")
+    cache_dir = environ.get("CACHE_DIR", default_dir)
+
+    def backend(alias):
+        options = {"MAX_ENTRIES": MAX_ENTRIES[alias], "CULL_FREQUENCY": CULL_FREQUENCY}
+        if redis_url:
+            return {
+                "BACKEND": "django.core.cache.backends.redis.RedisCache",
+                "LOCATION": redis_url,
+                "KEY_PREFIX": alias,
+            }
+        if cache_dir:
+            return {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                # Separate directories so culling one alias doesn't evict another
+                "LOCATION": os.path.join(cache_dir, alias),
+                "OPTIONS": options,
+            }
+        return {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": alias,
+            "OPTIONS": options,
+        }
+
+    config = {"default": backend("default"), STATE_ALIAS: {**backend(STATE_ALIAS), "TIMEOUT": None}}
+    for alias, timeout in NAMESPACES.items():
+        config[alias] = {**backend(alias), "TIMEOUT": timeout}
+    return config
+
+
+class Metrics:
+    """Hit/miss counts per namespace, flushed to the shared cache in batches"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = defaultdict(lambda: {"hits": 0, "misses": 0})
+        self.last_flush = time.monotonic()
+
+    def record(self, namespace, hit, count=1):
+        counts = request_cache_counts.get()
+        if counts is not None:
+            counts["hits" if hit else "misses"] += count
+        with self.lock:
+            self.pending[namespace]["hits" if hit else "misses"] += count
+            due = time.monotonic() - self.last_flush >= METRICS_FLUSH_INTERVAL
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, defaultdict(lambda: {"hits": 0, "misses": 0})
+            self.last_flush = time.monotonic()
+
+        cache = caches[METRICS_ALIAS]
+        for namespace, counts in pending.items():
+            for name, count in counts.items():
+                if not count:
+                    continue
+                key = f"cache-metrics:{namespace}:{name}"
+                cache.add(key, 0, None)
+                try:
+                    cache.incr(key, count)
+                except ValueError:
+                    # Evicted between add and incr
+                    cache.set(key, count, None)
+
+    def get(self):
+        """Return {namespace: {"hits": n, "misses": n}} across all processes"""
+        self.flush()
+        keys = [f"cache-metrics:{namespace}:{name}" for namespace in NAMESPACES for name in ("hits", "misses")]
+        values = caches[METRICS_ALIAS].get_many(keys)
+        return {
+            namespace: {
+                name: values.get(f"cache-metrics:{namespace}:{name}", 0)
+                for name in ("hits", "misses")
+            }
+            for namespace in NAMESPACES
+        }
+
+    def reset(self):
+        with self.lock:
+            self.pending.clear()
+        caches[METRICS_ALIAS].delete_many(
+            [f"cache-metrics:{namespace}:{name}" for namespace in NAMESPACES for name in ("hits", "misses")]
+        )
+
+
+metrics = Metrics()
+
+
+def get_metrics():
+    return metrics.get()
+
+
+class CacheNamespace:
+    """A cache alias whose keys can all be invalidated at once"""
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @property
+    def generation_key(self):
+        return f"{GENERATION_KEY}:{self.alias}"
+
+    def get_generation(self):
+        state = caches[STATE_ALIAS]
+        generation = state.get(self.generation_key)
+        if generation is None:
+            generation = uuid.uuid4().hex
+            # Another process may have set it first, so use whichever won
+            if not state.add(self.generation_key, generation, None):
+                generation = state.get(self.generation_key, generation)
+        return generation
+
+    async def aget_generation(self):
+        state = caches[STATE_ALIAS]
+        generation = await state.aget(self.generation_key)
+        if generation is None:
+            generation = uuid.uuid4().hex
+            if not await state.aadd(self.generation_key, generation, None):
+                generation = await state.aget(self.generation_key, generation)
+        return generation
+
+    def get(self, key, default=None):
+        value = self.cache.get(key, _MISSING, version=self.get_generation())
+        metrics.record(self.alias, value is not _MISSING)
+        return default if value is _MISSING else value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        self.cache.set(key, value, timeout, version=self.get_generation())
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT):
+        """Like cache.get_or_set; default may be a callable computing the value"""
+        generation = self.get_generation()
+        value = self.cache.get(key, _MISSING, version=generation)
+        metrics.record(self.alias, value is not _MISSING)
+        if value is _MISSING:
+            value = default() if callable(default) else default
+            self.cache.set(key, value, timeout, version=generation)
+        return value
+
+    async def aget_or_set(self, key, default, timeout=DEFAULT_TIMEOUT):
+        """Async get_or_set; default may also be a coroutine function"""
+        generation = await self.aget_generation()
+        value = await self.cache.aget(key, _MISSING, version=generation)
+        metrics.record(self.alias, value is not _MISSING)
+        if value is _MISSING:
+            value = default() if callable(default) else default
+            if inspect.isawaitable(value):
+                value = await value
+            await self.cache.aset(key, value, timeout, version=generation)
+        return value
+
+    def delete(self, key):
+        self.cache.delete(key, version=self.get_generation())
+
+    def invalidate(self):
+        """Drop every key in the namespace, in every process"""
+        caches[STATE_ALIAS].set(self.generation_key, uuid.uuid4().hex, None)
+
+
+def namespace(alias):
+    return CacheNamespace(alias)
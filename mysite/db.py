@@ -0,0 +1,165 @@
+"""
+Database configuration helpers and the read-replica router.
+
+PostgreSQL is configured from POSTGRES_* environment variables (see
+``databases_from_env``); without them the project keeps using SQLite,
+optionally with the connection pragmas from ``sqlite_options``.
+Views opt in to reading from replicas with ``read_from_replica`` or
+``ReplicaReadMixin``; everything else, and every write, uses "default".
+"""
+
+import os
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# The replica the current block reads from, or None for "default"
+_replica = ContextVar("replica", default=None)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def env_bool(environ, name, default=False):
+    value = environ.get(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+def databases_from_env(environ=os.environ):
+    """
+    Build the DATABASES setting for PostgreSQL from the environment:
+
+    POSTGRES_DB, POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST, POSTGRES_PORT
+        Connection details for the primary.
+    POSTGRES_CONN_MAX_AGE
+        Seconds to keep persistent connections open (default 600).
+    POSTGRES_POOL, POSTGRES_POOL_MIN_SIZE, POSTGRES_POOL_MAX_SIZE
+        Use a psycopg connection pool per process instead of persistent
+        connections. Best with threaded or ASGI workers.
+    POSTGRES_REPLICA_HOSTS
+        Comma-separated hosts of read replicas, configured as "replica_1",
+        "replica_2", ... with the primary's other settings.
+    """
+    primary = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": environ["POSTGRES_DB"],
+        "USER": environ.get("POSTGRES_USER", ""),
+        "PASSWORD": environ.get("POSTGRES_PASSWORD", ""),
+        "HOST": environ.get("POSTGRES_HOST", "localhost"),
+        "PORT": environ.get("POSTGRES_PORT", "5432"),
+        "CONN_MAX_AGE": int(environ.get("POSTGRES_CONN_MAX_AGE", 600)),
+        # Check persistent connections are still usable before reusing them
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {},
+    }
+
+    if env_bool(environ, "POSTGRES_POOL"):
+        # Django doesn't allow persistent connections alongside a pool
+        primary["CONN_MAX_AGE"] = 0
+        primary["OPTIONS"]["pool"] = {
+            "min_size": int(environ.get("POSTGRES_POOL_MIN_SIZE", 2)),
+            "max_size": int(environ.get("POSTGRES_POOL_MAX_SIZE", 10)),
+        }
+
+    databases = {"default": primary}
+    replica_hosts = [host.strip() for host in environ.get("POSTGRES_REPLICA_HOSTS", "").split(",") if host.strip()]
+    for number, host in enumerate(replica_hosts, start=1):
+        databases[f"replica_{number}"] = {
+            **primary,
+            "HOST": host,
+            "OPTIONS": {**primary["OPTIONS"]},
+            # Tests run against the primary's test database
+            "TEST": {"MIRROR": "default"},
+        }
+    return databases
+
+
+# Applied to every new connection by the tuned SQLite profile
+SQLITE_PRAGMAS = {
+    # Readers no longer block the writer, and vice versa
+    "journal_mode": "WAL",
+    # Safe with WAL; only a power loss can drop the last transactions
+    "synchronous": "NORMAL",
+    "mmap_size": 128 * 1024 * 1024,
+    # Negative values are KiB, so 64 MiB of page cache per connection
+    "cache_size": -64 * 1024,
+    "busy_timeout": 5000,
+    "temp_store": "MEMORY",
+}
+
+# SQLite's defaults, used to switch an existing database back from WAL
+SQLITE_DEFAULT_PRAGMAS = {
+    "journal_mode": "DELETE",
+    "synchronous": "FULL",
+}
+
+
+def sqlite_options(tuned=True):
+    """
+    OPTIONS for an SQLite database. The tuned profile sets the pragmas
+    above on each connection and starts transactions IMMEDIATE, so
+    concurrent workers wait on busy_timeout instead of failing with
+    "database is locked" when upgrading a read to a write.
+    """
+    if not tuned:
+        pragmas = SQLITE_DEFAULT_PRAGMAS
+        return {"init_command": ";".join(f"PRAGMA {name}={value}" for name, value in pragmas.items())}
+
+    return {
+        "init_command": ";".join(f"PRAGMA {name}={value}" for name, value in SQLITE_PRAGMAS.items()),
+        "transaction_mode": "IMMEDIATE",
+        "timeout": SQLITE_PRAGMAS["busy_timeout"] / 1000,
+    }
+
+
+def get_replicas():
+    return [alias for alias in settings.DATABASES if alias.startswith("replica_")]
+
+
+@contextmanager
+def read_from_replica(enabled=True):
+    """
+    Send reads inside the block (or decorated view) to a read replica, if
+    any are configured. Replicas may lag, so only use this for reads that
+    don't need to see the request's own writes.
+
+    One replica is picked per block and kept by blocks nested in it, so a
+    request's queries all see the same replica's view of the data.
+    """
+    replica = None
+    if enabled:
+        replica = _replica.get()
+        if replica is None:
+            replicas = get_replicas()
+            replica = random.choice(replicas) if replicas else None
+    token = _replica.set(replica)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+class ReplicaReadMixin:
+    """Read from a replica when handling safe (read-only) requests"""
+
+    def dispatch(self, request, *args, **kwargs):
+        with read_from_replica(request.method in SAFE_METHODS):
+            return super().dispatch(request, *args, **kwargs)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _replica.get()
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
@@ -0,0 +1,81 @@
+"""
+Gunicorn configuration, used with:
+
+    gunicorn -c python:mysite.gunicorn_config mysite.wsgi:application
+
+Worker and thread counts are derived from the CPUs and memory available to
+the container (cgroup limits included), and can be overridden with
+WEB_CONCURRENCY and GUNICORN_THREADS. The application is loaded before
+forking so every worker shares Django and Wagtail's imported code
+copy-on-write, and workers are recycled after a jittered number of requests
+to bound memory growth without restarting them all at once.
+"""
+
+import math
+import os
+
+# Rough resident size of one worker once it has served a few pages
+WORKER_MEMORY_MB = int(os.environ.get("GUNICORN_WORKER_MEMORY_MB", 150))
+
+# Requests in flight per CPU; most request time is spent waiting on the
+# database, the cache or storage rather than running Python
+CONCURRENCY_PER_CPU = 4
+
+MAX_THREADS = 8
+
+
+def read_cgroup(path):
+    try:
+        with open(path) as f:
+            return f.read().split()
+    except OSError:
+        return None
+
+
+def get_cpu_count():
+    """CPUs this process may use, respecting a cgroup v2 CPU quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    quota = read_cgroup("/sys/fs/cgroup/cpu.max")
+    if quota and quota[0] != "max":
+        cpus = min(cpus, max(1, math.ceil(int(quota[0]) / int(quota[1]))))
+    return cpus
+
+
+def get_memory_mb():
+    """Memory available to the container, respecting a cgroup v2 limit"""
+    memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+
+    limit = read_cgroup("/sys/fs/cgroup/memory.max")
+    if limit and limit[0] != "max":
+        memory = min(memory, int(limit[0]))
+    return memory // (1024 * 1024)
+
+
+def get_workers(cpus, memory_mb, worker_memory_mb=WORKER_MEMORY_MB):
+    """2 * CPUs + 1 processes, as many as fit in memory"""
+    return max(1, min(cpus * 2 + 1, memory_mb // worker_memory_mb))
+
+
+def get_threads(cpus, workers):
+    """Enough threads per worker to reach CONCURRENCY_PER_CPU in total"""
+    return max(1, min(MAX_THREADS, math.ceil(cpus * CONCURRENCY_PER_CPU / workers)))
+
+
+_cpus = get_cpu_count()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 0)) or get_workers(_cpus, get_memory_mb())
+threads = int(os.environ.get("GUNICORN_THREADS", 0)) or get_threads(_cpus, workers)
+worker_class = "gthread" if threads > 1 else "sync"
+
+preload_app = True
+
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", max_requests // 10))
+
+# Heartbeat files on tmpfs, so a slow container disk can't stall workers
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
@@ -13,6 +13,9 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 import os
 
+from mysite.cache import caches_from_env
+from mysite.db import databases_from_env, env_bool, sqlite_options
+
 PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 BASE_DIR = os.path.dirname(PROJECT_DIR)
 
@@ -36,6 +39,7 @@ INSTALLED_APPS = [
     'rest_framework',
     "wagtail.contrib.forms",
     "wagtail.contrib.redirects",
+    "wagtail.contrib.routable_page",
     "wagtail.embeds",
     "wagtail.sites",
     "wagtail.users",
@@ -54,13 +58,18 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.sitemaps",
     "wagtail.contrib.settings",
-    "debug_toolbar",
+    "django_tasks",
+    "django_tasks.backends.database",
 ]
 
 MIDDLEWARE = [
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    # Serve static files before the rest of the stack runs
+    "base.middleware.StaticFilesMiddleware",
+    # Request timings and query counts for the admin dashboard
+    "dashboard.middleware.PerformanceMetricsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -68,7 +77,8 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "wagtail.contrib.redirects.middleware.RedirectMiddleware",
-    
+    "base.middleware.PageCacheMiddleware",
+    "base.middleware.ConditionalPageMiddleware",
 ]
 
 ROOT_URLCONF = "mysite.urls"
@@ -105,6 +115,16 @@ DATABASES = {
     }
 }
 
+# Use PostgreSQL (and any read replicas) when configured in the environment,
+# see mysite/db.py for the variables
+if os.environ.get("POSTGRES_DB"):
+    DATABASES = databases_from_env()
+elif env_bool(os.environ, "SQLITE_TUNED"):
+    # WAL mode and connection pragmas for deployments that keep SQLite
+    DATABASES["default"]["OPTIONS"] = sqlite_options()
+
+DATABASE_ROUTERS = ["mysite.db.ReplicaRouter"]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -155,6 +175,9 @@ STATIC_URL = "/static/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 MEDIA_URL = "/media/"
 
+# Output directory for "manage.py bake_site"
+STATIC_SITE_ROOT = os.path.join(BASE_DIR, "baked")
+
 # Default storage settings
 # See https://docs.djangoproject.com/en/4.2/ref/settings/#std-setting-STORAGES
 STORAGES = {
@@ -193,8 +216,96 @@ WAGTAILADMIN_BASE_URL = "http://example.com"
 # see https://docs.wagtail.org/en/stable/advanced_topics/deploying.html#user-uploaded-files
 WAGTAILDOCS_EXTENSIONS = ['csv', 'docx', 'key', 'odt', 'pdf', 'pptx', 'rtf', 'txt', 'xlsx', 'zip']
 
-INTERNAL_IPS = [
-    # ...
-    "127.0.0.1",
-    # ...
-]
\ No newline at end of file
+# One cache alias per subsystem on a shared backend: Redis if REDIS_URL is
+# set, files under CACHE_DIR if that is, else local memory. See mysite/cache.py
+CACHES = caches_from_env()
+
+# Whole-page cache for anonymous visitors, see base/page_cache.py
+PAGE_CACHE_ENABLED = False
+PAGE_CACHE_ALIAS = "pages"
+PAGE_CACHE_TIMEOUT = 60 * 60
+# Reverse proxies that should receive purges, e.g. ["http://127.0.0.1:6081/"],
+# sent by the purge_proxies task once the change is committed
+PAGE_CACHE_PURGE_URLS = []
+# ETag and Last-Modified validators for pages, from the page cache's versions
+PAGE_CONDITIONAL_GET_ENABLED = False
+
+# Performance panels on the admin dashboard and Prometheus metrics at /metrics,
+# see dashboard/metrics.py
+PERFORMANCE_METRICS_ENABLED = False
+# Share of requests instrumented, from 0 to 1
+PERFORMANCE_METRICS_SAMPLE_RATE = 1.0
+# Bearer token Prometheus scrapes /metrics with; without one only staff can read it
+PERFORMANCE_METRICS_TOKEN = os.environ.get("PERFORMANCE_METRICS_TOKEN")
+
+# Most queries an endpoint (a URL name, or "page:app.Model" for Wagtail pages)
+# may run per request before QUERY_BUDGET_ACTION: "log" a warning or "raise".
+# They cover requests with empty caches (renditions included, so looked up in
+# the database), logged-in editors and form submissions (hence FormPage's); the
+# performance tests in each app check them.
+QUERY_BUDGETS = {
+    "page:base.FormPage": 30,
+    "page:home.HomePage": 10,
+    "page:blog.BlogIndexPage": 13,
+    "page:blog.BlogPage": 18,
+    "page:blog.BlogTagIndexPage": 12,
+    "page:pages.StandardPage": 18,
+    "page:pages.AboutPage": 11,
+    "page:pages.ContactPage": 11,
+    "page:pages.FAQPage": 12,
+    "page:pages.ServicesPage": 13,
+    "page:pages.ServicePage": 13,
+    "page:pages.FlexiblePage": 15,
+    "page:portfolio.PortfolioPage": 13,
+    "page:team.TeamPage": 14,
+    # A query matching more than search.views.MAX_RESULTS also counts its matches
+    "search": 12,
+    "wagtailapi:pages:listing": 9,
+    "wagtailapi:pages:detail": 13,
+    "wagtailapi:pages:find": 10,
+    # Wagtail's image and document listings query each item's tags, so
+    # these allow for a full page of API results (20 by default)
+    "wagtailapi:images:listing": 25,
+    "wagtailapi:images:detail": 6,
+    "wagtailapi:images:find": 4,
+    "wagtailapi:documents:listing": 25,
+    "wagtailapi:documents:detail": 6,
+    "wagtailapi:documents:find": 4,
+    "api-root": 2,
+    "team-members-list": 8,
+    "team-members-list-async": 8,
+    "team-members-detail": 5,
+    "department-list": 3,
+    "department-detail": 3,
+    "team-stats": 7,
+    "team-stats-async": 7,
+}
+QUERY_BUDGET_ACTION = "log"
+
+# URLs per sitemap file before a section is split over several, see base/sitemaps.py
+SITEMAP_LIMIT = 50_000
+
+# Expanded rich text is cached until linked pages, documents or embeds change
+RICH_TEXT_CACHE_ALIAS = "rich_text"
+RICH_TEXT_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Background tasks run as soon as the enqueuing transaction commits; production
+# queues them in the database for the db_worker command
+TASKS = {
+    "default": {
+        "BACKEND": "django_tasks.backends.immediate.ImmediateBackend",
+    },
+}
+
+# FormPage notification emails are queued and sent in batches by the
+# send_form_emails task, see base/tasks.py
+FORM_EMAIL_BATCH_SIZE = 100
+FORM_EMAIL_MAX_ATTEMPTS = 5
+# Seconds before the first retry, doubled after each failed attempt
+FORM_EMAIL_RETRY_DELAY = 60
+# Seconds a worker has to send a batch before another may pick it up
+FORM_EMAIL_CLAIM_TIMEOUT = 5 * 60
+
+# Embeds are fetched when content is saved and refreshed by the
+# refresh_embeds command once older than this many seconds
+EMBED_REFRESH_TTL = 7 * 24 * 60 * 60
\ No newline at end of file
@@ -11,6 +11,23 @@ ALLOWED_HOSTS = ["*"]
 
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
+# Serve static files from the apps' directories as they change, without
+# collectstatic. Set explicitly, since the test runner turns DEBUG off.
+WHITENOISE_AUTOREFRESH = True
+WHITENOISE_USE_FINDERS = True
+
+# Development-only tools, kept out of the base settings so production
+# neither imports them nor runs their middleware
+INSTALLED_APPS = INSTALLED_APPS + ["debug_toolbar"]
+
+MIDDLEWARE = ["debug_toolbar.middleware.DebugToolbarMiddleware"] + MIDDLEWARE
+
+INTERNAL_IPS = [
+    # ...
+    "127.0.0.1",
+    # ...
+]
+
 
 try:
     from .local import *
@@ -2,11 +2,40 @@ from .base import *
 
 DEBUG = False
 
+# Set in the environment of the application and the task worker
+SECRET_KEY = os.environ.get("SECRET_KEY")
+ALLOWED_HOSTS = [host for host in os.environ.get("ALLOWED_HOSTS", "").split(",") if host]
+
 # ManifestStaticFilesStorage is recommended in production, to prevent
 # outdated JavaScript / CSS assets being served from cache
 # (e.g. after a Wagtail upgrade).
 # See https://docs.djangoproject.com/en/4.2/ref/contrib/staticfiles/#manifeststaticfilesstorage
-STORAGES["staticfiles"]["BACKEND"] = "django.contrib.staticfiles.storage.ManifestStaticFilesStorage"
+#
+# WhiteNoise's variant also writes gzip and brotli copies of each file during
+# collectstatic, which its middleware serves to clients that accept them, with
+# far-future immutable cache headers for the hashed names.
+STORAGES["staticfiles"]["BACKEND"] = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+
+# Share caches between worker processes, on disk unless REDIS_URL is set
+CACHES = caches_from_env(default_dir=os.path.join(BASE_DIR, "cache"))
+
+# Serve anonymous page views from the whole-page cache
+PAGE_CACHE_ENABLED = True
+
+# Answer conditional requests for pages with 304 Not Modified
+PAGE_CONDITIONAL_GET_ENABLED = True
+
+# Collect request, template and search timings for the admin dashboard
+PERFORMANCE_METRICS_ENABLED = True
+# Instrument one request in ten, keeping the overhead off most requests
+PERFORMANCE_METRICS_SAMPLE_RATE = float(os.environ.get("PERFORMANCE_METRICS_SAMPLE_RATE", 0.1))
+
+# Run background tasks (form emails, embed fetching) in a separate worker
+TASKS = {
+    "default": {
+        "BACKEND": "django_tasks.backends.database.DatabaseBackend",
+    },
+}
 
 try:
     from .local import *
@@ -0,0 +1,525 @@
+import json
+import logging
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from unittest import mock, skipUnless
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.core.asgi import ASGIHandler
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection, router
+from django.http import HttpResponseNotFound
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils.text import slugify
+
+from wagtail.documents import get_document_model
+from wagtail.images import get_image_model
+from wagtail.models import Page, get_page_models
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from base import page_cache
+from base.testing import PerformanceTestCase
+from blog.models import BlogPage
+from dashboard.metrics import collector, get_metrics
+from mysite import gunicorn_config
+from mysite.cache import MAX_ENTRIES, NAMESPACES, caches_from_env, metrics, namespace
+from mysite.urls import api_router
+from mysite.db import ReplicaRouter, databases_from_env, get_replicas, read_from_replica, sqlite_options
+from pages.models import StandardPage
+from team import urls as team_urls
+from team.api import TeamMemberViewSet
+from team.models import Department, TeamMember
+
+
+class DatabaseSettingsTests(SimpleTestCase):
+    """
+    Tests for building PostgreSQL settings from the environment.
+    """
+
+    def test_persistent_connections(self):
+        databases = databases_from_env({"POSTGRES_DB": "mysite", "POSTGRES_HOST": "db"})
+
+        self.assertEqual(list(databases), ["default"])
+        self.assertEqual(databases["default"]["HOST"], "db")
+        self.assertEqual(databases["default"]["CONN_MAX_AGE"], 600)
+        self.assertTrue(databases["default"]["CONN_HEALTH_CHECKS"])
+
+    def test_pooled_connections(self):
+        databases = databases_from_env({"POSTGRES_DB": "mysite", "POSTGRES_POOL": "true"})
+
+        self.assertEqual(databases["default"]["CONN_MAX_AGE"], 0)
+        self.assertEqual(databases["default"]["OPTIONS"]["pool"], {"min_size": 2, "max_size": 10})
+
+    def test_replicas(self):
+        databases = databases_from_env({"POSTGRES_DB": "mysite", "POSTGRES_REPLICA_HOSTS": "r1, r2"})
+
+        self.assertEqual(list(databases), ["default", "replica_1", "replica_2"])
+        self.assertEqual(databases["replica_2"]["HOST"], "r2")
+        self.assertEqual(databases["replica_2"]["TEST"], {"MIRROR": "default"})
+
+
+class CacheSettingsTests(SimpleTestCase):
+    """
+    Tests for building the CACHES setting from the environment.
+    """
+
+    def test_local_memory_by_default(self):
+        config = caches_from_env({})
+
+        self.assertEqual(set(config), {"default", "state", *NAMESPACES})
+        self.assertEqual(config["search"]["BACKEND"], "django.core.cache.backends.locmem.LocMemCache")
+        self.assertEqual(config["search"]["TIMEOUT"], NAMESPACES["search"])
+
+    def test_redis(self):
+        config = caches_from_env({"REDIS_URL": "redis://cache:6379/1"})
+
+        self.assertEqual(config["team"]["LOCATION"], "redis://cache:6379/1")
+        self.assertEqual(config["team"]["KEY_PREFIX"], "team")
+        self.assertNotIn("OPTIONS", config["team"])
+
+    def test_file_based(self):
+        config = caches_from_env({"CACHE_DIR": "/srv/cache"}, default_dir="/unused")
+
+        self.assertEqual(config["navigation"]["LOCATION"], "/srv/cache/navigation")
+        self.assertEqual(config["renditions"]["OPTIONS"], {"MAX_ENTRIES": 50000, "CULL_FREQUENCY": 4})
+
+
+class CacheNamespaceTests(SimpleTestCase):
+    """
+    Tests for namespaced cache access, invalidation and metrics.
+    """
+
+    def setUp(self):
+        for alias in NAMESPACES:
+            caches[alias].clear()
+        metrics.reset()
+        self.cache = namespace("search")
+
+    def test_invalidate_drops_only_its_namespace(self):
+        self.cache.set("key", "value")
+        namespace("team").set("key", "other")
+
+        self.cache.invalidate()
+
+        self.assertIsNone(self.cache.get("key"))
+        self.assertEqual(namespace("team").get("key"), "other")
+
+    def test_get_or_set(self):
+        compute = mock.Mock(return_value=[1, 2])
+
+        self.assertEqual(self.cache.get_or_set("key", compute), [1, 2])
+        self.assertEqual(self.cache.get_or_set("key", compute), [1, 2])
+        self.assertEqual(compute.call_count, 1)
+
+    def test_metrics(self):
+        self.cache.get("key")
+        self.cache.set("key", "value")
+        self.cache.get("key")
+        self.cache.get("key")
+
+        self.assertEqual(metrics.get()["search"], {"hits": 2, "misses": 1})
+        self.assertEqual(metrics.get()["team"], {"hits": 0, "misses": 0})
+
+    def test_culling_keeps_generations_and_versions(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        with mock.patch.dict(MAX_ENTRIES, {"search": 4, "pages": 4}):
+            config = caches_from_env({"CACHE_DIR": tmp.name})
+
+        with override_settings(CACHES=config):
+            generation = self.cache.get_generation()
+            versions = page_cache.get_versions(["wagtailcore.page:1"])
+            for i in range(20):
+                self.cache.set(f"filler-{i}", i)
+                caches["pages"].set(f"filler-{i}", i)
+
+            self.assertEqual(self.cache.get_generation(), generation)
+            self.assertEqual(page_cache.get_versions(["wagtailcore.page:1"]), versions)
+            self.assertLess(len(os.listdir(os.path.join(tmp.name, "search"))), 20)
+
+
+class EnvironmentSettingsTests(SimpleTestCase):
+    """
+    Tests for development-only tools being left out of production.
+    """
+
+    def load_settings(self, module):
+        # In a subprocess, as production.py modifies dicts shared with base.py
+        script = (
+            "import importlib, json; s = importlib.import_module(%r); "
+            "print(json.dumps([s.INSTALLED_APPS, s.MIDDLEWARE]))" % module
+        )
+        output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+        return json.loads(output.stdout)
+
+    def test_production_excludes_debug_toolbar(self):
+        apps, middleware = self.load_settings("mysite.settings.production")
+
+        self.assertNotIn("debug_toolbar", apps)
+        self.assertFalse([name for name in middleware if name.startswith("debug_toolbar")])
+
+    def test_dev_includes_debug_toolbar(self):
+        apps, middleware = self.load_settings("mysite.settings.dev")
+
+        self.assertIn("debug_toolbar", apps)
+        self.assertEqual(middleware[0], "debug_toolbar.middleware.DebugToolbarMiddleware")
+
+
+class GunicornConfigTests(SimpleTestCase):
+    """
+    Tests for sizing gunicorn workers and threads.
+    """
+
+    def test_workers_follow_cpus(self):
+        self.assertEqual(gunicorn_config.get_workers(cpus=4, memory_mb=16384), 9)
+
+    def test_workers_limited_by_memory(self):
+        self.assertEqual(gunicorn_config.get_workers(cpus=4, memory_mb=512, worker_memory_mb=150), 3)
+        self.assertEqual(gunicorn_config.get_workers(cpus=4, memory_mb=100, worker_memory_mb=150), 1)
+
+    def test_threads_make_up_concurrency(self):
+        self.assertEqual(gunicorn_config.get_threads(cpus=4, workers=9), 2)
+        self.assertEqual(gunicorn_config.get_threads(cpus=4, workers=3), 6)
+        self.assertEqual(gunicorn_config.get_threads(cpus=16, workers=1), gunicorn_config.MAX_THREADS)
+
+
+class SQLiteProfileTests(SimpleTestCase):
+    """
+    Tests for the tuned SQLite connection profile.
+    """
+
+    def get_journal_mode(self, options):
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = sqlite3.connect(os.path.join(tmp, "db.sqlite3"))
+            for statement in options["init_command"].split(";"):
+                conn.execute(statement)
+            journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+            conn.close()
+        return journal_mode
+
+    def test_tuned_profile(self):
+        options = sqlite_options()
+
+        self.assertEqual(self.get_journal_mode(options), "wal")
+        self.assertEqual(options["transaction_mode"], "IMMEDIATE")
+        self.assertIn("PRAGMA busy_timeout=5000", options["init_command"])
+
+    def test_default_profile(self):
+        self.assertEqual(self.get_journal_mode(sqlite_options(tuned=False)), "delete")
+
+
+class StaticFilesTests(SimpleTestCase):
+    """
+    Tests for serving compressed, hashed static files from the application.
+    """
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        source = os.path.join(tmp.name, "source")
+        os.makedirs(os.path.join(source, "css"))
+        with open(os.path.join(source, "css", "mysite.css"), "w") as f:
+            f.write("body { margin: 0; }\n" * 100)
+
+        settings_override = override_settings(
+            STATIC_ROOT=os.path.join(tmp.name, "static"),
+            STATICFILES_DIRS=[source],
+            STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"],
+            WHITENOISE_AUTOREFRESH=False,
+            STORAGES={
+                **settings.STORAGES,
+                "staticfiles": {"BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"},
+            },
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        call_command("collectstatic", interactive=False, verbosity=0)
+
+        self.static_root = settings.STATIC_ROOT
+        self.middleware = WhiteNoiseMiddleware(lambda request: HttpResponseNotFound())
+
+    def get(self, path, accept_encoding):
+        request = RequestFactory().get(path, HTTP_ACCEPT_ENCODING=accept_encoding)
+        return self.middleware(request)
+
+    def test_collectstatic_compresses_hashed_files(self):
+        hashed = staticfiles_storage.stored_name("css/mysite.css")
+
+        self.assertNotEqual(hashed, "css/mysite.css")
+        for suffix in ("", ".gz", ".br"):
+            self.assertTrue(os.path.exists(os.path.join(self.static_root, hashed + suffix)))
+
+    def test_hashed_files_are_immutable(self):
+        response = self.get(static("css/mysite.css"), "gzip, br")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+
+    def test_content_negotiation(self):
+        url = static("css/mysite.css")
+
+        self.assertEqual(self.get(url, "gzip, br")["Content-Encoding"], "br")
+        self.assertEqual(self.get(url, "gzip")["Content-Encoding"], "gzip")
+        self.assertNotIn("Content-Encoding", self.get(url, ""))
+
+
+@mock.patch("mysite.db.get_replicas", return_value=["replica_1"])
+class ReplicaRouterTests(SimpleTestCase):
+    """
+    Tests for routing reads to replicas.
+    """
+
+    router = ReplicaRouter()
+
+    def test_reads_use_default_outside_replica_views(self, get_replicas):
+        self.assertIsNone(self.router.db_for_read(TeamMember))
+
+    def test_reads_use_replica_inside_replica_views(self, get_replicas):
+        with read_from_replica():
+            self.assertEqual(self.router.db_for_read(TeamMember), "replica_1")
+            self.assertEqual(self.router.db_for_write(TeamMember), "default")
+
+    def test_disabled_for_unsafe_requests(self, get_replicas):
+        with read_from_replica(False):
+            self.assertIsNone(self.router.db_for_read(TeamMember))
+
+    def test_one_replica_per_block(self, get_replicas):
+        get_replicas.return_value = [f"replica_{n}" for n in range(1, 9)]
+        with read_from_replica():
+            replica = self.router.db_for_read(TeamMember)
+            self.assertEqual({self.router.db_for_read(TeamMember) for _ in range(20)}, {replica})
+            # e.g. a view calling a helper decorated with read_from_replica
+            with read_from_replica():
+                self.assertEqual(self.router.db_for_read(Department), replica)
+
+
+@skipUnless(os.environ.get("POSTGRES_DB"), "Set POSTGRES_DB and the other POSTGRES_* variables to test PostgreSQL")
+class PostgreSQLTests(TestCase):
+    """
+    Tests against the PostgreSQL server, pool and replicas configured by the
+    environment (see mysite.db.databases_from_env).
+    """
+
+    databases = "__all__"
+
+    def test_pooled_connection(self):
+        if "pool" not in settings.DATABASES["default"]["OPTIONS"]:
+            self.skipTest("Set POSTGRES_POOL=true to test the connection pool")
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            self.assertEqual(cursor.fetchone(), (1,))
+        self.assertIsNotNone(connection.pool)
+
+    def test_reads_from_replica(self):
+        if not get_replicas():
+            self.skipTest("Set POSTGRES_REPLICA_HOSTS to test reading from replicas")
+        Department.objects.create(name="Engineering")
+
+        with read_from_replica():
+            replica = router.db_for_read(Department)
+            self.assertIn(replica, get_replicas())
+            # Replicas mirror the default test database
+            self.assertEqual(Department.objects.count(), 1)
+            self.assertEqual(Department.objects.all().db, replica)
+
+
+class AsyncViewTests(TestCase):
+    """
+    Tests for the async team and search views.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        engineering = Department.objects.create(name="Engineering")
+        for i in range(15):
+            TeamMember.objects.create(
+                name=f"Member {i:02}", job_title="Developer" if i % 2 else "Designer",
+                department=engineering if i < 5 else None, is_featured=i % 3 == 0,
+            )
+
+    def setUp(self):
+        for alias in NAMESPACES:
+            caches[alias].clear()
+
+    def viewset_list(self, query):
+        # Same path as the async view, so the pagination links match
+        request = RequestFactory().get("/api/team/async/members/", query, HTTP_HOST="testserver")
+        response = TeamMemberViewSet.as_view({"get": "list"})(request)
+        response.render()
+        return response.status_code, json.loads(response.content)
+
+    async def test_member_list_matches_viewset(self):
+        department = await Department.objects.aget()
+        queries = [
+            {},
+            {"page": "2"},
+            {"page": "last", "page_size": "5"},
+            {"page": "3", "page_size": "2"},
+            {"page_size": "0"},
+            {"page_size": "500"},
+            {"page_size": "many"},
+            {"search": "developer", "ordering": "-name"},
+            {"search": "member,developer 1"},
+            {"search": '"member 1"'},
+            {"ordering": "job_title,-name"},
+            {"ordering": "bio"},
+            {"department": str(department.pk), "is_featured": "true"},
+            {"is_featured": "1", "is_active": "True"},
+            {"is_featured": "0"},
+            {"is_featured": "maybe"},
+            {"page": "9"},
+            {"page": "first"},
+            {"department": "999"},
+            {"department": "engineering"},
+        ]
+        for query in queries:
+            with self.subTest(query=query):
+                response = await self.async_client.get("/api/team/async/members/", query)
+                expected = await sync_to_async(self.viewset_list)(query)
+                self.assertEqual((response.status_code, response.json()), expected)
+
+    async def test_team_stats(self):
+        response = await self.async_client.get("/api/team/async/stats/")
+
+        self.assertEqual(response.json()["total_members"], 15)
+        self.assertEqual(response.json()["departments_with_members"], 1)
+        self.assertEqual(response.json(), (await sync_to_async(self.client.get)("/api/team/stats/")).json())
+
+    def test_canonical_routes_use_drf(self):
+        for url in ("/api/team/members/", "/api/team/stats/"):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_ACCEPT="text/html")
+
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, "Django REST framework")
+
+    async def test_search(self):
+        page = await sync_to_async(self.create_page)("Careers")
+
+        response = await self.async_client.get("/search/", {"query": "careers"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result.pk for result in response.context["search_results"]], [page.pk])
+
+    def test_middleware_runs_without_adapting(self):
+        handler = ASGIHandler()
+        with self.assertLogs("django.request", "DEBUG") as logs:
+            # assertLogs needs at least one record
+            logging.getLogger("django.request").debug("Loaded")
+            with self.settings(PAGE_CACHE_ENABLED=True, PAGE_CONDITIONAL_GET_ENABLED=True,
+                               PERFORMANCE_METRICS_ENABLED=True):
+                handler.load_middleware(is_async=True)
+
+        self.assertEqual([record.getMessage() for record in logs.records], ["Loaded"])
+
+    @override_settings(PAGE_CACHE_ENABLED=True)
+    async def test_page_cache(self):
+        page = await sync_to_async(self.create_page)("Careers")
+        url = await sync_to_async(lambda: page.url)()
+
+        response = await self.async_client.get(url)
+        self.assertEqual(response["X-Page-Cache"], "miss")
+
+        response = await self.async_client.get(url)
+        self.assertEqual(response["X-Page-Cache"], "hit")
+        self.assertContains(response, "Careers")
+
+    @override_settings(PERFORMANCE_METRICS_ENABLED=True)
+    async def test_queries_counted(self):
+        collector.reset()
+
+        await self.async_client.get("/api/team/async/stats/")
+
+        queries = get_metrics()["metrics"]["queries"]
+        self.assertEqual(len(queries), 1)
+        self.assertGreater(next(iter(queries.values()))["total"], 0)
+
+    async def test_results_beyond_the_cache_are_searched(self):
+        titles = {"Careers", "Careers in design", "Careers in engineering"}
+        for title in titles:
+            await sync_to_async(self.create_page)(title)
+
+        found = []
+        with mock.patch("search.views.MAX_RESULTS", 2), mock.patch("search.views.RESULTS_PER_PAGE", 1):
+            for page in (1, 2, 3):
+                response = await self.async_client.get("/search/", {"query": "careers", "page": page})
+                results = response.context["search_results"]
+                self.assertEqual(results.paginator.count, 3)
+                found.extend(result.title for result in results)
+
+        self.assertEqual(sorted(found), sorted(titles))
+
+    def create_page(self, title):
+        page = StandardPage(title=title, slug=slugify(title))
+        # The search index is updated by a task once the page is committed
+        with self.captureOnCommitCallbacks(execute=True):
+            Page.objects.get(slug="home").add_child(instance=page)
+        return page
+
+
+class APIQueryBudgetTests(PerformanceTestCase):
+    """
+    Query budgets for every /api/v2/ and /api/team/ endpoint, and a check
+    that every page type and API endpoint has one.
+    """
+
+    content = ("blog", "pages", "team")
+
+    def test_wagtail_api(self):
+        post = BlogPage.objects.first()
+        image = get_image_model().objects.first()
+        document = get_document_model().objects.first()
+        self.assertQueryBudgets([
+            ("/api/v2/pages/", {}),
+            ("/api/v2/pages/", {"data": {"type": "blog.BlogPage", "fields": "*", "limit": 20}}),
+            (f"/api/v2/pages/{post.pk}/", {}),
+            ("/api/v2/pages/find/", {"data": {"html_path": post.url}, "status_code": 302}),
+            ("/api/v2/images/", {"data": {"limit": 20}}),
+            (f"/api/v2/images/{image.pk}/", {}),
+            ("/api/v2/images/find/", {"data": {"id": image.pk}, "status_code": 302}),
+            ("/api/v2/documents/", {}),
+            (f"/api/v2/documents/{document.pk}/", {}),
+            ("/api/v2/documents/find/", {"data": {"id": document.pk}, "status_code": 302}),
+        ])
+
+    def test_team_api(self):
+        member = self.members[0]
+        self.assertQueryBudgets([
+            ("/api/team/", {}),
+            ("/api/team/members/", {}),
+            ("/api/team/members/", {"data": {"page_size": 50}}),
+            ("/api/team/members.json", {}),
+            (f"/api/team/members/{member.pk}/", {}),
+            ("/api/team/departments/", {}),
+            (f"/api/team/departments/{member.department_id}/", {}),
+            ("/api/team/stats/", {}),
+            ("/api/team/async/members/", {}),
+            ("/api/team/async/stats/", {}),
+        ])
+
+    def test_every_endpoint_has_a_budget(self):
+        budgets = settings.QUERY_BUDGETS
+        for model in get_page_models():
+            if model._meta.app_config.path.startswith(str(settings.BASE_DIR)):
+                self.assertIn(f"page:{model._meta.label}", budgets)
+
+        def names(patterns, namespace=""):
+            for pattern in patterns:
+                if hasattr(pattern, "url_patterns"):
+                    prefix = f"{namespace}{pattern.namespace}:" if pattern.namespace else namespace
+                    yield from names(pattern.url_patterns, prefix)
+                elif pattern.name:
+                    yield namespace + pattern.name
+
+        for name in [*names(api_router.get_urlpatterns(), "wagtailapi:"), *names(team_urls.urlpatterns)]:
+            self.assertIn(name, budgets)
+
@@ -1,6 +1,9 @@
 from .api import api_router
+from base import sitemaps
+from dashboard import views as dashboard_views
 from search import views as search_views
 
+from django.apps import apps
 from django.contrib import admin
 from django.urls import path, include, re_path
 from django.conf import settings
@@ -9,17 +12,16 @@ from wagtail.admin import urls as wagtailadmin_urls
 from wagtail import urls as wagtail_urls
 from wagtail.documents import urls as wagtaildocs_urls
 from wagtail.api.v2.router import WagtailAPIRouter
-from wagtail.api.v2.views import PagesAPIViewSet
 from wagtail.images.api.v2.views import ImagesAPIViewSet
 from wagtail.documents.api.v2.views import DocumentsAPIViewSet
 
-from debug_toolbar.toolbar import debug_toolbar_urls
+from pages.api import CustomPagesAPIViewSet
 
 # Create the router
 api_router = WagtailAPIRouter('wagtailapi')
 
 # Add the standard endpoints
-api_router.register_endpoint('pages', PagesAPIViewSet)
+api_router.register_endpoint('pages', CustomPagesAPIViewSet)
 api_router.register_endpoint('images', ImagesAPIViewSet)
 api_router.register_endpoint('documents', DocumentsAPIViewSet)
 
@@ -30,9 +32,18 @@ urlpatterns = [
     path("admin/", include(wagtailadmin_urls)),
     path("documents/", include(wagtaildocs_urls)),
     path("search/", search_views.search, name="search"),
+    path("sitemap.xml", sitemaps.index),
+    path("sitemap-<slug:section>.xml", sitemaps.sitemap, name="sitemap"),
     path('api/v2/', api_router.urls),
+    path("metrics", dashboard_views.prometheus_metrics, name="prometheus_metrics"),
     path('', include('team.urls')),  # Include team API URLs
-] + debug_toolbar_urls()
+]
+
+# Only development settings install the debug toolbar
+if apps.is_installed("debug_toolbar"):
+    from debug_toolbar.toolbar import debug_toolbar_urls
+
+    urlpatterns += debug_toolbar_urls()
 
 
 if settings.DEBUG:
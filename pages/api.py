@@ -1,15 +1,65 @@
+import hashlib
+
+from django.core.exceptions import FieldDoesNotExist
+
+from rest_framework.response import Response
+
 from wagtail.api.v2.views import PagesAPIViewSet
 from wagtail.api.v2.router import WagtailAPIRouter
 from wagtail.images.api.v2.views import ImagesAPIViewSet
 from wagtail.documents.api.v2.views import DocumentsAPIViewSet
 
+from mysite.cache import namespace
+from mysite.db import ReplicaReadMixin
+
+
+def get_prefetched_api_fields(model):
+    """Names of a page model's API fields holding several objects each"""
+    names = []
+    for api_field in getattr(model, 'api_fields', []):
+        name = getattr(api_field, 'name', api_field)
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        if field.many_to_many or field.one_to_many:
+            names.append(name)
+    return names
+
 
-class CustomPagesAPIViewSet(PagesAPIViewSet):
+class CustomPagesAPIViewSet(ReplicaReadMixin, PagesAPIViewSet):
     """
-    Custom Pages API ViewSet that exposes custom page fields
+    Custom Pages API ViewSet that exposes custom page fields, reads from a
+    replica when one is configured and caches responses until pages change
     """
     # Don't override body_fields - let api_fields in models handle it
-    pass
+
+    def get_queryset(self):
+        # Fetch each field listing several objects (e.g. BlogPage.authors)
+        # for the whole page of results, rather than once per page
+        queryset = super().get_queryset().select_related('locale')
+        return queryset.prefetch_related(*get_prefetched_api_fields(queryset.model))
+
+    def listing_view(self, request):
+        return self.cached_response(request, super().listing_view)
+
+    def detail_view(self, request, pk):
+        return self.cached_response(request, super().detail_view, pk)
+
+    def cached_response(self, request, view, *args):
+        # URLs in the response are built from the request's host
+        url = request.build_absolute_uri()
+        key = "response:" + hashlib.md5(url.encode()).hexdigest()
+        cache = namespace("pages_api")
+
+        data = cache.get(key)
+        if data is None:
+            response = view(request, *args)
+            if response.status_code != 200:
+                return response
+            data = response.data
+            cache.set(key, data)
+        return Response(data)
 
 
 # Create the router
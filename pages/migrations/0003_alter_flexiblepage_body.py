@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:01
+
+import wagtail.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0002_standardpage_header_image'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='flexiblepage',
+            name='body',
+            field=wagtail.fields.StreamField([('heading', 0), ('paragraph', 1), ('image', 2), ('embed', 3), ('document', 4), ('call_to_action', 10), ('quote', 13), ('columns', 17), ('anchor', 18)], blank=True, block_lookup={0: ('wagtail.blocks.CharBlock', (), {'form_classname': 'title', 'icon': 'title', 'max_length': 255}), 1: ('wagtail.blocks.RichTextBlock', (), {'icon': 'pilcrow'}), 2: ('wagtail.images.blocks.ImageChooserBlock', (), {'icon': 'image'}), 3: ('base.embeds.StoredEmbedBlock', (), {'icon': 'media'}), 4: ('wagtail.documents.blocks.DocumentChooserBlock', (), {'icon': 'doc-full-inverse'}), 5: ('wagtail.blocks.CharBlock', (), {'max_length': 255}), 6: ('wagtail.blocks.RichTextBlock', (), {}), 7: ('wagtail.blocks.CharBlock', (), {'max_length': 50}), 8: ('wagtail.blocks.URLBlock', (), {'required': False}), 9: ('wagtail.blocks.PageChooserBlock', (), {'required': False}), 10: ('wagtail.blocks.StructBlock', [[('title', 5), ('text', 6), ('button_text', 7), ('button_link', 8), ('button_page', 9)]], {'icon': 'plus-inverse'}), 11: ('wagtail.blocks.TextBlock', (), {}), 12: ('wagtail.blocks.CharBlock', (), {'max_length': 100, 'required': False}), 13: ('wagtail.blocks.StructBlock', [[('text', 11), ('author', 12), ('author_title', 12)]], {'icon': 'openquote'}), 14: ('wagtail.blocks.CharBlock', (), {'max_length': 255, 'required': False}), 15: ('wagtail.blocks.StructBlock', [[('heading', 14), ('content', 6)]], {}), 16: ('wagtail.blocks.ListBlock', (15,), {}), 17: ('wagtail.blocks.StructBlock', [[('columns', 16)]], {'icon': 'grip'}), 18: ('wagtail.blocks.CharBlock', (), {'help_text': 'Add an anchor/ID for linking to this section', 'icon': 'link', 'max_length': 100})}),
+        ),
+    ]
@@ -8,12 +8,15 @@ from wagtail.blocks import (
     TextBlock, URLBlock, PageChooserBlock, ListBlock
 )
 from wagtail.images.blocks import ImageChooserBlock
-from wagtail.embeds.blocks import EmbedBlock
 from wagtail.documents.blocks import DocumentChooserBlock
 from wagtail.search import index
 from wagtail.api import APIField
 from modelcluster.fields import ParentalKey
 
+from base.blocks import prefetch_renditions
+from base.embeds import StoredEmbedBlock
+from base.rich_text import prefetch_rich_text
+
 
 class StandardPage(Page):
     """Generic content pages (About, Privacy, etc.)"""
@@ -101,6 +104,12 @@ class AboutPage(Page):
         APIField('body'),
     ]
 
+    def get_context(self, request, *args, **kwargs):
+        context = super().get_context(request, *args, **kwargs)
+        # Resolve links in all four fields with one query per link type
+        prefetch_rich_text(self.intro, self.mission, self.vision, self.body)
+        return context
+
     class Meta:
         verbose_name = "About Page"
 
@@ -123,6 +132,13 @@ class ServicesPage(Page):
         APIField('intro'),
     ]
 
+    def get_context(self, request, *args, **kwargs):
+        context = super().get_context(request, *args, **kwargs)
+        services = self.get_children().live().specific()
+        prefetch_rich_text(self.intro, *(service.description for service in services))
+        context['services'] = services
+        return context
+
     class Meta:
         verbose_name = "Services Page"
 
@@ -165,6 +181,11 @@ class ServicePage(Page):
         APIField('pricing_info'),
     ]
 
+    def get_context(self, request, *args, **kwargs):
+        context = super().get_context(request, *args, **kwargs)
+        prefetch_rich_text(self.description, self.features)
+        return context
+
     class Meta:
         verbose_name = "Service Page"
 
@@ -280,6 +301,13 @@ class FAQPage(Page):
         APIField('faq_items'),
     ]
 
+    def get_context(self, request, *args, **kwargs):
+        context = super().get_context(request, *args, **kwargs)
+        faq_items = list(self.faq_items.all())
+        prefetch_rich_text(self.intro, *(item.answer for item in faq_items))
+        context['faq_items'] = faq_items
+        return context
+
     class Meta:
         verbose_name = "FAQ Page"
 
@@ -301,7 +329,7 @@ class FlexibleContentBlock(StreamBlock):
         icon="image"
     )
 
-    embed = EmbedBlock(
+    embed = StoredEmbedBlock(
         icon="media"
     )
 
@@ -360,6 +388,11 @@ class FlexiblePage(Page):
         FieldPanel('body'),
     ]
 
+    def get_context(self, request, *args, **kwargs):
+        context = super().get_context(request, *args, **kwargs)
+        prefetch_renditions(self.body)
+        return context
+
     search_fields = Page.search_fields + [
         index.SearchField('subtitle'),
     ]
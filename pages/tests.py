@@ -1,3 +1,13 @@
-from django.test import TestCase
+from base.testing import PerformanceTestCase
 
-# Create your tests here.
+
+class PagesQueryBudgetTests(PerformanceTestCase):
+    """
+    Query budgets for every page type in the pages app, with long listings
+    and StreamFields.
+    """
+
+    content = ("pages",)
+
+    def test_page_types(self):
+        self.assertQueryBudgets([(page.url, {}) for page in self.pages.values()])
@@ -4,6 +4,7 @@ from wagtail.models import Page
 from wagtail.fields import StreamField
 from wagtail.admin.panels import FieldPanel
 
+from base.blocks import prefetch_renditions
 from portfolio.blocks import PortfolioStreamBlock
 
 
@@ -20,3 +21,8 @@ class PortfolioPage(Page):
     content_panels = Page.content_panels + [
         FieldPanel("body"),
     ]
+
+    def get_context(self, request, *args, **kwargs):
+        context = super().get_context(request, *args, **kwargs)
+        prefetch_renditions(self.body)
+        return context
@@ -1,3 +1,13 @@
-from django.test import TestCase
+from base.testing import PerformanceTestCase
 
-# Create your tests here.
+
+class PortfolioQueryBudgetTests(PerformanceTestCase):
+    """
+    Query budgets for the portfolio page, with a long stream of cards and
+    featured posts.
+    """
+
+    content = ("portfolio",)
+
+    def test_portfolio_page(self):
+        self.assertQueryBudget(self.portfolio.url)
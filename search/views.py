@@ -1,8 +1,16 @@
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
 from django.template.response import TemplateResponse
 
 from wagtail.models import Page
 
+from dashboard.metrics import record
+from mysite.cache import namespace
+from mysite.db import read_from_replica
+
 # To enable logging of search queries for use with the "Promoted search results" module
 # <https://docs.wagtail.org/en/stable/reference/contrib/searchpromotions.html>
 # uncomment the following line and the lines indicated in the search function
@@ -11,30 +19,96 @@ from wagtail.models import Page
 # from wagtail.contrib.search_promotions.models import Query
 
 
-def search(request):
+RESULTS_PER_PAGE = 10
+
+# Only the ids of the best matches (10 pages of them) are cached, so a broad
+# query doesn't load and cache the id of every page on the site. Later pages
+# are searched for again when requested.
+MAX_RESULTS = 100
+
+
+def search_pages(search_query):
+    return Page.objects.live().only("id").search(search_query)
+
+
+def get_search_results(search_query):
+    """The ids of the best matches for a query, and how many pages match"""
+    search_results = search_pages(search_query)
+    ids = [page.pk for page in search_results[:MAX_RESULTS + 1]]
+    count = len(ids) if len(ids) <= MAX_RESULTS else search_results.count()
+    return {"ids": ids[:MAX_RESULTS], "count": count}
+
+
+class SearchResultIds:
+    """
+    Every matching page id for the paginator, served from the cached ids
+    where they reach and by searching again beyond them
+    """
+
+    def __init__(self, search_query, ids, count):
+        self.search_query = search_query
+        self.ids = ids
+        self._count = count
+
+    def count(self):
+        return self._count
+
+    def is_cached(self, stop):
+        """Whether the ids up to stop are all cached"""
+        return stop <= len(self.ids) or len(self.ids) == self._count
+
+    def __getitem__(self, index):
+        if self.is_cached(index.stop):
+            return self.ids[index]
+        return [page.pk for page in search_pages(self.search_query)[index]]
+
+
+async def search(request):
     search_query = request.GET.get("query", None)
     page = request.GET.get("page", 1)
 
-    # Search
-    if search_query:
-        search_results = Page.objects.live().search(search_query)
+    with read_from_replica():
+        # Search, caching the ids of the matching pages until content changes.
+        # Search backends are synchronous, so run the search in a thread
+        if search_query:
+            key = "ids:" + hashlib.md5(search_query.encode()).hexdigest()
+            start = time.perf_counter()
+            searched = False
+
+            def run_search():
+                nonlocal searched
+                searched = True
+                return sync_to_async(get_search_results)(search_query)
+
+            cached = await namespace("search").aget_or_set(key, run_search)
+            search_results = SearchResultIds(search_query, cached["ids"], cached["count"])
+            record("search", "uncached" if searched else "cached", (time.perf_counter() - start) * 1000)
+
+            # To log this query for use with the "Promoted search results" module:
 
-        # To log this query for use with the "Promoted search results" module:
+            # query = await sync_to_async(Query.get)(search_query)
+            # await sync_to_async(query.add_hit)()
 
-        # query = Query.get(search_query)
-        # query.add_hit()
+        else:
+            search_results = []
 
-    else:
-        search_results = Page.objects.none()
+        # Pagination
+        paginator = Paginator(search_results, RESULTS_PER_PAGE)
+        try:
+            number = paginator.validate_number(page)
+        except PageNotAnInteger:
+            number = 1
+        except EmptyPage:
+            number = paginator.num_pages
+        if search_query and not search_results.is_cached(number * RESULTS_PER_PAGE):
+            # Beyond the cached ids, so the page has to be searched for
+            search_results = await sync_to_async(paginator.page)(number)
+        else:
+            search_results = paginator.page(number)
 
-    # Pagination
-    paginator = Paginator(search_results, 10)
-    try:
-        search_results = paginator.page(page)
-    except PageNotAnInteger:
-        search_results = paginator.page(1)
-    except EmptyPage:
-        search_results = paginator.page(paginator.num_pages)
+        # Load the pages shown on this page of results only
+        pages = await Page.objects.ain_bulk(search_results.object_list)
+        search_results.object_list = [pages[pk] for pk in search_results.object_list if pk in pages]
 
     return TemplateResponse(
         request,
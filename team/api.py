@@ -1,8 +1,16 @@
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 from rest_framework import viewsets, filters
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.request import Request
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 from django_filters.rest_framework import DjangoFilterBackend
+from mysite.cache import namespace
+from mysite.db import ReplicaReadMixin, read_from_replica
 from .models import TeamMember, Department
 from .serializers import TeamMemberSerializer, DepartmentSerializer
 
@@ -13,10 +21,13 @@ class TeamMemberPagination(PageNumberPagination):
     max_page_size = 50
 
 
-class TeamMemberViewSet(viewsets.ReadOnlyModelViewSet):
+class TeamMemberViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for team members
     Supports filtering, searching, and ordering
+
+    team_member_list_async serves the same list as plain JSON without
+    holding a worker thread under ASGI
     """
     serializer_class = TeamMemberSerializer
     pagination_class = TeamMemberPagination
@@ -28,10 +39,12 @@ class TeamMemberViewSet(viewsets.ReadOnlyModelViewSet):
     ordering = ['sort_order', 'name']
     
     def get_queryset(self):
-        return TeamMember.objects.select_related('department').prefetch_related('social_links')
+        return TeamMember.objects.select_related('department', 'photo').prefetch_related(
+            'social_links', 'photo__renditions'
+        )
 
 
-class DepartmentViewSet(viewsets.ReadOnlyModelViewSet):
+class DepartmentViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for departments
     """
@@ -39,14 +52,109 @@ class DepartmentViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = DepartmentSerializer
 
 
+async def filter_team_members(request, queryset):
+    """Apply TeamMemberViewSet's filter backends, search and ordering to a queryset"""
+    view = TeamMemberViewSet(request=request, format_kwarg=None, action='list')
+    for backend in view.filter_backends:
+        if backend is DjangoFilterBackend:
+            # Validating the filters looks up the department
+            queryset = await sync_to_async(backend().filter_queryset)(request, queryset, view)
+        else:
+            queryset = backend().filter_queryset(request, queryset, view)
+    return queryset
+
+
+async def paginate_team_members(request, queryset):
+    """A page of the queryset and its links, as TeamMemberPagination would paginate it"""
+    pagination = TeamMemberPagination()
+    page_size = pagination.get_page_size(request)
+
+    count = await queryset.acount()
+    last_page = max((count + page_size - 1) // page_size, 1)
+    page = request.query_params.get(pagination.page_query_param) or '1'
+    page = last_page if page in pagination.last_page_strings else page
+    try:
+        page = int(page)
+        if not 1 <= page <= last_page:
+            raise ValueError
+    except ValueError:
+        raise NotFound(pagination.invalid_page_message)
+
+    start = (page - 1) * page_size
+    members = [member async for member in queryset[start:start + page_size]]
+
+    url = request.build_absolute_uri()
+    param = pagination.page_query_param
+    if page == 1:
+        previous = None
+    elif page == 2:
+        previous = remove_query_param(url, param)
+    else:
+        previous = replace_query_param(url, param, page - 1)
+    return {
+        'count': count,
+        'next': replace_query_param(url, param, page + 1) if page < last_page else None,
+        'previous': previous,
+    }, members
+
+
+@require_GET
+async def team_member_list_async(request):
+    """
+    Async team member listing, filtered and paginated by TeamMemberViewSet's
+    backends and pagination settings, with the same JSON response. It skips
+    DRF's content negotiation, browsable API, authentication and throttling,
+    which can't run without a worker thread.
+    """
+    request = Request(request)
+    queryset = TeamMember.objects.select_related('department', 'photo').prefetch_related(
+        'social_links', 'photo__renditions'
+    )
+    with read_from_replica():
+        try:
+            queryset = await filter_team_members(request, queryset)
+            data, members = await paginate_team_members(request, queryset)
+        except APIException as e:
+            detail = e.detail if isinstance(e.detail, dict) else {'detail': e.detail}
+            return JsonResponse(detail, status=e.status_code)
+
+        # Serializing may generate image renditions, so do it off the event loop
+        data['results'] = await sync_to_async(
+            lambda: TeamMemberSerializer(members, many=True, context={'request': request}).data
+        )()
+    return JsonResponse(data)
+
+
 @api_view(['GET'])
+@read_from_replica()
 def team_stats(request):
-    """Custom endpoint for team statistics"""
-    stats = {
+    """Custom endpoint for team statistics, cached until team data changes"""
+    return Response(namespace('team').get_or_set('stats', get_team_stats))
+
+
+@require_GET
+async def team_stats_async(request):
+    """team_stats as plain JSON, sharing its cache, for ASGI"""
+    with read_from_replica():
+        stats = await namespace('team').aget_or_set('stats', aget_team_stats)
+    return JsonResponse(stats)
+
+
+def get_team_stats():
+    return {
         'total_members': TeamMember.objects.count(),
         'active_members': TeamMember.objects.filter(is_active=True).count(),
         'featured_members': TeamMember.objects.filter(is_featured=True).count(),
         'departments': Department.objects.count(),
         'departments_with_members': Department.objects.filter(team_members__isnull=False).distinct().count()
     }
-    return Response(stats)
\ No newline at end of file
+
+
+async def aget_team_stats():
+    return {
+        'total_members': await TeamMember.objects.acount(),
+        'active_members': await TeamMember.objects.filter(is_active=True).acount(),
+        'featured_members': await TeamMember.objects.filter(is_featured=True).acount(),
+        'departments': await Department.objects.acount(),
+        'departments_with_members': await Department.objects.filter(team_members__isnull=False).distinct().acount()
+    }
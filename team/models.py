@@ -3,7 +3,6 @@ from wagtail.models import Page
 from wagtail.fields import RichTextField
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel, InlinePanel
 from wagtail.api import APIField
-from wagtail.images.api.fields import ImageRenditionField
 from wagtail.snippets.models import register_snippet
 from wagtail.search import index
 from modelcluster.fields import ParentalKey
@@ -178,6 +177,9 @@ class TeamPage(Page):
         help_text="Only show featured team members"
     )
     
+    # Lists team members and departments without referencing them directly
+    cache_dependencies = ['team.TeamMember', 'team.Department']
+
     content_panels = Page.content_panels + [
         FieldPanel('intro'),
         MultiFieldPanel([
@@ -189,7 +191,9 @@ class TeamPage(Page):
     
     def get_team_members(self):
         """Get filtered team members"""
-        team_members = TeamMember.objects.all()
+        team_members = TeamMember.objects.select_related('department', 'photo').prefetch_related(
+            'social_links', 'photo__renditions'
+        )
         
         if self.show_only_active:
             team_members = team_members.filter(is_active=True)
@@ -201,23 +205,16 @@ class TeamPage(Page):
     
     def get_departments_with_members(self):
         """Get departments with their team members"""
-        departments = Department.objects.prefetch_related('team_members').all()
-        result = []
-        
-        for dept in departments:
-            members = dept.team_members.all()
-            if self.show_only_active:
-                members = members.filter(is_active=True)
-            if self.show_only_featured:
-                members = members.filter(is_featured=True)
-            
-            if members.exists():
-                result.append({
-                    'department': dept,
-                    'members': members.order_by('sort_order', 'name')
-                })
-        
-        return result
+        # Group one query's members, rather than querying per department
+        members_by_department = {}
+        for member in self.get_team_members():
+            members_by_department.setdefault(member.department_id, []).append(member)
+
+        return [
+            {'department': dept, 'members': members_by_department[dept.pk]}
+            for dept in Department.objects.all()
+            if dept.pk in members_by_department
+        ]
     
     # API fields
     api_fields = [
@@ -0,0 +1,23 @@
+from base.testing import PerformanceTestCase
+from team.models import TeamPage
+
+
+class TeamQueryBudgetTests(PerformanceTestCase):
+    """
+    Query budgets for the team page, with a realistic number of members.
+    """
+
+    content = ("team",)
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.page = cls.home.add_child(instance=TeamPage(title="Team", slug="team"))
+
+    def test_team_page(self):
+        for show_departments in (True, False):
+            with self.subTest(show_departments=show_departments):
+                self.page.show_departments = show_departments
+                self.page.save()
+                response = self.assertQueryBudget(self.page.url)
+                self.assertContains(response, "Member 0")
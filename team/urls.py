@@ -7,6 +7,9 @@ router.register(r'members', api.TeamMemberViewSet, basename='team-members')
 router.register(r'departments', api.DepartmentViewSet)
 
 urlpatterns = [
-    path('api/team/', include(router.urls)),
     path('api/team/stats/', api.team_stats, name='team-stats'),
-]
\ No newline at end of file
+    # Plain JSON variants that don't tie up a worker thread under ASGI
+    path('api/team/async/members/', api.team_member_list_async, name='team-members-list-async'),
+    path('api/team/async/stats/', api.team_stats_async, name='team-stats-async'),
+    path('api/team/', include(router.urls)),
+]